@@ -1,14 +1,15 @@
-from typing import Generator, Union
-import re
-import asyncio
-import json
+from typing import AsyncIterator, Union
 from fastapi import APIRouter, Depends, Response
 from fastapi.responses import StreamingResponse as FastAPIStreamingResponse, JSONResponse
 from models import ApiRequest, ApiResponse
-from services.llm import get_llm
-from services.retrieval import search_in_chromadb
+from services.llm import get_llm, astream_answer
+from services.retrieval import asearch_in_chromadb, aembed_queries
+from services.answer_cache import answer_cache
 from core.config import settings
 from langchain.prompts import PromptTemplate
+from utils.streaming_utils import ndjson_line
+from utils.context_packer import context_packer
+from .rag import ERROR_ANSWER
 import logging
 
 router = APIRouter()
@@ -22,7 +23,8 @@ async def api(
     """챗봇 단일 질의응답 API"""
     try:
         # RAG 로직 구현
-        related_documents = search_in_chromadb(
+        # 임베딩은 배치 스케줄러에서 await하고, ChromaDB 조회만 전용 스레드 풀에서 실행
+        related_documents = await asearch_in_chromadb(
             query=request.query,
             collection_name=settings.collection_name,
             top_k=request.top_k
@@ -32,10 +34,7 @@ async def api(
             return JSONResponse(content=ApiResponse(
                 context=[],
                 answer="검색 결과가 없습니다. 다른 질문을 해주세요."
-            ))
-
-        # Context 생성
-        context = "\n\n".join(doc.text for doc in related_documents.related_documents)
+            ).model_dump())
 
         # 프롬프트 템플릿 설정
         prompt_template = """        
@@ -60,36 +59,63 @@ async def api(
             template=prompt_template,
         )
 
-        # LLM 체인 생성 및 실행
-        chain = prompt | llm
-        result = chain.invoke({
+        # 토큰 예산에 맞춰 컨텍스트 생성 (점수순, 겹치는 청크 제거, 대화 이력 없음)
+        packed = context_packer.pack(
+            related_documents.related_documents,
+            reserved_tokens=context_packer.count(prompt_template) + context_packer.count(request.query)
+        )
+        context = packed.context
+
+        # 같은 문서 집합에 대한 유사 질문은 캐시된 답변 재사용
+        use_answer_cache = settings.answer_cache["enabled"] and related_documents.id != "error"
+        answer = None
+        if use_answer_cache:
+            query_embeddings = await aembed_queries([request.query], settings.collection_name)
+            query_embedding = query_embeddings[0]
+            doc_ids = [doc.id for doc in packed.documents]
+            answer = await answer_cache.lookup(settings.collection_name, query_embedding, doc_ids)
+
+        inputs = {
             "context": context,
             "query": request.query
-        })
-
-        response_data = ApiResponse(
-            context=context.split("\n\n") if context else [],
-            answer=result.content if hasattr(result, 'content') else str(result)
-        )
+        }
+        context_list = [doc.text for doc in packed.documents]
 
         if not request.stream:
-            return JSONResponse(content=response_data)
-
-        async def generate_response() -> Generator:
-            yield json.dumps({
-                "context": response_data.context,
-                "answer": ""
-            }) + "\n"
-            
-            contents = re.split("( )", response_data.answer)
-            current_answer = ""
-            for content in contents:
-                current_answer += content
-                yield json.dumps({
-                    "context": response_data.context,
-                    "answer": current_answer
-                }) + "\n"
-                await asyncio.sleep(0.02)
+            if answer is None:
+                # LLM 체인 생성 및 실행
+                chain = prompt | llm
+                result = await chain.ainvoke(inputs)
+                answer = result.content if hasattr(result, 'content') else str(result)
+                if use_answer_cache:
+                    await answer_cache.store(settings.collection_name, request.query, query_embedding, doc_ids, answer)
+
+            return JSONResponse(content=ApiResponse(
+                context=context_list,
+                answer=answer
+            ).model_dump())
+
+        async def generate_response() -> AsyncIterator[str]:
+            yield ndjson_line({"event": "context", "context": context_list})
+
+            if answer is not None:
+                yield ndjson_line({"event": "delta", "delta": answer})
+                yield ndjson_line({"event": "done", "answer": answer})
+                return
+
+            full_answer = ""
+            try:
+                async for delta in astream_answer(llm, prompt, inputs):
+                    full_answer += delta
+                    yield ndjson_line({"event": "delta", "delta": delta})
+            except Exception as e:
+                logger.error(f"API 스트리밍 중 오류 발생: {str(e)}")
+                yield ndjson_line({"event": "error", "answer": ERROR_ANSWER})
+                return
+
+            if use_answer_cache:
+                await answer_cache.store(settings.collection_name, request.query, query_embedding, doc_ids, full_answer)
+            yield ndjson_line({"event": "done", "answer": full_answer})
 
         return FastAPIStreamingResponse(
             generate_response(),
@@ -100,5 +126,5 @@ async def api(
         logger.error(f"API 처리 중 오류 발생: {str(e)}")
         return JSONResponse(content=ApiResponse(
             context=[],
-            answer="서비스 처리 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
-        ))
\ No newline at end of file
+            answer=ERROR_ANSWER
+        ).model_dump())
\ No newline at end of file
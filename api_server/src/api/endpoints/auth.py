@@ -1,23 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from services.user_service import UserService
+from services.user_service import UserService, get_user_service
 
 router = APIRouter()
-user_service = UserService()
 
 class UserCreate(BaseModel):
     uid: str
     password: str
 
 @router.post("/signup", response_model=dict)
-async def signup(user: UserCreate):
+async def signup(user: UserCreate, user_service: UserService = Depends(get_user_service)):
     if len(user.uid) < 4 or len(user.password) < 6:
         raise HTTPException(
             status_code=400, 
             detail="ID는 4자 이상, 비밀번호는 6자 이상이어야 합니다."
         )
     
-    if user_service.create_user(user.uid, user.password):
+    if await user_service.create_user(user.uid, user.password):
         return {"message": "회원가입이 완료되었습니다."}
     else:
         raise HTTPException(
@@ -30,8 +29,8 @@ class UserLogin(BaseModel):
     password: str
 
 @router.post("/login", response_model=dict)
-async def login(user: UserLogin):
-    if user_service.verify_user(user.uid, user.password):
+async def login(user: UserLogin, user_service: UserService = Depends(get_user_service)):
+    if await user_service.verify_user(user.uid, user.password):
         # 로그인 성공 시 사용자 정보 반환
         return {
             "message": "로그인 성공",
@@ -1,73 +1,100 @@
-from typing import Generator, Union
-import re
-import asyncio
-import json
+from typing import AsyncIterator, Union
 from fastapi import APIRouter, Depends, Response, HTTPException
 from fastapi.responses import StreamingResponse as FastAPIStreamingResponse
-from models import ChatRequest, ChatResponse, RagItem, Utterance
+from models import ChatRequest, ChatResponse, RagItem
 from services.llm import get_llm, get_memory
-from .rag import rag
-from .web_rag import web_rag
+from services.recommendations import recommendations
+from services.redis_pool import get_redis
+from core.config import settings
+from utils.streaming_utils import ndjson_line
+from .combined_rag import combined_rag, stream_combined_rag
+from .rag import rag, stream_rag
+from .web_rag import web_rag, stream_web_rag
+
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.post("/", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    llm = Depends(get_llm)
+    llm = Depends(get_llm),
+    redis_client = Depends(get_redis)
 ) -> Union[ChatResponse, FastAPIStreamingResponse]:
     """챗봇 대화 API"""
-    print(request)
-    print(request.conversation_id)
+    logger.debug(f"채팅 요청: conversation_id={request.conversation_id}, stream={request.stream}")
     # Load conversation memory
-    memory = get_memory(request.conversation_id)
+    memory = get_memory(request.conversation_id, redis_client)
     
-    # Check if load_chat option is provided
-    if request.option and request.option.get("load_chat"):
-        if not memory.get_user_id():  # 새로운 대화일 경우
-            memory.set_user_id(request.uid)
-        elif memory.get_user_id() != request.uid:  # 권한 체크
-            raise HTTPException(status_code=403, detail="permission denied")
-        
-        messages = memory.get_messages()  # Redis에서 메시지 이력 조회
+    # 대화 권한 체크 및 소유자 설정, 대화 이력 조회를 한 번의 Redis 왕복으로 처리
+    # (새로운 대화면 요청자가 소유자로 등록됨)
+    load_chat = bool(request.option and request.option.get("load_chat"))
+    turn = await memory.begin_turn(request.uid, full_history=load_chat)
+    if not turn.is_owner:
+        raise HTTPException(status_code=403, detail="permission denied")
+
+    if load_chat:
         return ChatResponse(
             answer="",
-            context=messages,
+            context=turn.messages,
             conversation_id=request.conversation_id,
             uid=request.uid
         )
-    
-    # 대화 권한 체크 및 소유자 설정
-    if not memory.get_user_id():
-        memory.set_user_id(request.uid)
-    elif memory.get_user_id() != request.uid:
-        raise HTTPException(status_code=403, detail="permission denied")
-
-    # 새 메시지를 메모리에 추가
-    memory.add_message("user", request.message.content)
-
-    # 메모리에서 이전 대화 내용 가져오기
-    previous_messages = memory.get_messages()
-    
-    # Convert messages to Utterances
-    utterances = [
-        Utterance(
-            role=msg["role"],
-            content=msg["content"]
-        ) for msg in previous_messages
-    ]
 
+    # 질문과 답변은 생성이 끝난 뒤 finish_rag에서 한 턴으로 저장
+    # (실패하거나 연결이 끊기면 record_failed_turn이 오류 표시와 함께 저장)
     item = RagItem(
         id=request.conversation_id,
         name=request.uid,
         group_id="chat",
-        messages=utterances,
         query=request.message.content,
         top_k=request.top_k,
         stream=request.stream
     )
     
-    if request.option and request.option.get("web"):
+    # option["web"]: True면 웹 검색만, "combined"면 리포트 + 웹 통합 검색
+    web_option = request.option.get("web") if request.option else None
+    use_combined = web_option == "combined"
+    use_web = bool(web_option) and not use_combined
+    # option["recommend"]: 스트림 마지막 프레임에 선생성된 추천 질문 첨부
+    attach_recommendations = bool(request.option and request.option.get("recommend"))
+
+    if request.stream:
+        if use_combined:
+            frames = stream_combined_rag(item=item, llm=llm, memory=memory)
+        elif use_web:
+            frames = stream_web_rag(item=item, llm=llm, memory=memory)
+        else:
+            frames = stream_rag(item=item, llm=llm, memory=memory)
+
+        async def generate_response() -> AsyncIterator[str]:
+            try:
+                async for frame in frames:
+                    if frame["event"] in ("context", "done", "error"):
+                        frame.update(conversation_id=request.conversation_id, uid=request.uid)
+                    if frame["event"] == "done" and attach_recommendations:
+                        frame["recommendations"] = await recommendations.wait(
+                            request.conversation_id,
+                            timeout=settings.recommendations["attach_timeout_ms"] / 1000
+                        )
+                    yield ndjson_line(frame)
+            finally:
+                # 클라이언트가 연결을 끊으면 바로 닫아 중단된 턴을 저장
+                await frames.aclose()
+
+        return FastAPIStreamingResponse(
+            generate_response(),
+            media_type="application/x-ndjson"  # JSON Lines 형식으로 변경
+        )
+
+    if use_combined:
+        result = await combined_rag(
+            item=item,
+            llm=llm,
+            memory=memory
+        )
+    elif use_web:
         result = await web_rag(
             item=item,
             llm=llm,
@@ -80,33 +107,9 @@ async def chat(
             memory=memory
         )
 
-    # 응답 메시지를 메모리에 추가
-    memory.add_message("assistant", result.answer)
-
-    contents = re.split("( )", result.answer)
-
-    if not request.stream:
-        return ChatResponse(
-            answer="".join(contents),
-            context=result.context,
-            conversation_id=request.conversation_id,
-            uid=request.uid
-        )
-
-    async def generate_response() -> Generator:
-        response_data = {
-            "answer": "",
-            "context": result.context,
-            "conversation_id": request.conversation_id,
-            "uid": request.uid
-        }
-        
-        for content in contents:
-            response_data["answer"] += content
-            yield json.dumps(response_data) + "\n"
-            await asyncio.sleep(0.02)
-
-    return FastAPIStreamingResponse(
-        generate_response(),
-        media_type="application/x-ndjson"  # JSON Lines 형식으로 변경
-    )
\ No newline at end of file
+    return ChatResponse(
+        answer=result.answer,
+        context=result.context,
+        conversation_id=request.conversation_id,
+        uid=request.uid
+    )
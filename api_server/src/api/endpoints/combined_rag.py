@@ -0,0 +1,182 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from fastapi import APIRouter, Depends
+from langchain.prompts import PromptTemplate
+
+from models import Document, RagItem, RagOutput, RetrievalItem
+from core.config import settings
+from services.llm import get_llm, get_memory
+from services.retrieval import asearch_in_chromadb, filter_relevant
+from services.sparse_index import reciprocal_rank_fusion
+from utils.context_packer import context_packer
+from utils.prompts import CHAT_TEMPLATE, WEB_RAG_TEMPLATE
+from .rag import ERROR_ANSWER, PreparedRag, finish_rag, record_failed_turn, stream_with
+from .web_rag import perform_web_search
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+COMBINED_CONFIG = settings.combined_retrieval
+
+
+async def _vector_documents(item: RagItem) -> List[Document]:
+    """리포트(벡터) 검색 결과 중 최소 점수를 넘거나 BM25 상위인 문서"""
+    searched = await asearch_in_chromadb(
+        query=item.query,
+        collection_name=settings.collection_name,
+        top_k=item.top_k,
+        rerank_budget_ms=item.rerank_budget_ms
+    )
+    return filter_relevant(searched.related_documents)
+
+
+async def _web_documents(item: RagItem) -> List[Document]:
+    """웹 검색 결과 (리포트 문서와 ID가 겹치지 않도록 접두어 추가)"""
+    searched = await perform_web_search(
+        RetrievalItem(
+            id=item.id,
+            name=item.name,
+            group_id=item.group_id,
+            query=item.query,
+            max_query_size=item.max_query_size,
+            top_k=item.top_k
+        )
+    )
+    return [doc.model_copy(update={"id": f"web:{doc.id}"}) for doc in searched.related_documents]
+
+
+def merge_documents(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    """출처별 순위 목록을 RRF로 합친 하나의 순위 목록 (score는 RRF 점수, 원래 점수는 metadata에 보존)
+
+    같은 본문은 하나로 합친다. 점수 척도가 다른 출처(보정 확률, 웹 검색 순위)를 순위만으로 결합한다.
+    """
+    docs_by_key: Dict[str, Document] = {}
+    key_rankings = []
+    for ranking in rankings:
+        keys = []
+        for doc in ranking:
+            key = doc.text.strip()
+            if key in keys:
+                continue
+            docs_by_key.setdefault(key, doc)
+            keys.append(key)
+        key_rankings.append(keys)
+
+    merged = []
+    for key, score in reciprocal_rank_fusion(key_rankings, k=k):
+        doc = docs_by_key[key]
+        merged.append(doc.model_copy(update={
+            "score": score,
+            "metadata": {**doc.metadata, "source_score": doc.score},
+        }))
+    return merged
+
+
+async def retrieve_combined(item: RagItem, deadline_ms: Optional[float] = None) -> List[Document]:
+    """벡터 검색과 웹 검색을 동시에 실행하고, 마감 시간까지 도착한 결과만 병합
+
+    마감 시간이 지나면 끝나지 않은 검색은 취소하고 (스레드 풀의 벡터 검색은 결과만 버림)
+    이미 도착한 결과로 컨텍스트를 구성한다. 실패한 검색은 빈 결과로 취급한다.
+    요청이 취소되면 진행 중인 하위 검색도 함께 취소한다.
+    """
+    deadline = (deadline_ms if deadline_ms is not None else COMBINED_CONFIG["deadline_ms"]) / 1000
+    tasks = {
+        "vector": asyncio.create_task(_vector_documents(item)),
+        "web": asyncio.create_task(_web_documents(item)),
+    }
+    started = time.perf_counter()
+    try:
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    finally:
+        # 마감 시간을 넘긴 검색뿐 아니라 요청 자체가 취소된 경우에도 하위 검색을 남기지 않음
+        for task in tasks.values():
+            task.cancel()
+
+    rankings = []
+    for source, task in tasks.items():
+        if task in pending:
+            logger.warning(f"{source} 검색이 마감 시간({deadline * 1000:.0f}ms) 안에 끝나지 않아 제외")
+        elif task.exception() is not None:
+            logger.error(f"{source} 검색 중 오류 발생: {str(task.exception())}")
+        else:
+            rankings.append(task.result())
+    logger.info(f"통합 검색 완료 ({(time.perf_counter() - started) * 1000:.0f}ms, 사용한 출처 {len(rankings)}개)")
+    return merge_documents(rankings, k=COMBINED_CONFIG["rrf_k"])
+
+
+async def prepare_combined_rag(item: RagItem, memory=None) -> PreparedRag:
+    """리포트 + 웹 통합 검색, 프롬프트 구성, 대화 이력 로드"""
+    documents = await retrieve_combined(item)
+    prompt_template = WEB_RAG_TEMPLATE if documents else CHAT_TEMPLATE
+
+    # Redis 메모리에서 대화 이력 로드
+    memory_variables = await memory.aload_memory_variables({}) if memory else {}
+    history_buffer = memory_variables.get(memory.memory_key, []) if memory else []
+
+    # 병합된 순위대로 토큰 예산에 맞춰 컨텍스트와 대화 이력 선택
+    packed = context_packer.pack(
+        documents,
+        history_buffer,
+        reserved_tokens=context_packer.count(prompt_template) + context_packer.count(item.query)
+    )
+    if documents and not packed.documents:
+        prompt_template = CHAT_TEMPLATE
+
+    prompt = PromptTemplate(
+        input_variables=["history", "context", "query"],
+        template=prompt_template
+    )
+    return PreparedRag(
+        prompt=prompt,
+        inputs={
+            "history": packed.history,
+            "context": packed.context,
+            "query": item.query
+        },
+        context=packed.context,
+    )
+
+
+@router.post("/")
+async def combined_rag(
+    item: RagItem,
+    llm = Depends(get_llm),
+    memory = Depends(get_memory)
+) -> RagOutput:
+    """리포트 검색과 웹 검색 결과를 함께 사용하여 RAG를 수행합니다."""
+    try:
+        prepared = await prepare_combined_rag(item, memory)
+        chain = prepared.prompt | llm
+        result = await chain.ainvoke(prepared.inputs)
+        answer = result.content if hasattr(result, 'content') else str(result)
+    except Exception as e:
+        logger.error(f"통합 RAG 처리 중 오류 발생: {str(e)}")
+        await record_failed_turn(item, memory)
+        return RagOutput(
+            id=item.id,
+            name=item.name,
+            group_id=item.group_id,
+            answer=ERROR_ANSWER,
+            context=""
+        )
+
+    await finish_rag(item, prepared, answer, memory)
+    return RagOutput(
+        id=item.id,
+        name=item.name,
+        group_id=item.group_id,
+        answer=answer,
+        context=prepared.context
+    )
+
+
+def stream_combined_rag(
+    item: RagItem,
+    llm,
+    memory=None
+) -> AsyncIterator[Dict[str, Any]]:
+    """리포트 + 웹 통합 검색 기반 RAG 답변 스트리밍"""
+    return stream_with(prepare_combined_rag, item, llm, memory, "통합 검색")
@@ -1,13 +1,35 @@
-from fastapi import APIRouter
-from models import IndexingItem, IndexingOutput
+from fastapi import APIRouter, HTTPException
+from models import IndexingItem, IndexingOutput, IndexingJobStatus
+from core.exceptions import PathNotAllowedError, QueueFullError
+from services.indexing_jobs import indexing_jobs
 
 router = APIRouter()
 
-@router.post("/indexing")
+@router.post("/")
 async def indexing(item: IndexingItem) -> IndexingOutput:
+    """문서/PDF 인덱싱 작업을 등록하고 작업 ID를 즉시 반환"""
+    if not item.documents and not item.pdf_paths:
+        raise HTTPException(status_code=400, detail="documents 또는 pdf_paths가 필요합니다.")
+
+    try:
+        job = indexing_jobs.submit(item)
+    except PathNotAllowedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
     return IndexingOutput(
         id=item.id,
         name=item.name,
         group_id=item.group_id,
-        is_success=True
-    )
\ No newline at end of file
+        is_success=True,
+        job_id=job.job_id
+    )
+
+@router.get("/{job_id}")
+async def indexing_status(job_id: str) -> IndexingJobStatus:
+    """인덱싱 작업 진행률, 처리량(chunks/s), 오류 조회"""
+    job = indexing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job.to_status()
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from api.endpoints.rag import rag_flight
+from services.answer_cache import answer_cache
+from services.embedding import registry as embedding_registry
+from services.embedding_cache import query_embedding_cache
+from services.llm import get_llm_gateway
+from services.recommendations import recommendations
+from services.redis_pool import redis_pool
+from services.web_search import web_search
+from services.reranker import reranker
+
+router = APIRouter()
+
+@router.get("/")
+async def metrics() -> dict:
+    """서버 내부 캐시 및 모델 상태 지표 조회"""
+    return {
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "embedding_models": embedding_registry.memory_footprint(),
+        "embedding_schedulers": embedding_registry.scheduler_stats(),
+        "reranker": reranker.stats(),
+        "redis_pool": redis_pool.stats(),
+        "web_search": web_search.stats(),
+        "recommendations": recommendations.stats(),
+        "single_flight": rag_flight.stats(),
+        "llm_gateway": get_llm_gateway().stats(),
+    }
@@ -1,111 +1,329 @@
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+
 from fastapi import APIRouter, Depends
 from langchain.prompts import PromptTemplate
 from services.redis_memory import RedisMemory  # Redis 메모리 import 추가
 
 from models import RagItem, RagOutput, RetrievalItem
 from core.config import settings
-from services.retrieval import search_in_chromadb
-from services.llm import get_llm
+from services.retrieval import asearch_in_chromadb, aembed_queries, filter_relevant
+from services.answer_cache import answer_cache
+from services.embedding_cache import normalize_query
+from services.recommendations import recommendations
+from services.llm import get_llm, astream_answer
 from utils.prompts import RAG_TEMPLATE, CHAT_TEMPLATE
+from utils.context_packer import context_packer
+from utils.single_flight import SingleFlight
 
 import logging
-import time
 from datetime import datetime
+import numpy as np
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/")
-async def rag(
-    item: RagItem,
-    llm = Depends(get_llm),
-    memory: RedisMemory = None  # 타입 힌트 추가
-) -> RagOutput:
-    try:
-        # Add delay before making the LLM call
-        time.sleep(1)  # 1 second delay
-        
-        searched_docs = search_in_chromadb(
-            query=item.query,
-            collection_name=settings.collection_name,
-            top_k=item.top_k
-        )
+ERROR_ANSWER = "서비스 처리 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+
+# 동시에 들어온 같은 질문의 검색 / 답변 생성 합치기
+rag_flight = SingleFlight()
+
+
+@dataclass
+class PreparedRag:
+    """LLM 호출 직전까지 준비된 RAG 요청"""
+    prompt: PromptTemplate
+    inputs: Dict[str, Any]
+    context: str
+    cached_answer: Optional[str] = None
+    query_embedding: Optional[np.ndarray] = None
+    doc_ids: List[str] = field(default_factory=list)
+    # 같은 질문의 동시 요청과 답변 생성을 공유할 키 (대화 이력이 있으면 None)
+    flight_key: Optional[Tuple] = None
+
+    @property
+    def use_answer_cache(self) -> bool:
+        return self.query_embedding is not None
+
+
+def _retrieval_key(item: RagItem) -> Tuple:
+    return ("retrieve", normalize_query(item.query), settings.collection_name, item.top_k, item.rerank_budget_ms)
+
+
+def _generation_key(item: RagItem, prompt_template: str, context: str) -> Tuple:
+    return (
+        "generate",
+        normalize_query(item.query),
+        settings.collection_name,
+        item.top_k,
+        hashlib.sha1(f"{prompt_template}\x00{context}".encode()).hexdigest(),
+    )
+
+
+async def _search(item: RagItem):
+    # 임베딩은 배치 스케줄러에서 await하고, ChromaDB 조회만 전용 스레드 풀에서 실행
+    return await asearch_in_chromadb(
+        query=item.query,
+        collection_name=settings.collection_name,
+        top_k=item.top_k,
+        rerank_budget_ms=item.rerank_budget_ms
+    )
+
 
-        query = item.query
-        context = ""
-        content = ""
-
-        # 검색 결과가 있을 경우 유사도 필터링 적용
-        if searched_docs and searched_docs.related_documents:
-            # 각 문서의 유사도 점수 로깅
-            for i, doc in enumerate(searched_docs.related_documents):
-                logger.info(f"Document {i + 1} similarity score: {doc.score:.4f}")
-                logger.debug(f"Document {i + 1} text preview: {doc.text[:100]}...")
-
-            #FIXME: find proper score to filter
-            filtered_docs = [
-                doc for doc in searched_docs.related_documents 
-                if doc.score >= 0.0005
-            ]
-            
-            if filtered_docs:
-                logger.info(f"Selected {len(filtered_docs)} documents with scores >= 0.8:")
-                for i, doc in enumerate(filtered_docs):
-                    logger.info(f"Selected document {i + 1} score: {doc.score:.4f}")
-                
-                context = "\n\n".join(doc.text for doc in filtered_docs) 
-                content = "{context}\n\n{query}".format(context=context, query=query)
-                prompt_template = RAG_TEMPLATE
-            else:
-                logger.info("No documents passed similarity threshold (>= 0.8) switching to chat mode")
-                context = ""
-                prompt_template = CHAT_TEMPLATE
+async def generate_answer(llm, prepared: PreparedRag) -> str:
+    """LLM 답변 생성 (같은 질문의 동시 요청은 한 번의 호출 결과를 공유)"""
+    async def invoke() -> str:
+        chain = prepared.prompt | llm
+        result = await chain.ainvoke(prepared.inputs)
+        return result.content if hasattr(result, 'content') else str(result)
+
+    if prepared.flight_key is None:
+        return await invoke()
+    return await rag_flight.do(prepared.flight_key, invoke)
+
+
+def stream_answer(llm, prepared: PreparedRag) -> AsyncIterator[str]:
+    """LLM 답변 스트리밍 (같은 질문의 동시 요청은 하나의 토큰 스트림을 복제해서 받음)"""
+    if prepared.flight_key is None:
+        return astream_answer(llm, prepared.prompt, prepared.inputs)
+    return rag_flight.stream(
+        prepared.flight_key,
+        lambda: astream_answer(llm, prepared.prompt, prepared.inputs)
+    )
+
+
+async def prepare_rag(item: RagItem, memory: Optional[RedisMemory] = None) -> PreparedRag:
+    """문서 검색, 프롬프트 선택, 대화 이력 로드, 답변 캐시 조회"""
+    if settings.single_flight["enabled"]:
+        searched_docs = await rag_flight.do(_retrieval_key(item), lambda: _search(item))
+    else:
+        searched_docs = await _search(item)
+
+    query = item.query
+    filtered_docs = []
+
+    # 검색 결과가 있을 경우 유사도 필터링 적용
+    if searched_docs and searched_docs.related_documents:
+        # 각 문서의 유사도 점수 로깅
+        for i, doc in enumerate(searched_docs.related_documents):
+            logger.info(f"Document {i + 1} similarity score: {doc.score:.4f}")
+            logger.debug(f"Document {i + 1} text preview: {doc.text[:100]}...")
+
+        # 보정된 점수 기준으로 관련 없는 문서 제외, BM25 상위 문서는 유지 (모두 제외되면 LLM에 컨텍스트를 보내지 않음)
+        min_score = settings.retrieval["min_score"]
+        filtered_docs = filter_relevant(searched_docs.related_documents)
+
+        if filtered_docs:
+            logger.info(f"Selected {len(filtered_docs)} documents with scores >= {min_score}:")
+            for i, doc in enumerate(filtered_docs):
+                logger.info(f"Selected document {i + 1} score: {doc.score:.4f}")
+
+            prompt_template = RAG_TEMPLATE
         else:
-            # 검색 결과가 없는 경우
-            context = ""  # 컨텍스트 비우기
+            logger.info(f"No documents passed similarity threshold (>= {min_score}) switching to chat mode")
             prompt_template = CHAT_TEMPLATE
-            logger.info("No search results found, using chat mode")
-        
-        prompt = PromptTemplate(
-            input_variables=["history", "context", "query"],
-            template=prompt_template,
-        )
+    else:
+        # 검색 결과가 없는 경우
+        prompt_template = CHAT_TEMPLATE
+        logger.info("No search results found, using chat mode")
+
+    # Redis 메모리에서 대화 이력 로드
+    memory_variables = await memory.aload_memory_variables({}) if memory else {}
+    history_buffer = memory_variables.get(memory.memory_key, []) if memory else []
+
+    # 토큰 예산 안에서 컨텍스트(점수순, 중복 제거)와 최근 대화 이력 선택
+    packed = context_packer.pack(
+        filtered_docs,
+        history_buffer,
+        reserved_tokens=context_packer.count(prompt_template) + context_packer.count(query)
+    )
+    context = packed.context
+    history_buffer = packed.history
+    if filtered_docs and not packed.documents:
+        prompt_template = CHAT_TEMPLATE
+    logger.info(f"Prompt tokens (estimated): context {packed.context_tokens}, history {packed.history_tokens}")
 
-        # Create a runnable sequence
-        chain = prompt | llm
+    prompt = PromptTemplate(
+        input_variables=["history", "context", "query"],
+        template=prompt_template,
+    )
 
-        # Redis 메모리에서 대화 이력 로드
-        memory_variables = memory.load_memory_variables({}) if memory else {}
-        history_buffer = memory_variables.get(memory.memory_key, []) if memory else []
-        
-        result = chain.invoke({
+    prepared = PreparedRag(
+        prompt=prompt,
+        inputs={
             "history": history_buffer,
             "context": context,
             "query": query
-        })
+        },
+        context=context,
+    )
+    if settings.single_flight["enabled"] and not history_buffer:
+        prepared.flight_key = _generation_key(item, prompt_template, context)
+
+    # 이전 대화가 없는 질문만 의미 기반 답변 캐시 사용 (대화 이력이 답변에 영향을 주므로)
+    if settings.answer_cache["enabled"] and not history_buffer and searched_docs.id != "error":
+        query_embeddings = await aembed_queries([query], settings.collection_name)
+        prepared.query_embedding = query_embeddings[0]
+        prepared.doc_ids = [doc.id for doc in packed.documents]
+        prepared.cached_answer = await answer_cache.lookup(
+            settings.collection_name, prepared.query_embedding, prepared.doc_ids
+        )
 
-        # 응답 저장
-        answer = result.content if hasattr(result, 'content') else str(result)
-        if memory:
-            memory.save_context(
-                {"input": query}, 
+    return prepared
+
+
+async def finish_rag(item: RagItem, prepared: PreparedRag, answer: str, memory: Optional[RedisMemory] = None) -> None:
+    """생성된 답변을 대화 메모리와 답변 캐시에 저장하고 후속 질문 추천 선생성 시작
+
+    답변은 이미 생성되었으므로 저장 / 예약 중 오류는 로그만 남기고 예외를 올리지 않는다
+    (스트리밍이면 delta를 모두 보낸 뒤라 done 프레임을 반드시 보내야 한다).
+    """
+    # 응답 저장 후 오래된 대화는 백그라운드에서 요약
+    if memory:
+        try:
+            await memory.asave_context(
+                {"input": item.query},
                 {"output": answer}
             )
+            memory.schedule_summary_update()
+        except Exception as e:
+            logger.error(f"대화 이력 저장 중 오류 발생 ({item.id}): {str(e)}")
 
-        return RagOutput(
-            id=item.id,
-            name=item.name,
-            group_id=item.group_id,
-            answer=answer,
-            context=""
+    # 캐시 저장 실패는 answer_cache가 로그만 남기므로 요청을 실패시키지 않음
+    if prepared.use_answer_cache and prepared.cached_answer is None:
+        await answer_cache.store(
+            settings.collection_name, item.query, prepared.query_embedding, prepared.doc_ids, answer
+        )
+
+    try:
+        recommendations.schedule_prefetch(item.id, item.query, answer)
+    except Exception as e:
+        logger.error(f"추천 질문 선생성 예약 중 오류 발생 ({item.id}): {str(e)}")
+
+
+async def record_failed_turn(
+    item: RagItem,
+    memory: Optional[RedisMemory],
+    answer: Optional[str] = None,
+    status: str = "error"
+) -> None:
+    """답변 생성이 실패하거나 중단된 턴도 질문이 사라지지 않도록 저장
+
+    답변 메시지의 metadata.status에 error(오류) 또는 aborted(클라이언트 연결 끊김)를 남긴다.
+    """
+    if not memory:
+        return
+    try:
+        await memory.commit_turn(
+            item.query,
+            answer or (ERROR_ANSWER if status == "error" else ""),
+            status=status
         )
+    except Exception as e:
+        logger.error(f"실패한 대화 턴 저장 중 오류 발생 ({item.id}): {str(e)}")
+
+
+@router.post("/")
+async def rag(
+    item: RagItem,
+    llm = Depends(get_llm),
+    memory: RedisMemory = None  # 타입 힌트 추가
+) -> RagOutput:
+    try:
+        prepared = await prepare_rag(item, memory)
 
+        answer = prepared.cached_answer
+        if answer is None:
+            answer = await generate_answer(llm, prepared)
     except Exception as e:
         logger.error(f"RAG 처리 중 오류 발생: {str(e)}")
+        await record_failed_turn(item, memory)
         return RagOutput(
             id=item.id,
             name=item.name,
             group_id=item.group_id,
-            answer="서비스 처리 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+            answer=ERROR_ANSWER,
             context=""
         )
+
+    await finish_rag(item, prepared, answer, memory)
+    return RagOutput(
+        id=item.id,
+        name=item.name,
+        group_id=item.group_id,
+        answer=answer,
+        context=""
+    )
+
+
+async def stream_prepared(
+    item: RagItem,
+    llm,
+    prepared: PreparedRag,
+    memory: Optional[RedisMemory] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """준비된 RAG 요청의 답변을 토큰 단위로 스트리밍
+
+    첫 프레임에 검색된 context를 보내고, 이후에는 새로 생성된 텍스트만 delta로 보낸다.
+    생성이 끝나면 전체 답변을 메모리에 저장하고 done 프레임을 보낸다. 생성 중 오류가 나거나
+    클라이언트가 연결을 끊으면 질문과 그때까지 생성된 답변을 실패 표시와 함께 저장한다.
+    """
+    answer = ""
+    try:
+        yield {"event": "context", "context": prepared.context}
+        if prepared.cached_answer is not None:
+            answer = prepared.cached_answer
+            yield {"event": "delta", "delta": answer}
+        else:
+            async for delta in stream_answer(llm, prepared):
+                answer += delta
+                yield {"event": "delta", "delta": delta}
+    except Exception as e:
+        logger.error(f"RAG 스트리밍 중 오류 발생: {str(e)}")
+        await record_failed_turn(item, memory, answer)
+        yield {"event": "error", "answer": ERROR_ANSWER}
+        return
+    except (asyncio.CancelledError, GeneratorExit):
+        # 연결이 끊겨 취소되어도 저장은 끝까지 실행
+        await asyncio.shield(record_failed_turn(item, memory, answer, status="aborted"))
+        raise
+
+    await finish_rag(item, prepared, answer, memory)
+    yield {"event": "done", "answer": answer}
+
+
+async def stream_with(
+    prepare: Callable[[RagItem, Optional[RedisMemory]], Awaitable[PreparedRag]],
+    item: RagItem,
+    llm,
+    memory: Optional[RedisMemory] = None,
+    label: str = "RAG"
+) -> AsyncIterator[Dict[str, Any]]:
+    """검색 / 프롬프트 준비(prepare) 후 답변 스트리밍 (준비 중 실패하거나 연결이 끊겨도 질문 저장)"""
+    try:
+        prepared = await prepare(item, memory)
+    except asyncio.CancelledError:
+        await asyncio.shield(record_failed_turn(item, memory, status="aborted"))
+        raise
+    except Exception as e:
+        logger.error(f"{label} 처리 중 오류 발생: {str(e)}")
+        await record_failed_turn(item, memory)
+        yield {"event": "error", "answer": ERROR_ANSWER}
+        return
+
+    # 바깥 스트림이 닫히면 안쪽 스트림도 바로 닫아 중단된 턴을 저장
+    async with aclosing(stream_prepared(item, llm, prepared, memory)) as frames:
+        async for frame in frames:
+            yield frame
+
+
+def stream_rag(
+    item: RagItem,
+    llm,
+    memory: Optional[RedisMemory] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """문서 검색 기반 RAG 답변 스트리밍"""
+    return stream_with(prepare_rag, item, llm, memory, "RAG")
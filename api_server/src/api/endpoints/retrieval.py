@@ -1,23 +1,40 @@
-from fastapi import APIRouter
-from models import RetrievalItem, RetrievalOutput
+from fastapi import APIRouter, HTTPException
+from models import RetrievalItem, RetrievalOutput, QueryResult
+from core.config import settings
+from services.retrieval import asearch_batch
+
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.post("/retrieve")
 async def retrieval(item: RetrievalItem) -> RetrievalOutput:
-    dummy_documents = [
-        {
-            "id": "doc1",
-            "text": "4Q24 예상 영업이익을 기존 8.1조원에서 7.9조원으로...",
-            "metadata": {},
-            "score": 0.9
-        },
-        # ...
+    """단일 쿼리 또는 쿼리 배치를 한 번의 임베딩 배치와 한 번의 ChromaDB 조회로 검색"""
+    queries = item.queries or ([item.query] if item.query else [])
+    if not queries:
+        raise HTTPException(status_code=400, detail="query 또는 queries가 필요합니다.")
+    if len(queries) > settings.retrieval["max_batch_queries"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {settings.retrieval['max_batch_queries']}개 쿼리까지 검색할 수 있습니다."
+        )
+
+    queries = [query[:item.max_query_size] for query in queries]
+    try:
+        batch = await asearch_batch(queries, settings.collection_name, item.top_k)
+    except Exception as e:
+        logger.error(f"배치 검색 중 오류 발생: {str(e)}")
+        raise HTTPException(status_code=500, detail="검색 중 오류가 발생했습니다.")
+
+    results = [
+        QueryResult(query=query, related_documents=documents)
+        for query, documents in zip(queries, batch)
     ]
-    
     return RetrievalOutput(
         id=item.id,
         name=item.name,
         group_id=item.group_id,
-        related_documents=dummy_documents
-    )
\ No newline at end of file
+        related_documents=results[0].related_documents,
+        results=results
+    )
@@ -1,12 +1,15 @@
+from typing import Any, AsyncIterator, Dict
+
 from fastapi import APIRouter, Depends
 from langchain.prompts import PromptTemplate
-import requests
 import logging
 
 from models import RetrievalItem, RagItem, RagOutput, RetrievalOutput
 from services.llm import get_llm, get_memory
-from core.config import settings
+from services.web_search import WebSearchError, web_search
 from utils.prompts import WEB_RAG_TEMPLATE
+from utils.context_packer import context_packer
+from .rag import PreparedRag, finish_rag, record_failed_turn, stream_with
 
 from datetime import datetime
 
@@ -14,16 +17,21 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 async def perform_web_search(item: RetrievalItem) -> RetrievalOutput:
-    """웹 검색을 수행합니다."""
-    query = item.query
-    url = f"https://www.googleapis.com/customsearch/v1?key={settings.GOOGLE_SEARCH_API_KEY}&cx={settings.GOOGLE_CX}&q={query}"
-    response = requests.get(url)
-    data = response.json()
-    
+    """웹 검색을 수행합니다.
+
+    질문과 재구성된 질의(item.queries, 설정된 템플릿)를 동시에 검색하고 결과를 병합한다.
+    """
+    queries = web_search.expand(item.query) + list(item.queries)
+    try:
+        web_items = await web_search.search_many(queries)
+    except WebSearchError as e:
+        logger.error(f"웹 검색 중 오류 발생: {str(e)}")
+        web_items = []
+
     docs = []
-    if "items" in data:
-        for i, web_item in enumerate(data['items'], start=1):
-            doc = {'id': str(i), 'text': "", 'metadata': {}, 'score': 1}
+    if web_items:
+        for i, web_item in enumerate(web_items, start=1):
+            doc = {'id': str(i), 'text': "", 'metadata': {}, 'score': web_item['fused_score']}
             if 'snippet' in web_item:
                 doc['text'] = web_item['snippet']
             if 'link' in web_item:
@@ -46,14 +54,8 @@ async def perform_web_search(item: RetrievalItem) -> RetrievalOutput:
         related_documents=docs
     )
 
-@router.post("/web_rag")
-async def web_rag(
-    item: RagItem,
-    llm = Depends(get_llm),
-    memory = Depends(get_memory)
-) -> RagOutput:
-    """웹 검색 결과를 기반으로 RAG를 수행합니다."""
-    
+async def prepare_web_rag(item: RagItem, memory=None) -> PreparedRag:
+    """웹 검색, 프롬프트 구성, 대화 이력 로드"""
     # 웹 검색 수행
     related_documents = await perform_web_search(
         RetrievalItem(
@@ -66,38 +68,67 @@ async def web_rag(
         )
     )
 
-    # 검색 결과 결합
-    context = "\n\n".join(doc.text for doc in related_documents.related_documents) if related_documents.related_documents else ""
-
     prompt = PromptTemplate(
         input_variables=["history", "context", "query"],
         template=WEB_RAG_TEMPLATE
     )
 
-    # Create a runnable sequence (rag.py와 같은 방식)
-    chain = prompt | llm
-
     # Redis 메모리에서 대화 이력 로드
-    memory_variables = memory.load_memory_variables({}) if memory else {}
+    memory_variables = await memory.aload_memory_variables({}) if memory else {}
     history_buffer = memory_variables.get(memory.memory_key, []) if memory else []
-    
-    result = chain.invoke({
-        "history": history_buffer,
-        "context": context,
-        "query": item.query
-    })
+
+    # 검색 결과와 대화 이력을 토큰 예산에 맞춰 결합
+    packed = context_packer.pack(
+        related_documents.related_documents,
+        history_buffer,
+        reserved_tokens=context_packer.count(WEB_RAG_TEMPLATE) + context_packer.count(item.query)
+    )
+    context = packed.context
+    history_buffer = packed.history
+
+    return PreparedRag(
+        prompt=prompt,
+        inputs={
+            "history": history_buffer,
+            "context": context,
+            "query": item.query
+        },
+        context=context,
+    )
+
+@router.post("/web_rag")
+async def web_rag(
+    item: RagItem,
+    llm = Depends(get_llm),
+    memory = Depends(get_memory)
+) -> RagOutput:
+    """웹 검색 결과를 기반으로 RAG를 수행합니다."""
+    try:
+        prepared = await prepare_web_rag(item, memory)
+
+        # Create a runnable sequence (rag.py와 같은 방식)
+        chain = prepared.prompt | llm
+        result = await chain.ainvoke(prepared.inputs)
+    except Exception:
+        # 오류 응답은 그대로 전달하되 질문은 대화 이력에 남김
+        await record_failed_turn(item, memory)
+        raise
 
     answer = result.content if hasattr(result, 'content') else str(result)
-    if memory:
-        memory.save_context(
-            {"input": item.query}, 
-            {"output": answer}
-        )
+    await finish_rag(item, prepared, answer, memory)
 
     return RagOutput(
         id=item.id,
         name=item.name,
         group_id=item.group_id,
         answer=answer,
-        context=context
-    )
\ No newline at end of file
+        context=prepared.context
+    )
+
+def stream_web_rag(
+    item: RagItem,
+    llm,
+    memory=None
+) -> AsyncIterator[Dict[str, Any]]:
+    """웹 검색 기반 RAG 답변 스트리밍"""
+    return stream_with(prepare_web_rag, item, llm, memory, "웹 검색")
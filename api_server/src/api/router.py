@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from api.endpoints import api, chat, indexing, rag, retrieval, web_rag, recommend_questions, auth  # auth 모듈 import 추가
+from api.endpoints import api, chat, combined_rag, indexing, rag, retrieval, web_rag, recommend_questions, auth, metrics  # auth 모듈 import 추가
 
 # API 라우터 생성
 api_router = APIRouter()
@@ -41,6 +41,12 @@ api_router.include_router(
     tags=["web_rag"]
 )
 
+api_router.include_router(
+    combined_rag.router,
+    prefix="/combined_rag",
+    tags=["combined_rag"]
+)
+
 api_router.include_router(
     recommend_questions.router,
     prefix="/recommend",
@@ -53,6 +59,12 @@ api_router.include_router(
     tags=["api"]
 )
 
+api_router.include_router(
+    metrics.router,
+    prefix="/metrics",
+    tags=["metrics"]
+)
+
 
 # 라우터 export
 __all__ = ["api_router"]
\ No newline at end of file
@@ -21,6 +21,20 @@ class Settings(BaseSettings):
         "max_output_tokens": 1024,
     }
 
+    # LLM 호출 게이트웨이: 분당 요청 / 토큰 한도, 동시 실행 수, 재시도 정책
+    # backend: "gemini" 또는 "fake" (API 키 없이 오프라인 개발 / 테스트용 고정 응답)
+    llm_gateway: Dict[str, Any] = {
+        "backend": os.getenv("LLM_BACKEND", "gemini"),
+        "requests_per_minute": int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+        "tokens_per_minute": int(os.getenv("LLM_TOKENS_PER_MINUTE", "250000")),
+        "max_concurrency": 8,
+        "max_queue_size": 256,
+        "max_retries": 3,
+        "backoff": 0.5,
+        "max_backoff": 8.0,
+        "reserve_output_tokens": 1024,
+    }
+
     model_config: Dict[str, Any] = {
         "env_file": ".env",
         "case_sensitive": False
@@ -28,9 +42,165 @@ class Settings(BaseSettings):
     
     vector_db: Dict[str, Any] = {
         "model": "kakaobank/kf-deberta-base",
+        "device": os.getenv("EMBEDDING_DEVICE", "auto"),
+        "pooling": "mean",
+        # 거리 공간 (cosine, ip, l2). 임베딩은 L2 정규화하여 저장/검색한다.
+        "space": "cosine",
+        "normalize": True,
+        # 컬렉션별 임베딩 방식 선언 (인덱싱/검색 시 동일하게 사용)
+        "collections": {
+            "pdf_text_collection": {"pooling": "mean", "space": "cosine"},
+        },
         "chroma_db_dir": os.getenv("CHROMA_DB_DIR", "/data/ephemeral/chroma_db"),
+        "count_refresh_interval": 30.0,
+        # 인덱싱 후 희소 인덱스 재구축 / 점수 보정은 마지막 무효화 후 이 시간(초)이 지나면 한 번만 실행
+        "rebuild_delay": 5.0,
         "max_chunk_size": 1024,
         "num_chunk_overlap": 256,
+        "batch_size": 32,
+        "max_length": 512,
+        "max_batch_tokens": 16384,
+    }
+
+    # 요청 경로의 블로킹 작업(임베딩, ChromaDB 조회)을 실행할 스레드 풀
+    executor: Dict[str, Any] = {
+        "max_workers": 4,
+    }
+
+    # 디렉토리 일괄 인덱싱 (num_workers: PDF 파싱 프로세스 수, None이면 CPU 수)
+    ingestion: Dict[str, Any] = {
+        "num_workers": None,
+        "embed_batch_size": 256,
+    }
+
+    # /indexing 백그라운드 작업 (채팅용 스레드 풀과 분리된 전용 워커)
+    # data_root: pdf_paths로 인덱싱할 수 있는 디렉토리 (이 밖의 경로는 400, 비우면 PDF 경로 인덱싱 불가)
+    indexing_jobs: Dict[str, Any] = {
+        "data_root": os.getenv("INDEXING_DATA_ROOT", "/data/ephemeral/pdfs"),
+        "max_workers": 1,
+        "max_pending_jobs": 16,
+        "max_retained_jobs": 100,
+    }
+
+    # 동시 쿼리 임베딩 마이크로 배칭 스케줄러
+    inference_scheduler: Dict[str, Any] = {
+        "max_batch_size": 32,
+        "max_wait_ms": 5.0,
+        "max_queue_size": 512,
+        "enqueue_timeout": 1.0,
+        "torch_threads": int(os.getenv("EMBEDDING_TORCH_THREADS", "4")),
+    }
+
+    # BM25 희소 인덱스 + 벡터 검색 RRF 결합 (candidates: 각 검색기에서 가져올 후보 수)
+    # build_missing: 인덱스가 없는 컬렉션(이전에 인덱싱된 컬렉션)은 첫 검색 때 백그라운드에서 구축
+    sparse_index: Dict[str, Any] = {
+        "enabled": True,
+        "ngram": 2,
+        "k1": 1.2,
+        "b": 0.75,
+        "rrf_k": 60,
+        "candidates": 20,
+        "build_missing": True,
+    }
+
+    # cross-encoder 재순위화 (candidates개를 검색한 뒤 top_k개로 줄임, 시간 예산 초과 시 벡터 순서 사용)
+    reranker: Dict[str, Any] = {
+        "enabled": os.getenv("RERANKER_ENABLED", "false").lower() == "true",
+        "model": os.getenv("RERANKER_MODEL", "Dongjin-kr/ko-reranker"),
+        "device": os.getenv("RERANKER_DEVICE", "auto"),
+        "candidates": 20,
+        "batch_size": 16,
+        "max_length": 512,
+        "time_budget_ms": 300.0,
+    }
+
+    # RAG 프롬프트 토큰 예산 (history_ratio: 대화 이력에 배정할 최대 비율, 남으면 컨텍스트가 사용)
+    context_packing: Dict[str, Any] = {
+        "max_tokens": 6000,
+        "history_ratio": 0.3,
+        "chars_per_token": 4.0,
+        "min_overlap": 32,
+        "max_overlap": 512,
+    }
+
+    # 웹 검색 (Google Custom Search) 클라이언트
+    # query_templates: 한 질문을 여러 질의로 재구성해 동시에 검색 (예: "{query} 뉴스")
+    web_search: Dict[str, Any] = {
+        "timeout": 5.0,
+        "connect_timeout": 2.0,
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "retries": 2,
+        "backoff": 0.2,
+        "max_backoff": 2.0,
+        "max_concurrency": 4,
+        "cache_ttl": 600.0,
+        "cache_max_entries": 1000,
+        "rrf_k": 60,
+        "query_templates": ["{query}"],
+    }
+
+    # 리포트(벡터) + 웹 통합 검색: 두 검색을 동시에 실행하고 deadline_ms까지 도착한 결과만 RRF로 병합
+    combined_retrieval: Dict[str, Any] = {
+        "deadline_ms": 2500,
+        "rrf_k": 60,
+    }
+
+    # 후속 질문 추천: 답변 직후 백그라운드에서 생성해 Redis(recommend:{conversation_id})에 ttl초 저장
+    # attach_timeout_ms: 채팅 스트림 마지막 프레임에 추천 질문을 붙일 때 기다리는 최대 시간
+    recommendations: Dict[str, Any] = {
+        "prefetch": True,
+        "ttl": 3600,
+        "attach_timeout_ms": 1500,
+    }
+
+    # 동시에 들어온 같은 질문(정규화된 질의, 컬렉션, top_k)의 검색 / 답변 생성을 한 번만 실행
+    # (답변 생성은 대화 이력이 없는 요청만 합침)
+    single_flight: Dict[str, Any] = {
+        "enabled": True,
+    }
+
+    # /retrieval 배치 검색 (한 요청당 최대 쿼리 수)
+    # min_score: RAG 컨텍스트에 넣을 최소 점수 (보정된 관련 확률, 보정값이 없으면 코사인 유사도)
+    # sparse_rank_cutoff: 벡터 점수가 min_score 미만이어도 BM25 순위가 이 값 이내면 컨텍스트에 포함
+    retrieval: Dict[str, Any] = {
+        "max_batch_queries": 256,
+        "min_score": 0.5,
+        "sparse_rank_cutoff": 3,
+    }
+
+    # 컬렉션별 유사도 점수 보정 (표본 sample_size개, auto: 인덱싱 후 자동 재계산)
+    score_calibration: Dict[str, Any] = {
+        "enabled": True,
+        "auto": True,
+        "sample_size": 200,
+    }
+
+    # 쿼리 임베딩 LRU 캐시 (max_bytes: 전체 임베딩 바이트 상한, ttl: 초)
+    query_embedding_cache: Dict[str, Any] = {
+        "max_entries": 10000,
+        "max_bytes": 64 * 1024 * 1024,
+        "ttl": 3600.0,
+    }
+
+    # 의미 기반 답변 캐시 (같은 문서 집합 + 질의 임베딩 코사인 유사도 임계값)
+    answer_cache: Dict[str, Any] = {
+        "enabled": True,
+        "similarity_threshold": 0.97,
+        "ttl": 3600,
+        "max_entries_per_bucket": 64,
+    }
+
+    # 대화 이력: 최근 window_turns턴은 원문 그대로, 그 이전은 요약으로 유지
+    # (summary_min_messages개 이상 쌓이면 응답 후 백그라운드에서 요약 갱신)
+    memory: Dict[str, Any] = {
+        "window_turns": 5,
+        "summary_enabled": True,
+        "summary_min_messages": 4,
+        "summary_lock_ttl": 60,
+        # 요약이 아직 따라오지 못한 윈도우 밖 메시지를 원문으로 넣을 최대 개수 / 토큰 수
+        "gap_max_messages": 20,
+        "gap_max_tokens": 2000,
     }
 
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
@@ -38,4 +208,14 @@ class Settings(BaseSettings):
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
 
+    # 워커 전역 Redis 커넥션 풀 (timeout: 모든 연결이 사용 중일 때 반납 대기 시간(초))
+    redis_pool: Dict[str, Any] = {
+        "max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+        "timeout": 5.0,
+        "socket_timeout": 5.0,
+        "socket_connect_timeout": 2.0,
+        "health_check_interval": 30,
+        "sync_max_connections": 4,
+    }
+
 settings = Settings()
\ No newline at end of file
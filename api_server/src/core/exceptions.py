@@ -0,0 +1,10 @@
+class QueueFullError(RuntimeError):
+    """대기열(추론, 인덱싱, LLM 호출)이 가득 차 요청을 받을 수 없음"""
+
+
+class SchedulerStoppedError(RuntimeError):
+    """추론 스케줄러가 종료되어 요청을 처리할 수 없음"""
+
+
+class PathNotAllowedError(ValueError):
+    """허용된 데이터 디렉토리 밖의 경로"""
@@ -1,15 +1,39 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.router import api_router as router
 from core.config import settings
+from services.embedding import registry as embedding_registry
+from services.vectorstore import chroma_pool
+from services.executor import shutdown_executor
+from services.indexing_jobs import indexing_jobs
+from services.reranker import RERANKER_CONFIG, reranker
+from services.redis_pool import redis_pool
+from services.web_search import web_search
 from utils.logger import setup_logger
 
 # 로거 설정
 logger = setup_logger()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """워커 시작 시 임베딩 모델을 한 번만 로드하고 워밍업"""
+    embedding_registry.warmup([settings.collection_name])
+    if RERANKER_CONFIG["enabled"]:
+        reranker.warmup()
+    chroma_pool.start()
+    yield
+    indexing_jobs.shutdown()
+    await redis_pool.close()
+    await web_search.aclose()
+    chroma_pool.stop()
+    embedding_registry.shutdown()
+    shutdown_executor()
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Stock LLM API")
+    app = FastAPI(title="Stock LLM API", lifespan=lifespan)
     
     app.add_middleware(
         CORSMiddleware,
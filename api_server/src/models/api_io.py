@@ -21,19 +21,42 @@ class Identification(BaseModel):
 
 class IndexingItem(Identification):
     documents: List[Document] = []
+    pdf_paths: List[str] = []
+    collection_name: Optional[str] = None  # None이면 기본 컬렉션
     max_chunk_size: int = 1024
     num_chunk_overlap: int = 256
 
 class IndexingOutput(Identification):
     is_success: bool
+    job_id: Optional[str] = None
+
+class IndexingJobStatus(BaseModel):
+    """인덱싱 작업 진행 상황"""
+    job_id: str
+    status: str  # queued, running, done, failed
+    collection_name: str
+    total_sources: int
+    processed_sources: int = 0
+    indexed_chunks: int = 0
+    chunks_per_second: float = 0.0
+    errors: List[str] = []
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
 
 class RetrievalItem(Identification):
-    query: str
+    query: str = ""
+    queries: List[str] = []  # 여러 쿼리를 한 번에 검색할 때 사용
     max_query_size: int = 1024
     top_k: int = 3
 
+class QueryResult(BaseModel):
+    query: str
+    related_documents: List[Document] = []
+
 class RetrievalOutput(Identification):
     related_documents: List[Document] = []
+    results: List[QueryResult] = []  # 쿼리별 검색 결과 (queries 순서)
 
 class ChatItem(Identification):
     message: List[Utterance] = []
@@ -60,6 +83,7 @@ class WebOutput(Identification):
 
 class RagItem(ChatItem):
     query: str
+    rerank_budget_ms: Optional[float] = None  # 재순위화 시간 예산 (None이면 설정값)
 
 class RagOutput(Identification):
     answer: str
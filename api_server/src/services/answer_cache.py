@@ -0,0 +1,183 @@
+from typing import Any, Dict, List, Optional
+import base64
+import hashlib
+import json
+import logging
+import time
+
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+
+from core.config import settings
+from services.embedding_cache import normalize_query
+from services.redis_pool import redis_pool
+from services.vectorstore import chroma_pool
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_embedding(embedding: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode()
+
+
+def _decode_embedding(value: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+
+def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b)) / denom if denom else 0.0
+
+
+class SemanticAnswerCache:
+    """질의 임베딩 + 검색 문서 ID 집합 기반 LLM 답변 캐시
+
+    같은 문서 집합이 검색된 경우에만 같은 버킷(Redis hash)을 조회하고,
+    버킷 안에서 질의 임베딩의 코사인 유사도가 임계값 이상인 답변을 재사용한다.
+    컬렉션별 세대(generation) 번호를 키에 포함하여 인덱싱 시 한 번에 무효화한다.
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        sync_redis_client: redis.Redis,
+        similarity_threshold: float = 0.97,
+        ttl: int = 3600,
+        max_entries_per_bucket: int = 64,
+    ):
+        self.redis = redis_client
+        # 무효화는 인덱싱 스레드/프로세스에서 호출되므로 동기 클라이언트 사용
+        self.sync_redis = sync_redis_client
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries_per_bucket = max_entries_per_bucket
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _get_generation_key(self, collection_name: str) -> str:
+        return f"answer_cache:{collection_name}:generation"
+
+    def _get_bucket_key(self, collection_name: str, generation: int, doc_ids: List[str]) -> str:
+        digest = hashlib.sha1("\x1f".join(sorted(set(doc_ids))).encode()).hexdigest()
+        return f"answer_cache:{collection_name}:{generation}:{digest}"
+
+    async def _generation(self, collection_name: str) -> int:
+        value = await self.redis.get(self._get_generation_key(collection_name))
+        return int(value) if value else 0
+
+    async def lookup(self, collection_name: str, query_embedding: np.ndarray, doc_ids: List[str]) -> Optional[str]:
+        """캐시된 답변 조회 (유사도 임계값 미만이면 None)
+
+        캐시는 부가 기능이므로 Redis 오류(타임아웃, 연결 끊김)는 miss로 처리하여 요청을 실패시키지 않는다.
+        """
+        try:
+            return await self._lookup(collection_name, query_embedding, doc_ids)
+        except Exception as e:
+            self.errors += 1
+            self.misses += 1
+            logger.error(f"답변 캐시 조회 중 오류 발생 (miss로 처리): {str(e)}")
+            return None
+
+    async def _lookup(self, collection_name: str, query_embedding: np.ndarray, doc_ids: List[str]) -> Optional[str]:
+        bucket_key = self._get_bucket_key(collection_name, await self._generation(collection_name), doc_ids)
+        entries = await self.redis.hgetall(bucket_key)
+        now = time.time()
+
+        best_answer, best_score = None, self.similarity_threshold
+        for raw in entries.values():
+            entry = json.loads(raw)
+            if entry["expires_at"] <= now:
+                continue
+            score = _cosine_similarity(query_embedding, _decode_embedding(entry["embedding"]))
+            if score >= best_score:
+                best_answer, best_score = entry["answer"], score
+
+        if best_answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            logger.info(f"✅ 답변 캐시 hit (similarity={best_score:.4f})")
+        return best_answer
+
+    async def store(
+        self,
+        collection_name: str,
+        query: str,
+        query_embedding: np.ndarray,
+        doc_ids: List[str],
+        answer: str,
+    ) -> None:
+        """답변 저장 (버킷 단위 TTL 갱신)
+
+        답변은 이미 생성되었으므로 저장 실패는 로그만 남긴다.
+        """
+        try:
+            await self._store(collection_name, query, query_embedding, doc_ids, answer)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"답변 캐시 저장 중 오류 발생: {str(e)}")
+
+    async def _store(
+        self,
+        collection_name: str,
+        query: str,
+        query_embedding: np.ndarray,
+        doc_ids: List[str],
+        answer: str,
+    ) -> None:
+        bucket_key = self._get_bucket_key(collection_name, await self._generation(collection_name), doc_ids)
+        entry = {
+            "query": query,
+            "embedding": _encode_embedding(query_embedding),
+            "answer": answer,
+            "expires_at": time.time() + self.ttl,
+        }
+        field = hashlib.sha1(normalize_query(query).encode()).hexdigest()
+
+        pipe = self.redis.pipeline()
+        pipe.hset(bucket_key, field, json.dumps(entry))
+        pipe.expire(bucket_key, self.ttl)
+        pipe.hlen(bucket_key)
+        *_, size = await pipe.execute()
+
+        if size > self.max_entries_per_bucket:
+            await self._trim(bucket_key)
+
+    async def _trim(self, bucket_key: str) -> None:
+        """버킷 크기 제한을 넘으면 만료가 가까운 항목부터 제거"""
+        entries = await self.redis.hgetall(bucket_key)
+        ordered = sorted(entries.items(), key=lambda item: json.loads(item[1])["expires_at"])
+        overflow = len(ordered) - self.max_entries_per_bucket
+        if overflow > 0:
+            await self.redis.hdel(bucket_key, *[field for field, _ in ordered[:overflow]])
+
+    def invalidate(self, collection_name: str) -> None:
+        """컬렉션의 캐시 전체 무효화 (이전 세대 버킷은 TTL로 소멸)"""
+        self.sync_redis.incr(self._get_generation_key(collection_name))
+        logger.info(f"🔄 {collection_name} 답변 캐시 무효화")
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 워커의 hit / miss / Redis 오류 카운터"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "similarity_threshold": self.similarity_threshold,
+            "ttl": self.ttl,
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    redis_pool.client,
+    redis_pool.sync_client,
+    similarity_threshold=settings.answer_cache["similarity_threshold"],
+    ttl=settings.answer_cache["ttl"],
+    max_entries_per_bucket=settings.answer_cache["max_entries_per_bucket"],
+)
+
+# 인덱싱으로 컬렉션이 갱신되면 해당 컬렉션의 답변 캐시도 무효화
+chroma_pool.add_invalidation_listener(answer_cache.invalidate)
@@ -1,139 +1,175 @@
+import argparse
 import os
-import re
-import torch
 import numpy as np
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain.embeddings.base import Embeddings
-from langchain.schema import Document
-from transformers import AutoTokenizer, AutoModel
-from typing import List
 import sys
 
 from core.config import settings
+from services.embedding import get_collection_engine
+from services.vectorstore import CollectionEmbeddingFunction, chroma_pool
+from services.answer_cache import answer_cache  # 인덱싱 시 답변 캐시 무효화 리스너 등록
+from services.sparse_index import sparse_indexes  # 인덱싱 시 희소 인덱스 재구축 리스너 등록
+from services.score_calibration import score_calibration  # 인덱싱 시 점수 보정 리스너 등록
+from services.ingestion import ingest_directory, load_pdf_chunks, upsert_chunks
+from services.incremental_indexer import sync_directory
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
-# ✅ 모델 불러오기
 CONFIG = settings.vector_db
-MODEL_NAME = CONFIG["model"]
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModel.from_pretrained(MODEL_NAME).to("cuda" if torch.cuda.is_available() else "cpu")
-
-
 
 # ✅ ChromaDB 저장 경로 설정
 CHROMA_DB_DIR = CONFIG["chroma_db_dir"]
 
-# ✅ 텍스트 전처리 함수
-def clean_text(text):
-    """불필요한 공백 및 특수문자 제거"""
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-# ✅ Mean Pooling 적용하여 문장 임베딩 생성
-def mean_pooling(model_output, attention_mask):
-    """Mean Pooling을 적용하여 문장 임베딩 생성"""
-    token_embeddings = model_output.last_hidden_state
-    input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
-    return (token_embeddings * input_mask_expanded).sum(1) / input_mask_expanded.sum(1)
-
 # ✅ DeBERTa를 사용하여 텍스트 임베딩 생성
-def generate_text_embeddings(texts):
-    """DeBERTa를 사용하여 문장 임베딩을 생성"""
+def generate_text_embeddings(texts, collection_name: str = settings.collection_name) -> np.ndarray:
+    """컬렉션에 선언된 임베딩 엔진으로 (len(texts), 768) float32 문장 임베딩 행렬을 생성"""
     if isinstance(texts, str):
         texts = [texts]
-
-    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to('cuda')
-    
-    with torch.no_grad():
-        model_output = model(**inputs)
-    
-    embeddings = mean_pooling(model_output, inputs['attention_mask'])
-    return embeddings.cpu().numpy().tolist()
-
-# ✅ Chroma에서 사용할 커스텀 임베딩 함수 정의
-class DeBERTaEmbeddingFunction(Embeddings):
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return generate_text_embeddings(texts)
-
-    def embed_query(self, text: str) -> List[float]:
-        return generate_text_embeddings(text)
+    return get_collection_engine(collection_name).encode(texts)
 
 # ✅ PDF에서 텍스트를 추출하고 ChromaDB에 저장하는 함수
 def process_pdf_to_chromadb(pdf_path, collection_name):
-    """PDF에서 텍스트를 추출하고 임베딩 생성 후 ChromaDB에 저장."""
+    """PDF에서 텍스트를 추출하고 임베딩 생성 후 ChromaDB에 한 번에 upsert."""
     print(f"\n🔄 PDF 처리 시작: {pdf_path}")
 
-    loader = PyPDFLoader(pdf_path)
-    pdf_docs = loader.load()
-    print(f"✅ PDF에서 {len(pdf_docs)}개의 페이지를 로드함.")
-
-    text_splitter = CharacterTextSplitter(chunk_size=CONFIG["max_chunk_size"], chunk_overlap=CONFIG["num_chunk_overlap"])
-    split_docs = []
-    
-    for doc in pdf_docs:
-        cleaned_text = clean_text(doc.page_content)
-        chunks = text_splitter.split_text(cleaned_text)
-        for chunk in chunks:
-            split_docs.append(Document(page_content=chunk, metadata=doc.metadata))
-
-    print(f"✅ 총 {len(split_docs)}개의 텍스트 청크 생성됨.")
-
-    vectorstore = Chroma(
-        collection_name=collection_name,
-        embedding_function=DeBERTaEmbeddingFunction(),
-        persist_directory=CHROMA_DB_DIR,
-    )
-
-    texts = [doc.page_content for doc in split_docs]
-    metadatas = [doc.metadata for doc in split_docs]
+    chunks = load_pdf_chunks(pdf_path, CONFIG["max_chunk_size"], CONFIG["num_chunk_overlap"])
+    print(f"✅ 총 {len(chunks)}개의 텍스트 청크 생성됨.")
 
-    if not texts:
+    if not chunks:
         print("❌ 저장할 텍스트 데이터가 없습니다. PDF를 확인하세요.")
         return
 
     print("✅ 문서 임베딩 생성 중...")
-    embeddings = generate_text_embeddings(texts)
+    embeddings = generate_text_embeddings([text for text, _ in chunks], collection_name)
     
-    if not embeddings or np.all(np.array(embeddings) == 0):
+    if len(embeddings) == 0 or not embeddings.any():
         print("❌ 임베딩이 제대로 생성되지 않았습니다. 모델 또는 입력을 확인하세요.")
         return
 
     print(f"✅ 임베딩 생성 완료 (총 {len(embeddings)}개)")
-    vectorstore.add_texts(texts=texts, metadatas=metadatas)
-    vectorstore.persist()
+    # 계산한 임베딩을 그대로 저장 (콘텐츠 해시 ID로 upsert하므로 재인덱싱해도 중복 없음)
+    collection = chroma_pool.get_collection(collection_name)
+    upsert_chunks(collection, chunks, embeddings)
+    chroma_pool.invalidate(collection_name)
 
-    num_docs = vectorstore._collection.count()
+    num_docs = chroma_pool.count(collection_name)
     print(f"✅ 현재 ChromaDB에 저장된 문서 개수: {num_docs}")
 
-    saved_data = vectorstore._collection.get(limit=3)
+    saved_data = collection.get(limit=3)
     print("✅ 저장된 데이터 샘플 (최대 3개):", saved_data.get("documents", []))
 
     print(f"✅ PDF {os.path.basename(pdf_path)} 처리 완료 및 저장됨.")
 
+# ✅ 이전 설정으로 저장된 컬렉션을 현재 설정으로 다시 임베딩
+def migrate_collection(collection_name, batch_size=256):
+    """저장된 청크를 선언된 거리 공간 / 정규화 설정으로 다시 임베딩하여 컬렉션을 교체.
+
+    정규화 기록이 없는 이전 l2 컬렉션은 점수 보정과 min_score 필터를 쓸 수 없으므로 이 경로로 옮긴다.
+    청크 ID는 그대로 유지하므로 희소 인덱스와 매니페스트는 다시 만들 필요가 없다.
+    """
+    target = chroma_pool.creation_metadata(collection_name)
+    if (chroma_pool.space(collection_name) == target["hnsw:space"]
+            and chroma_pool.normalized(collection_name) == target["normalized"]):
+        print(f"✅ {collection_name}은 이미 현재 설정({target})으로 저장되어 있습니다.")
+        return
+
+    client = chroma_pool.client
+    staging_name, backup_name = f"{collection_name}_migrating", f"{collection_name}_backup"
+    existing = {collection.name for collection in client.list_collections()}
+    if backup_name in existing:
+        # 이전 마이그레이션이 교체 도중 중단된 경우: 백업이 유일한 사본일 수 있으므로 직접 확인하도록 중단
+        print(f"❌ {backup_name} 컬렉션이 남아 있습니다. 확인 후 삭제하고 다시 실행하세요.")
+        return
+    if staging_name in existing:
+        client.delete_collection(staging_name)
+
+    source = chroma_pool.get_collection(collection_name)
+    staging = client.create_collection(
+        name=staging_name,
+        embedding_function=CollectionEmbeddingFunction(collection_name),
+        metadata=target,
+    )
+    total = source.count()
+    print(f"🔄 {collection_name} 청크 {total}개 다시 임베딩 중 ({target})")
+    for offset in range(0, total, batch_size):
+        page = source.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        staging.upsert(
+            ids=page["ids"],
+            embeddings=generate_text_embeddings(page["documents"], collection_name).tolist(),
+            documents=page["documents"],
+            metadatas=page["metadatas"],
+        )
+        print(f"✅ {min(offset + batch_size, total)}/{total}")
+
+    # 새 컬렉션이 완성된 뒤에만 이름을 바꿔 교체 (검색 중인 요청은 invalidate 후 새 핸들을 연다)
+    source.modify(name=backup_name)
+    staging.modify(name=collection_name)
+    client.delete_collection(backup_name)
+    chroma_pool.invalidate(collection_name)
+    print(f"✅ {collection_name} 마이그레이션 완료 (현재 문서 개수: {chroma_pool.count(collection_name)})")
+
 # ✅ 디렉토리 내 모든 PDF 파일 처리
-def process_all_pdfs_in_directory(directory, collection_name):
-    """지정된 디렉토리 내 모든 PDF 파일을 처리."""
+def process_all_pdfs_in_directory(directory, collection_name, num_workers=None):
+    """지정된 디렉토리 내 모든 PDF 파일을 병렬 파싱 + 배치 임베딩으로 처리 (중단 시 이어서 처리)."""
     print(f"\n📂 디렉토리 내 PDF 처리 시작: {directory}")
 
-    pdf_files = [os.path.join(root, file)
-                 for root, _, files in os.walk(directory)
-                 for file in files if file.endswith(".pdf")]
+    report = ingest_directory(directory, collection_name, num_workers=num_workers)
 
-    if not pdf_files:
+    if report.total_files == 0:
         print("❌ 처리할 PDF 파일이 없습니다.")
         return
 
-    print(f"✅ 총 {len(pdf_files)}개의 PDF 파일 발견됨.")
+    print(f"✅ 총 {report.total_files}개의 PDF 파일 발견됨 (이미 완료된 {report.skipped_files}개 건너뜀).")
+    print(f"✅ {report.indexed_files}개 파일, {report.indexed_chunks}개 청크 저장 완료 "
+          f"({report.elapsed:.1f}초, {report.chunks_per_second:.1f} chunks/s)")
+    if report.failed_files:
+        print(f"❌ 실패한 파일 {len(report.failed_files)}개: {report.failed_files}")
 
-    for pdf_path in pdf_files:
-        process_pdf_to_chromadb(pdf_path, collection_name)
+# ✅ 변경된 PDF만 증분 동기화
+def sync_pdfs_in_directory(directory, collection_name, dry_run=False, num_workers=None):
+    """새로 추가되거나 내용이 바뀐 PDF만 임베딩하고, 바뀌거나 삭제된 PDF의 기존 청크는 삭제."""
+    print(f"\n📂 디렉토리 증분 동기화 시작: {directory}")
 
-if __name__ == "__main__":
-    directory_path = "/data/ephemeral/home/level4-nlp-finalproject-hackathon-nlp-15-lv3/data" # 저장할 PDF폴더 경로로
-    collection_name = "pdf_text_collection" # 컬렉션 이름름
+    report = sync_directory(directory, collection_name, dry_run=dry_run, num_workers=num_workers)
 
-    process_all_pdfs_in_directory(directory_path, collection_name)
+    for line in report.diff.describe():
+        print(line)
+
+    if dry_run:
+        print("ℹ️ dry-run: 변경 사항만 출력하고 저장하지 않았습니다.")
+        return
+    if not report.diff.has_changes:
+        print("✅ 변경된 PDF가 없습니다.")
+        return
+
+    print(f"✅ {report.deleted_files}개 파일의 기존 청크 삭제")
+    if report.ingestion:
+        print(f"✅ {report.ingestion.indexed_files}개 파일, {report.ingestion.indexed_chunks}개 청크 저장 완료 "
+              f"({report.elapsed:.1f}초)")
+        if report.ingestion.failed_files:
+            print(f"❌ 실패한 파일 {len(report.ingestion.failed_files)}개: {report.ingestion.failed_files}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF 디렉토리를 ChromaDB에 인덱싱")
+    parser.add_argument("--directory", default="/data/ephemeral/home/level4-nlp-finalproject-hackathon-nlp-15-lv3/data") # 저장할 PDF폴더 경로로
+    parser.add_argument("--collection", default="pdf_text_collection") # 컬렉션 이름
+    parser.add_argument("--incremental", action="store_true", help="변경된 파일만 동기화")
+    parser.add_argument("--dry-run", action="store_true", help="증분 동기화 시 변경 사항만 출력")
+    parser.add_argument("--num-workers", type=int, default=None)
+    parser.add_argument("--calibrate", action="store_true", help="인덱싱 없이 점수 보정값만 다시 계산")
+    parser.add_argument("--migrate", action="store_true", help="저장된 청크를 현재 거리 공간 / 정규화 설정으로 다시 임베딩")
+    parser.add_argument("--build-sparse", action="store_true", help="인덱싱 없이 BM25 희소 인덱스만 다시 구축")
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_collection(args.collection)
+    elif args.build_sparse:
+        index = sparse_indexes.rebuild(args.collection)
+        print(f"✅ 희소 인덱스 구축 완료 (문서 {len(index)}개, 단어 {len(index.vocabulary)}개)")
+    elif args.calibrate:
+        calibration = score_calibration.calibrate(args.collection)
+        print(f"✅ 점수 보정 결과: {calibration.to_dict() if calibration else '표본 부족으로 생략'}")
+    elif args.incremental or args.dry_run:
+        sync_pdfs_in_directory(args.directory, args.collection, dry_run=args.dry_run, num_workers=args.num_workers)
+    else:
+        process_all_pdfs_in_directory(args.directory, args.collection, num_workers=args.num_workers)
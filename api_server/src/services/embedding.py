@@ -0,0 +1,270 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+import threading
+
+import numpy as np
+import torch
+from langchain.embeddings.base import Embeddings
+from transformers import AutoModel, AutoTokenizer
+
+from core.config import settings
+from services.inference_scheduler import EmbeddingBatchScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def cls_pooling(last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """[CLS] 토큰 벡터를 문장 임베딩으로 사용"""
+    return last_hidden_state[:, 0, :]
+
+
+def mean_pooling(last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """패딩을 제외한 토큰 벡터의 평균을 문장 임베딩으로 사용"""
+    mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+    summed = (last_hidden_state * mask).sum(1)
+    counts = mask.sum(1).clamp(min=1e-9)
+    return summed / counts
+
+
+POOLING_FUNCTIONS: Dict[str, Callable[[torch.Tensor, torch.Tensor], torch.Tensor]] = {
+    "cls": cls_pooling,
+    "mean": mean_pooling,
+}
+
+
+class EmbeddingEngine:
+    """길이 버킷팅 기반 배치 임베딩 엔진
+
+    입력 텍스트를 토큰 길이순으로 정렬한 뒤 마이크로 배치로 묶고,
+    각 배치는 배치 내 최대 길이까지만 패딩하여 한 번의 forward로 처리한다.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        model: Any,
+        pooling: str = "cls",
+        batch_size: int = 32,
+        max_length: int = 512,
+        max_batch_tokens: Optional[int] = None,
+        device: Optional[torch.device] = None,
+        normalize: bool = False,
+    ):
+        if pooling not in POOLING_FUNCTIONS:
+            raise ValueError(f"지원하지 않는 pooling 방식입니다: {pooling}")
+        self.tokenizer = tokenizer
+        self.model = model
+        self.pooling = pooling
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
+        self.device = device if device is not None else next(model.parameters()).device
+        self.normalize = normalize
+        self._pool = POOLING_FUNCTIONS[pooling]
+
+    @property
+    def dim(self) -> int:
+        """임베딩 차원"""
+        return self.model.config.hidden_size
+
+    def _make_batches(self, order: List[int], lengths: List[int]) -> List[List[int]]:
+        """길이순으로 정렬된 인덱스를 batch_size / max_batch_tokens 제약에 맞춰 분할"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_max = 0
+        for idx in order:
+            new_max = max(current_max, lengths[idx])
+            over_size = len(current) >= self.batch_size
+            over_tokens = (
+                self.max_batch_tokens is not None
+                and current
+                and new_max * (len(current) + 1) > self.max_batch_tokens
+            )
+            if over_size or over_tokens:
+                batches.append(current)
+                current, new_max = [], lengths[idx]
+            current.append(idx)
+            current_max = new_max
+        if current:
+            batches.append(current)
+        return batches
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """텍스트 리스트를 (len(texts), dim) 크기의 float32 행렬로 변환
+
+        빈 문자열은 0 벡터로 채운다. normalize이면 각 행을 L2 정규화한다.
+        """
+        output = np.zeros((len(texts), self.dim), dtype=np.float32)
+        valid = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not valid:
+            return output
+
+        encoded = self.tokenizer(
+            [texts[i] for i in valid],
+            truncation=True,
+            max_length=self.max_length,
+            padding=False,
+        )
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        # 긴 배치부터 처리하여 메모리 부족을 초기에 발견한다
+        order = sorted(range(len(valid)), key=lambda i: lengths[i], reverse=True)
+
+        for batch in self._make_batches(order, lengths):
+            features = {key: [encoded[key][i] for i in batch] for key in encoded.keys()}
+            inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt").to(self.device)
+            with torch.inference_mode():
+                outputs = self.model(**inputs)
+            pooled = self._pool(outputs.last_hidden_state, inputs["attention_mask"])
+            output[[valid[i] for i in batch]] = pooled.float().cpu().numpy()
+
+        if self.normalize:
+            norms = np.linalg.norm(output, axis=1, keepdims=True)
+            np.divide(output, norms, out=output, where=norms > 0)
+        return np.ascontiguousarray(output)
+
+
+class EmbeddingModelRegistry:
+    """프로세스 전역 임베딩 모델 레지스트리
+
+    모델 가중치는 (model_name, device) 단위로 워커당 한 번만 로드하고,
+    엔진은 (model_name, device, pooling) 단위로 캐시한다.
+    """
+
+    def __init__(self, config: Dict[str, Any], scheduler_config: Dict[str, Any]):
+        self.config = config
+        self.scheduler_config = scheduler_config
+        self._models: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+        self._engines: Dict[Tuple[str, str, str], EmbeddingEngine] = {}
+        self._schedulers: Dict[Tuple[str, str, str], EmbeddingBatchScheduler] = {}
+        self._lock = threading.Lock()
+
+    def _resolve_device(self, device: Optional[str]) -> str:
+        device = device or self.config.get("device") or "auto"
+        if device == "auto":
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        return device
+
+    def _load_model(self, model_name: str, device: str) -> Tuple[Any, Any]:
+        key = (model_name, device)
+        if key not in self._models:
+            logger.info(f"🔄 임베딩 모델 로드 중: {model_name} ({device})")
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModel.from_pretrained(model_name).to(device)
+            model.eval()
+            self._models[key] = (tokenizer, model)
+        return self._models[key]
+
+    def get_engine(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[str] = None,
+        pooling: Optional[str] = None,
+    ) -> EmbeddingEngine:
+        """임베딩 엔진 조회 (최초 호출 시 모델 로드)"""
+        model_name = model_name or self.config["model"]
+        device = self._resolve_device(device)
+        pooling = pooling or self.config["pooling"]
+        key = (model_name, device, pooling)
+
+        engine = self._engines.get(key)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            if key not in self._engines:
+                tokenizer, model = self._load_model(model_name, device)
+                self._engines[key] = EmbeddingEngine(
+                    tokenizer,
+                    model,
+                    pooling=pooling,
+                    batch_size=self.config["batch_size"],
+                    max_length=self.config["max_length"],
+                    max_batch_tokens=self.config["max_batch_tokens"],
+                    device=torch.device(device),
+                    normalize=self.config.get("normalize", False),
+                )
+            return self._engines[key]
+
+    def collection_config(self, collection_name: str) -> Dict[str, Any]:
+        """컬렉션별 임베딩 설정 (모델, pooling, 거리 공간, 정규화 여부) 조회"""
+        declared = self.config.get("collections", {}).get(collection_name, {})
+        return {
+            "model": declared.get("model", self.config["model"]),
+            "pooling": declared.get("pooling", self.config["pooling"]),
+            "space": declared.get("space", self.config.get("space", "l2")),
+            # 엔진은 (model, device, pooling) 단위로 공유되므로 정규화는 전역 설정을 따른다
+            "normalize": self.config.get("normalize", False),
+        }
+
+    def get_collection_engine(self, collection_name: str) -> EmbeddingEngine:
+        """컬렉션에 선언된 pooling 방식의 엔진 조회
+
+        인덱싱과 검색이 항상 같은 엔진을 사용하도록 보장한다.
+        """
+        declared = self.collection_config(collection_name)
+        return self.get_engine(model_name=declared["model"], pooling=declared["pooling"])
+
+    def get_collection_scheduler(self, collection_name: str) -> EmbeddingBatchScheduler:
+        """컬렉션 엔진에 연결된 쿼리 마이크로 배칭 스케줄러 조회"""
+        engine = self.get_collection_engine(collection_name)
+        declared = self.collection_config(collection_name)
+        key = (declared["model"], str(engine.device), declared["pooling"])
+
+        scheduler = self._schedulers.get(key)
+        if scheduler is not None:
+            return scheduler
+
+        with self._lock:
+            if key not in self._schedulers:
+                self._schedulers[key] = EmbeddingBatchScheduler(
+                    engine.encode,
+                    name=f"{declared['model']}@{engine.device}/{declared['pooling']}",
+                    **self.scheduler_config,
+                )
+            return self._schedulers[key]
+
+    def scheduler_stats(self) -> Dict[str, Dict[str, Any]]:
+        """스케줄러별 대기열 / 배치 지표"""
+        return {scheduler.name: scheduler.stats() for scheduler in self._schedulers.values()}
+
+    def shutdown(self) -> None:
+        """추론 스케줄러 스레드 종료"""
+        for scheduler in list(self._schedulers.values()):
+            scheduler.stop()
+
+    def warmup(self, collection_names: Sequence[str]) -> None:
+        """모델 로드 및 더미 forward로 첫 요청 지연 제거"""
+        for collection_name in collection_names:
+            self.get_collection_engine(collection_name).encode(["warmup"])
+        logger.info(f"✅ 임베딩 모델 워밍업 완료: {self.memory_footprint()}")
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """로드된 모델별 파라미터/버퍼 메모리 사용량 (bytes)"""
+        footprint = {}
+        for (model_name, device), (_, model) in self._models.items():
+            tensors = list(model.parameters()) + list(model.buffers())
+            footprint[f"{model_name}@{device}"] = sum(t.numel() * t.element_size() for t in tensors)
+        return footprint
+
+
+registry = EmbeddingModelRegistry(settings.vector_db, settings.inference_scheduler)
+
+
+def get_collection_engine(collection_name: str = settings.collection_name) -> EmbeddingEngine:
+    """컬렉션에 대응하는 공유 임베딩 엔진 조회"""
+    return registry.get_collection_engine(collection_name)
+
+
+class DeBERTaEmbeddingFunction(Embeddings):
+    """DeBERTa를 이용한 ChromaDB 임베딩 함수"""
+
+    def __init__(self, collection_name: str = settings.collection_name):
+        self.collection_name = collection_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """문서 리스트를 입력받아 임베딩 벡터 리스트를 반환"""
+        return get_collection_engine(self.collection_name).encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """검색 쿼리를 입력받아 임베딩 벡터를 반환 (동시 요청과 함께 마이크로 배칭)"""
+        return registry.get_collection_scheduler(self.collection_name).embed(text).tolist()
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from core.config import settings
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키 생성을 위한 쿼리 정규화 (유니코드 NFKC, 공백 정리, 소문자화)"""
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip().lower()
+
+
+class QueryEmbeddingCache:
+    """쿼리 임베딩 LRU 캐시
+
+    (모델명, pooling, 정규화된 쿼리)를 키로 임베딩을 저장한다.
+    항목 수 / 전체 바이트 크기 제한을 넘으면 가장 오래 사용되지 않은 항목부터 제거하고,
+    TTL이 지난 항목은 조회 시점에 만료 처리한다.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(model_name: str, pooling: str, query: str) -> Tuple[str, str, str]:
+        return (model_name, pooling, normalize_query(query))
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """캐시 조회 (hit 시 LRU 순서 갱신)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            embedding, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key: Hashable, embedding: np.ndarray) -> None:
+        """캐시 저장 (제한 초과 시 LRU 항목 제거)"""
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        if embedding.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (embedding, time.monotonic() + self.ttl)
+            self._bytes += embedding.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        embedding, _ = self._entries.pop(key)
+        self._bytes -= embedding.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """hit / miss / eviction 카운터 및 현재 사용량"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+
+query_embedding_cache = QueryEmbeddingCache(**settings.query_embedding_cache)
@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+import asyncio
+
+from core.config import settings
+
+T = TypeVar("T")
+
+# 임베딩 추론, ChromaDB 조회 등 CPU/블로킹 작업 전용 스레드 풀
+# 이벤트 루프를 막지 않도록 요청 경로의 블로킹 호출은 모두 여기서 실행한다.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.executor["max_workers"],
+    thread_name_prefix="blocking-worker",
+)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """블로킹 함수를 전용 스레드 풀에서 실행하고 결과를 기다림"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    """스레드 풀 종료 (앱 종료 시 호출)"""
+    _executor.shutdown(wait=False, cancel_futures=True)
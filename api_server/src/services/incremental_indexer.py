@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import time
+
+from services.ingestion import (
+    INGESTION_CONFIG,
+    IngestionManifest,
+    IngestionReport,
+    default_manifest_path,
+    find_pdf_files,
+    ingest_files,
+)
+from services.vectorstore import chroma_pool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexDiff:
+    """디렉토리와 매니페스트를 비교한 변경 사항"""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # 내용은 같고 수정 시각만 바뀐 파일 -> 새 지문
+    touched: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def to_index(self) -> List[str]:
+        return self.added + self.changed
+
+    @property
+    def to_delete(self) -> List[str]:
+        return self.changed + self.removed
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def describe(self) -> List[str]:
+        """사람이 읽을 수 있는 변경 목록 (dry-run 출력용)"""
+        lines = [
+            f"추가 {len(self.added)}개, 변경 {len(self.changed)}개, "
+            f"삭제 {len(self.removed)}개, 변경 없음 {len(self.unchanged)}개"
+        ]
+        lines += [f"  + {path}" for path in self.added]
+        lines += [f"  ~ {path}" for path in self.changed]
+        lines += [f"  - {path}" for path in self.removed]
+        return lines
+
+
+@dataclass
+class SyncReport:
+    """증분 동기화 결과"""
+    diff: IndexDiff
+    dry_run: bool = False
+    deleted_files: int = 0
+    ingestion: Optional[IngestionReport] = None
+    elapsed: float = 0.0
+
+
+def _in_directory(path: str, directory: str) -> bool:
+    return os.path.abspath(path).startswith(os.path.join(os.path.abspath(directory), ""))
+
+
+def plan_sync(directory: str, manifest: IngestionManifest) -> IndexDiff:
+    """디렉토리의 현재 파일과 매니페스트 지문을 비교해 변경 사항 계산
+
+    크기와 수정 시각이 같으면 해시하지 않고 변경 없음으로 본다. 둘 중 하나라도
+    다르면 내용 해시를 비교해 실제 내용이 바뀐 파일만 변경으로 분류한다.
+    """
+    diff = IndexDiff()
+    pdf_files = find_pdf_files(directory)
+
+    for pdf_path in pdf_files:
+        entry = manifest.files.get(pdf_path)
+        if entry is None:
+            diff.added.append(pdf_path)
+            continue
+        if entry.get("status") != "done":
+            # 실패했던 파일은 일부 청크가 남아 있을 수 있으므로 지우고 다시 인덱싱
+            diff.changed.append(pdf_path)
+            continue
+
+        stat = manifest.stat_file(pdf_path)
+        if entry["size"] == stat["size"] and entry["mtime"] == stat["mtime"]:
+            diff.unchanged.append(pdf_path)
+            continue
+
+        fingerprint = manifest.fingerprint(pdf_path)
+        if entry.get("sha256") == fingerprint["sha256"]:
+            diff.unchanged.append(pdf_path)
+            diff.touched[pdf_path] = fingerprint
+        else:
+            diff.changed.append(pdf_path)
+
+    current = set(pdf_files)
+    diff.removed = sorted(
+        path for path in manifest.files
+        if path not in current and _in_directory(path, directory)
+    )
+    return diff
+
+
+def delete_file_chunks(collection: Any, pdf_paths: List[str]) -> int:
+    """파일(메타데이터 source)에 속한 청크를 모두 삭제"""
+    for pdf_path in pdf_paths:
+        collection.delete(where={"source": pdf_path})
+    return len(pdf_paths)
+
+
+def sync_directory(
+    directory: str,
+    collection_name: str,
+    manifest_path: Optional[str] = None,
+    dry_run: bool = False,
+    num_workers: Optional[int] = None,
+    embed_batch_size: int = INGESTION_CONFIG["embed_batch_size"],
+) -> SyncReport:
+    """디렉토리를 컬렉션과 증분 동기화
+
+    새 파일과 내용이 바뀐 파일만 임베딩하고, 바뀌거나 삭제된 파일의 기존 청크는
+    먼저 지운다. dry_run이면 변경 사항만 계산하고 아무것도 쓰지 않는다.
+    """
+    started = time.monotonic()
+    manifest = IngestionManifest.load(manifest_path or default_manifest_path(collection_name), collection_name)
+    diff = plan_sync(directory, manifest)
+    report = SyncReport(diff=diff, dry_run=dry_run)
+    for line in diff.describe():
+        logger.info(line)
+
+    if dry_run or not (diff.has_changes or diff.touched):
+        report.elapsed = time.monotonic() - started
+        return report
+
+    for pdf_path, fingerprint in diff.touched.items():
+        manifest.touch(pdf_path, fingerprint)
+
+    if not diff.has_changes:
+        manifest.save()
+        report.elapsed = time.monotonic() - started
+        return report
+
+    try:
+        if diff.to_delete:
+            collection = chroma_pool.get_collection(collection_name)
+            report.deleted_files = delete_file_chunks(collection, diff.to_delete)
+            for pdf_path in diff.removed:
+                manifest.remove(pdf_path)
+        report.ingestion = ingest_files(diff.to_index, collection_name, manifest, num_workers, embed_batch_size)
+    finally:
+        manifest.save()
+        chroma_pool.invalidate(collection_name)
+
+    report.elapsed = time.monotonic() - started
+    return report
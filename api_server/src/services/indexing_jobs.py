@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+import uuid
+
+from core.config import settings
+from core.exceptions import PathNotAllowedError, QueueFullError
+from models import IndexingItem, IndexingJobStatus
+from services.embedding import get_collection_engine
+from services.ingestion import INGESTION_CONFIG, Chunks, load_pdf_chunks, split_text_chunks, upsert_chunks
+from services.vectorstore import chroma_pool
+
+logger = logging.getLogger(__name__)
+
+
+class IndexingJob:
+    """단일 인덱싱 작업의 진행 상황 (워커 스레드가 갱신하고 API가 조회)"""
+
+    def __init__(self, item: IndexingItem, collection_name: str):
+        self.job_id = uuid.uuid4().hex
+        self.item = item
+        self.collection_name = collection_name
+        self.status = "queued"
+        self.total_sources = len(item.documents) + len(item.pdf_paths)
+        self.processed_sources = 0
+        self.indexed_chunks = 0
+        self.errors: List[str] = []
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self.status = "running"
+            self.started_at = datetime.now()
+            self._started = time.monotonic()
+
+    def advance(self, sources: int, chunks: int) -> None:
+        with self._lock:
+            self.processed_sources += sources
+            self.indexed_chunks += chunks
+
+    def add_error(self, error: str) -> None:
+        with self._lock:
+            self.errors.append(error)
+
+    def finish(self, status: str) -> None:
+        with self._lock:
+            self.status = status
+            self.finished_at = datetime.now()
+            self._finished = time.monotonic()
+
+    @property
+    def chunks_per_second(self) -> float:
+        if self._started is None:
+            return 0.0
+        elapsed = (self._finished or time.monotonic()) - self._started
+        return self.indexed_chunks / elapsed if elapsed > 0 else 0.0
+
+    def to_status(self) -> IndexingJobStatus:
+        with self._lock:
+            return IndexingJobStatus(
+                job_id=self.job_id,
+                status=self.status,
+                collection_name=self.collection_name,
+                total_sources=self.total_sources,
+                processed_sources=self.processed_sources,
+                indexed_chunks=self.indexed_chunks,
+                chunks_per_second=round(self.chunks_per_second, 2),
+                errors=list(self.errors),
+                created_at=self.created_at.isoformat(),
+                started_at=self.started_at.isoformat() if self.started_at else None,
+                finished_at=self.finished_at.isoformat() if self.finished_at else None,
+            )
+
+
+class IndexingJobManager:
+    """/indexing 요청을 백그라운드에서 처리하는 작업 관리자
+
+    채팅 요청용 스레드 풀과 분리된 전용 워커에서 청크 분할 → 배치 임베딩 →
+    일괄 upsert를 수행한다. 대기 중인 작업이 max_pending_jobs를 넘으면 거절한다.
+    PDF 경로는 data_root 아래의 파일만 허용한다 (data_root가 없으면 PDF 경로 인덱싱 불가).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_pending_jobs: int = 16,
+        max_retained_jobs: int = 100,
+        embed_batch_size: int = 256,
+        data_root: Optional[str] = None,
+    ):
+        self.data_root = os.path.realpath(data_root) if data_root else None
+        self.max_pending_jobs = max_pending_jobs
+        self.max_retained_jobs = max_retained_jobs
+        self.embed_batch_size = embed_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="indexing-worker")
+        self._jobs: "OrderedDict[str, IndexingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, item: IndexingItem) -> IndexingJob:
+        """작업을 등록하고 즉시 반환
+
+        Raises:
+            PathNotAllowedError: pdf_paths에 data_root 밖의 경로가 있는 경우
+            QueueFullError: 대기 중인 작업이 너무 많은 경우
+        """
+        if item.pdf_paths:
+            item = item.model_copy(update={"pdf_paths": [self.resolve_pdf_path(path) for path in item.pdf_paths]})
+        job = IndexingJob(item, item.collection_name or settings.collection_name)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+            if pending >= self.max_pending_jobs:
+                raise QueueFullError("인덱싱 작업 대기열이 가득 찼습니다.")
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+        self._executor.submit(self._run, job)
+        return job
+
+    def resolve_pdf_path(self, pdf_path: str) -> str:
+        """data_root 기준 실제 경로 (상대 경로는 data_root 기준, 심볼릭 링크와 ..을 풀어서 확인)
+
+        Raises:
+            PathNotAllowedError: data_root 밖의 경로이거나 data_root가 설정되지 않은 경우
+        """
+        if self.data_root is None:
+            raise PathNotAllowedError("PDF 경로 인덱싱이 허용되지 않습니다 (data_root 미설정).")
+        path = os.path.realpath(os.path.join(self.data_root, pdf_path))
+        if os.path.commonpath([self.data_root, path]) != self.data_root:
+            raise PathNotAllowedError(f"허용되지 않은 경로입니다: {pdf_path}")
+        return path
+
+    def get(self, job_id: str) -> Optional[IndexingJob]:
+        return self._jobs.get(job_id)
+
+    def _evict_finished(self) -> None:
+        """보관 개수를 넘으면 오래된 완료 작업부터 제거"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_retained_jobs:
+                break
+            if self._jobs[job_id].status in ("done", "failed"):
+                del self._jobs[job_id]
+
+    def _iter_sources(self, job: IndexingJob):
+        """(출처 이름, 청크 목록 생성 함수) 순회"""
+        item = job.item
+        for document in item.documents:
+            metadata = {"source": document.id, **document.metadata, "document_id": document.id}
+            yield document.id, lambda d=document, m=metadata: split_text_chunks(
+                d.text, m, item.max_chunk_size, item.num_chunk_overlap
+            )
+        for pdf_path in item.pdf_paths:
+            yield pdf_path, lambda p=pdf_path: self._load_pdf(p, item)
+
+    def _load_pdf(self, pdf_path: str, item: IndexingItem) -> Chunks:
+        # 등록 후 심볼릭 링크가 바뀌었을 수 있으므로 읽기 직전에 다시 확인
+        pdf_path = self.resolve_pdf_path(pdf_path)
+        if not os.path.isfile(pdf_path):
+            raise FileNotFoundError(f"PDF 파일을 찾을 수 없습니다: {pdf_path}")
+        return load_pdf_chunks(pdf_path, item.max_chunk_size, item.num_chunk_overlap)
+
+    def _run(self, job: IndexingJob) -> None:
+        job.start()
+        logger.info(f"🔄 인덱싱 작업 시작: {job.job_id} ({job.total_sources}개 문서 → {job.collection_name})")
+        try:
+            engine = get_collection_engine(job.collection_name)
+            collection = chroma_pool.get_collection(job.collection_name)
+            buffer: List[Tuple[str, Chunks]] = []
+            buffered_chunks = 0
+
+            def flush() -> None:
+                nonlocal buffer, buffered_chunks
+                if not buffer:
+                    return
+                chunks = [chunk for _, source_chunks in buffer for chunk in source_chunks]
+                try:
+                    embeddings = engine.encode([text for text, _ in chunks])
+                    written = upsert_chunks(collection, chunks, embeddings)
+                except Exception as e:
+                    logger.error(f"인덱싱 배치 저장 중 오류 발생: {str(e)}")
+                    for source, _ in buffer:
+                        job.add_error(f"{source}: {str(e)}")
+                    written = 0
+                job.advance(len(buffer), written)
+                buffer, buffered_chunks = [], 0
+
+            for source, load_chunks in self._iter_sources(job):
+                try:
+                    chunks = load_chunks()
+                except Exception as e:
+                    logger.error(f"문서 처리 중 오류 발생 ({source}): {str(e)}")
+                    job.add_error(f"{source}: {str(e)}")
+                    job.advance(1, 0)
+                    continue
+
+                buffer.append((source, chunks))
+                buffered_chunks += len(chunks)
+                if buffered_chunks >= self.embed_batch_size:
+                    flush()
+            flush()
+        except Exception as e:
+            logger.error(f"인덱싱 작업 {job.job_id} 실패: {str(e)}")
+            job.add_error(str(e))
+            job.finish("failed")
+        else:
+            failed = job.errors and job.indexed_chunks == 0
+            job.finish("failed" if failed else "done")
+            logger.info(
+                f"✅ 인덱싱 작업 완료: {job.job_id} ({job.indexed_chunks}개 청크, "
+                f"{job.chunks_per_second:.1f} chunks/s, 오류 {len(job.errors)}개)"
+            )
+        finally:
+            if job.indexed_chunks:
+                chroma_pool.invalidate(job.collection_name)
+
+    def shutdown(self) -> None:
+        """대기 중인 작업은 취소하고 실행 중인 작업이 끝날 때까지 대기하지 않음"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+indexing_jobs = IndexingJobManager(
+    max_workers=settings.indexing_jobs["max_workers"],
+    max_pending_jobs=settings.indexing_jobs["max_pending_jobs"],
+    max_retained_jobs=settings.indexing_jobs["max_retained_jobs"],
+    embed_batch_size=INGESTION_CONFIG["embed_batch_size"],
+    data_root=settings.indexing_jobs["data_root"],
+)
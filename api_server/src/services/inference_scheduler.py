@@ -0,0 +1,176 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+import torch
+
+from core.exceptions import QueueFullError, SchedulerStoppedError
+from utils.metrics import Histogram, LATENCY_BUCKETS, SIZE_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatchScheduler:
+    """동시 요청 간 마이크로 배칭을 수행하는 임베딩 추론 스케줄러
+
+    max_wait_ms 안에 들어온 쿼리들을 하나의 배치로 모아 전용 스레드에서
+    한 번의 forward로 처리하고, 각 호출자의 Future를 해결한다.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[Sequence[str]], np.ndarray],
+        name: str = "embedding",
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 512,
+        enqueue_timeout: float = 1.0,
+        torch_threads: Optional[int] = None,
+    ):
+        self.encode = encode
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.enqueue_timeout = enqueue_timeout
+        self.torch_threads = torch_threads
+        self._queue: "queue.Queue[Optional[Tuple[str, Future, float]]]" = queue.Queue(maxsize=max_queue_size)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.rejected = 0
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.batch_size = Histogram(SIZE_BUCKETS)
+
+    def start(self) -> None:
+        """추론 전용 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop_event.clear()
+            self._worker = threading.Thread(
+                target=self._run,
+                name=f"{self.name}-scheduler",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def stop(self) -> None:
+        """실행 중인 배치를 마치고 스레드 종료 (대기열에 남은 요청은 SchedulerStoppedError로 실패)"""
+        with self._lock:
+            if self._worker is None:
+                return
+            self._stop_event.set()
+            try:
+                # 빈 대기열에서 기다리는 스레드를 깨움 (가득 차 있으면 스레드가 다음 반복에서 종료 신호를 확인)
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._worker.join()
+            self._worker = None
+            self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        """대기열에 남은 요청을 모두 실패 처리"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(SchedulerStoppedError(f"{self.name} 추론 스케줄러가 종료되었습니다."))
+
+    def submit(self, text: str) -> Future:
+        """쿼리를 대기열에 넣고 임베딩 벡터를 돌려줄 Future 반환
+
+        Raises:
+            QueueFullError: enqueue_timeout 동안 대기열에 자리가 나지 않은 경우
+        """
+        self.start()
+        future: Future = Future()
+        try:
+            self._queue.put((text, future, time.monotonic()), timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFullError(f"{self.name} 추론 대기열이 가득 찼습니다.")
+        if self._stop_event.is_set():
+            # 넣는 사이에 stop()이 끝났으면 처리할 스레드가 없으므로 바로 실패 처리
+            self._fail_pending()
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        """동기 호출자를 위한 단건 임베딩"""
+        return self.submit(text).result()
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        """여러 쿼리를 제출하고 모두 완료될 때까지 대기 (다른 요청과 함께 배칭됨)"""
+        futures = [self.submit(text) for text in texts]
+        return np.stack([future.result() for future in futures])
+
+    async def aembed(self, text: str) -> np.ndarray:
+        """비동기 호출자를 위한 단건 임베딩 (이벤트 루프를 막지 않음)"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect_batch(self, first: Tuple[str, Future, float]) -> Tuple[List[Tuple[str, Future, float]], bool]:
+        """첫 요청 이후 max_wait 동안 도착한 요청을 max_batch_size까지 모음"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        if self.torch_threads:
+            # torch의 intra-op 스레드 수는 프로세스 전역 설정이다
+            torch.set_num_threads(self.torch_threads)
+
+        stopping = False
+        while not stopping and not self._stop_event.is_set():
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stopping = self._collect_batch(first)
+
+            # 이미 취소된 요청은 제외
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            for _, _, enqueued_at in batch:
+                self.queue_wait.observe(started - enqueued_at)
+            self.batch_size.observe(len(batch))
+
+            try:
+                embeddings = self.encode([text for text, _, _ in batch])
+            except Exception as e:
+                logger.error(f"{self.name} 배치 추론 중 오류 발생: {str(e)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for row, (_, future, _) in enumerate(batch):
+                future.set_result(embeddings[row])
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이, 거절 수, 대기 시간 / 배치 크기 히스토그램"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "rejected": self.rejected,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
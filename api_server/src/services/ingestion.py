@@ -0,0 +1,365 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+import numpy as np
+from langchain.document_loaders import PyPDFLoader
+from langchain.text_splitter import CharacterTextSplitter
+
+from core.config import settings
+from services.embedding import get_collection_engine
+from services.vectorstore import chroma_pool
+
+logger = logging.getLogger(__name__)
+
+CONFIG = settings.vector_db
+INGESTION_CONFIG = settings.ingestion
+
+# (청크 텍스트, 메타데이터) 목록
+Chunks = List[Tuple[str, Dict[str, Any]]]
+
+
+def clean_text(text: str) -> str:
+    """불필요한 공백 및 특수문자 제거"""
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def load_pdf_chunks(
+    pdf_path: str,
+    max_chunk_size: int = CONFIG["max_chunk_size"],
+    num_chunk_overlap: int = CONFIG["num_chunk_overlap"]
+) -> Chunks:
+    """PDF를 로드하여 페이지별로 정제 후 청크로 분할 (프로세스 풀에서 실행)"""
+    pdf_docs = PyPDFLoader(pdf_path).load()
+
+    chunks = []
+    for doc in pdf_docs:
+        chunks.extend(split_text_chunks(doc.page_content, doc.metadata, max_chunk_size, num_chunk_overlap))
+    return chunks
+
+
+def split_text_chunks(
+    text: str,
+    metadata: Dict[str, Any],
+    max_chunk_size: int = CONFIG["max_chunk_size"],
+    num_chunk_overlap: int = CONFIG["num_chunk_overlap"]
+) -> Chunks:
+    """텍스트를 정제 후 청크로 분할 (각 청크에 메타데이터 복사)"""
+    text_splitter = CharacterTextSplitter(chunk_size=max_chunk_size, chunk_overlap=num_chunk_overlap)
+    return [(chunk, dict(metadata)) for chunk in text_splitter.split_text(clean_text(text))]
+
+
+def make_chunk_ids(chunks: Chunks) -> List[str]:
+    """청크 내용 해시 기반 결정적 ID 생성
+
+    (출처, 페이지, 청크 텍스트)의 해시를 사용하므로 같은 PDF를 다시 인덱싱해도
+    같은 ID가 만들어져 upsert 시 중복이 생기지 않는다. 같은 페이지에 동일한
+    텍스트가 반복되면 등장 순번을 붙여 구분한다.
+    """
+    ids, seen = [], {}
+    for text, metadata in chunks:
+        key = "\x1f".join([str(metadata.get("source", "")), str(metadata.get("page", "")), text])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        ids.append(digest if occurrence == 0 else f"{digest}-{occurrence}")
+    return ids
+
+
+def upsert_chunks(collection: Any, chunks: Chunks, embeddings: np.ndarray) -> int:
+    """미리 계산한 임베딩과 함께 청크를 한 번에 upsert (임베딩 함수 재호출 없음)"""
+    if not chunks:
+        return 0
+    collection.upsert(
+        ids=make_chunk_ids(chunks),
+        embeddings=embeddings.tolist(),
+        documents=[text for text, _ in chunks],
+        metadatas=[metadata for _, metadata in chunks],
+    )
+    return len(chunks)
+
+
+def find_pdf_files(directory: str) -> List[str]:
+    """디렉토리 내 모든 PDF 파일 경로 (정렬됨)"""
+    return sorted(
+        os.path.join(root, file)
+        for root, _, files in os.walk(directory)
+        for file in files if file.endswith(".pdf")
+    )
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """파일 내용의 sha256 해시 (큰 파일도 고정 크기 블록 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_manifest_path(collection_name: str) -> str:
+    return os.path.join(CONFIG["chroma_db_dir"], f"ingestion_{collection_name}.json")
+
+
+class IngestionManifest:
+    """파일별 인덱싱 상태와 지문(크기, 수정 시각, 내용 해시)을 기록하는 디스크 매니페스트
+
+    중단된 실행을 다시 시작하면 완료(done) 상태이면서 크기/수정 시각이
+    같은 파일은 건너뛴다.
+    """
+
+    def __init__(self, path: str, collection_name: str):
+        self.path = path
+        self.collection_name = collection_name
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # (경로, 크기, 수정 시각) -> sha256. 같은 실행 안에서 파일을 두 번 해시하지 않도록 보관
+        self._hashes: Dict[Tuple[str, int, float], str] = {}
+
+    @classmethod
+    def load(cls, path: str, collection_name: str) -> "IngestionManifest":
+        manifest = cls(path, collection_name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("collection") == collection_name:
+                manifest.files = data.get("files", {})
+        return manifest
+
+    def save(self) -> None:
+        """임시 파일에 쓴 뒤 교체하여 중간에 죽어도 매니페스트가 깨지지 않게 저장"""
+        with self._lock:
+            data = {"collection": self.collection_name, "files": self.files}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def stat_file(pdf_path: str) -> Dict[str, Any]:
+        stat = os.stat(pdf_path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def content_hash(self, pdf_path: str, size: int, mtime: float) -> str:
+        """파일 내용의 sha256 (크기/수정 시각이 같으면 이전 계산 결과 재사용)"""
+        key = (pdf_path, size, mtime)
+        digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_sha256(pdf_path)
+            self._hashes[key] = digest
+        return digest
+
+    def fingerprint(self, pdf_path: str) -> Dict[str, Any]:
+        """파일 지문: 크기, 수정 시각, 내용 해시"""
+        stat = self.stat_file(pdf_path)
+        return {**stat, "sha256": self.content_hash(pdf_path, stat["size"], stat["mtime"])}
+
+    def is_done(self, pdf_path: str) -> bool:
+        entry = self.files.get(pdf_path)
+        if not entry or entry.get("status") != "done":
+            return False
+        current = self.stat_file(pdf_path)
+        return entry["size"] == current["size"] and entry["mtime"] == current["mtime"]
+
+    def mark_done(self, pdf_path: str, num_chunks: int) -> None:
+        fingerprint = self.fingerprint(pdf_path)
+        with self._lock:
+            self.files[pdf_path] = {
+                "status": "done",
+                "chunks": num_chunks,
+                "indexed_at": datetime.now().isoformat(),
+                **fingerprint,
+            }
+
+    def mark_failed(self, pdf_path: str, error: str) -> None:
+        with self._lock:
+            self.files[pdf_path] = {"status": "failed", "error": error}
+
+    def touch(self, pdf_path: str, fingerprint: Dict[str, Any]) -> None:
+        """내용은 같고 수정 시각만 바뀐 파일의 지문 갱신 (재인덱싱 없음)"""
+        with self._lock:
+            self.files[pdf_path].update(fingerprint)
+
+    def remove(self, pdf_path: str) -> None:
+        with self._lock:
+            self.files.pop(pdf_path, None)
+
+
+@dataclass
+class IngestionReport:
+    """디렉토리 인덱싱 결과 요약"""
+    total_files: int = 0
+    skipped_files: int = 0
+    indexed_files: int = 0
+    failed_files: List[str] = field(default_factory=list)
+    indexed_chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.indexed_chunks / self.elapsed if self.elapsed else 0.0
+
+
+class ChromaBulkWriter:
+    """단일 writer 스레드로 ChromaDB에 일괄 저장
+
+    임베딩 단계와 저장 단계를 겹쳐 실행하고, 저장이 끝난 파일만
+    매니페스트에 완료로 기록한다.
+    """
+
+    def __init__(self, collection_name: str, manifest: IngestionManifest, max_pending: int = 2):
+        self.collection = chroma_pool.get_collection(collection_name)
+        self.manifest = manifest
+        self.errors: List[Tuple[str, str]] = []
+        self.written_files = 0
+        self.written_chunks = 0
+        self._queue: "queue.Queue[Optional[Tuple[List[Tuple[str, Chunks]], np.ndarray]]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="chroma-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, files: List[Tuple[str, Chunks]], embeddings: np.ndarray) -> None:
+        self._queue.put((files, embeddings))
+
+    def close(self) -> None:
+        """남은 작업을 모두 저장한 뒤 종료"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            files, embeddings = item
+            chunks = [chunk for _, file_chunks in files for chunk in file_chunks]
+            try:
+                written = upsert_chunks(self.collection, chunks, embeddings)
+            except Exception as e:
+                logger.error(f"ChromaDB 저장 중 오류 발생: {str(e)}")
+                for pdf_path, _ in files:
+                    self.manifest.mark_failed(pdf_path, str(e))
+                    self.errors.append((pdf_path, str(e)))
+            else:
+                for pdf_path, chunks in files:
+                    self.manifest.mark_done(pdf_path, len(chunks))
+                self.written_files += len(files)
+                self.written_chunks += written
+            self.manifest.save()
+
+
+def ingest_files(
+    pdf_files: List[str],
+    collection_name: str,
+    manifest: IngestionManifest,
+    num_workers: Optional[int] = None,
+    embed_batch_size: int = INGESTION_CONFIG["embed_batch_size"],
+) -> IngestionReport:
+    """주어진 PDF 목록을 병렬 파싱 → 배치 임베딩 → 단일 writer 저장 순으로 인덱싱
+
+    매니페스트 저장과 컬렉션 무효화는 호출자가 담당한다.
+    """
+    started = time.monotonic()
+    report = IngestionReport(total_files=len(pdf_files))
+    if not pdf_files:
+        return report
+
+    engine = get_collection_engine(collection_name)
+    writer = ChromaBulkWriter(collection_name, manifest)
+    buffer: List[Tuple[str, Chunks]] = []
+    buffered_chunks = 0
+
+    def flush() -> None:
+        nonlocal buffer, buffered_chunks
+        if not buffer:
+            return
+        texts = [text for _, chunks in buffer for text, _ in chunks]
+        writer.submit(buffer, engine.encode(texts))
+        buffer, buffered_chunks = [], 0
+
+    workers = num_workers or INGESTION_CONFIG["num_workers"] or os.cpu_count()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(load_pdf_chunks, pdf_path, CONFIG["max_chunk_size"], CONFIG["num_chunk_overlap"]): pdf_path
+                for pdf_path in pdf_files
+            }
+            for future in as_completed(futures):
+                pdf_path = futures[future]
+                try:
+                    chunks = future.result()
+                except Exception as e:
+                    logger.error(f"PDF 파싱 중 오류 발생 ({pdf_path}): {str(e)}")
+                    manifest.mark_failed(pdf_path, str(e))
+                    report.failed_files.append(pdf_path)
+                    continue
+
+                if not chunks:
+                    logger.warning(f"저장할 텍스트가 없습니다: {pdf_path}")
+                    manifest.mark_done(pdf_path, 0)
+                    continue
+
+                buffer.append((pdf_path, chunks))
+                buffered_chunks += len(chunks)
+                if buffered_chunks >= embed_batch_size:
+                    flush()
+            flush()
+    finally:
+        writer.close()
+
+    report.failed_files.extend(pdf_path for pdf_path, _ in writer.errors)
+    report.indexed_files = writer.written_files
+    report.indexed_chunks = writer.written_chunks
+    report.elapsed = time.monotonic() - started
+    return report
+
+
+def ingest_directory(
+    directory: str,
+    collection_name: str,
+    manifest_path: Optional[str] = None,
+    num_workers: Optional[int] = None,
+    embed_batch_size: int = INGESTION_CONFIG["embed_batch_size"],
+) -> IngestionReport:
+    """디렉토리 내 PDF를 인덱싱 (매니페스트 기준으로 완료된 파일은 건너뛰고 이어서 처리)
+
+    Args:
+        directory: PDF 디렉토리
+        collection_name: 저장할 컬렉션
+        manifest_path: 진행 상황 매니페스트 경로 (기본: CHROMA_DB_DIR/ingestion_<collection>.json)
+        num_workers: PDF 파싱 프로세스 수 (기본: 설정값 또는 CPU 수)
+        embed_batch_size: 한 번에 임베딩할 최소 청크 수 (여러 파일을 모아서 처리)
+    """
+    started = time.monotonic()
+    pdf_files = find_pdf_files(directory)
+
+    manifest = IngestionManifest.load(manifest_path or default_manifest_path(collection_name), collection_name)
+    pending = [pdf_path for pdf_path in pdf_files if not manifest.is_done(pdf_path)]
+    skipped = len(pdf_files) - len(pending)
+    logger.info(f"총 {len(pdf_files)}개 PDF 중 {len(pending)}개 인덱싱 (완료된 {skipped}개 건너뜀)")
+
+    if not pending:
+        report = IngestionReport(total_files=len(pdf_files), skipped_files=skipped)
+        report.elapsed = time.monotonic() - started
+        return report
+
+    try:
+        report = ingest_files(pending, collection_name, manifest, num_workers, embed_batch_size)
+    finally:
+        manifest.save()
+        chroma_pool.invalidate(collection_name)
+
+    report.total_files = len(pdf_files)
+    report.skipped_files = skipped
+    report.elapsed = time.monotonic() - started
+    return report
@@ -1,19 +1,90 @@
 from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List
 from fastapi import Depends
+from langchain.prompts import PromptTemplate
+import redis.asyncio as aioredis
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import Runnable
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import chat_models as genai_chat_models
+import tenacity
 from core.config import settings
+from utils.prompts import SUMMARY_TEMPLATE
+from .llm_gateway import GatewayChatModel, LLMGateway
 from .redis_memory import RedisMemory
+from .redis_pool import get_redis, redis_pool
+
+FAKE_ANSWER = "테스트 응답입니다. @테스트 추천 질문입니다."
 
 @lru_cache()
-def get_llm() -> ChatGoogleGenerativeAI:
-    return ChatGoogleGenerativeAI(
+def get_llm_gateway() -> LLMGateway:
+    """워커 전역 LLM 게이트웨이 (모든 LLM 호출이 같은 한도를 공유)"""
+    config = dict(settings.llm_gateway)
+    if config.pop("backend") == "fake":
+        backend = FakeListChatModel(responses=[FAKE_ANSWER])
+    else:
+        backend = build_gemini_backend()
+    return LLMGateway(backend, **config)
+
+def _single_attempt(*args: Any, **kwargs: Any) -> Callable[[Any], Any]:
+    """langchain_google_genai의 재시도 데코레이터 대체 (한 번만 시도하고 오류는 그대로 전달)"""
+    return tenacity.retry(reraise=True, stop=tenacity.stop_after_attempt(1))
+
+def build_gemini_backend() -> Runnable:
+    """재시도를 하지 않는 Gemini 모델 (재시도와 요청 / 토큰 한도는 게이트웨이만 담당)
+
+    백엔드가 따로 재시도하면 동시 실행 슬롯을 쥔 채 토큰 버킷을 거치지 않고 다시 호출하므로
+    실제 호출 수와 지연이 게이트웨이 설정의 몇 배가 된다.
+    - langchain_google_genai 2.0.x는 max_retries와 무관하게 tenacity로 재시도(2회, 1~60초 대기)하므로
+      재시도 데코레이터를 교체한다 (max_retries=0은 이 값을 따르는 이후 버전용).
+    - gapic 클라이언트의 ServiceUnavailable 기본 재시도는 호출마다 retry=None을 넘겨 끈다.
+    """
+    genai_chat_models._create_retry_decorator = _single_attempt
+    backend = ChatGoogleGenerativeAI(
         **settings.llm_settings,
-        google_api_key=settings.GOOGLE_API_KEY
+        google_api_key=settings.GOOGLE_API_KEY,
+        max_retries=0
+    )
+    return backend.bind(retry=None)
+
+@lru_cache()
+def get_llm() -> GatewayChatModel:
+    """대화형 요청용 LLM (게이트웨이 우선순위 interactive)"""
+    return get_llm_gateway().bind("interactive")
+
+@lru_cache()
+def get_background_llm() -> GatewayChatModel:
+    """후속 질문 추천, 대화 요약 등 백그라운드 작업용 LLM (interactive 요청보다 나중에 실행)"""
+    return get_llm_gateway().bind("background")
+
+async def astream_answer(llm, prompt, inputs: Dict[str, Any]) -> AsyncIterator[str]:
+    """LLM 응답을 새로 생성된 텍스트 조각(delta) 단위로 스트리밍"""
+    chain = prompt | llm
+    async for chunk in chain.astream(inputs):
+        delta = chunk.content if hasattr(chunk, 'content') else str(chunk)
+        if delta:
+            yield delta
+
+async def summarize_history(summary: str, messages: List[Dict[str, Any]]) -> str:
+    """이전 요약에 이어진 대화를 합쳐 새 요약 생성"""
+    prompt = PromptTemplate(
+        input_variables=["summary", "conversation"],
+        template=SUMMARY_TEMPLATE,
     )
+    conversation = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+    result = await (prompt | get_background_llm()).ainvoke({"summary": summary or "없음", "conversation": conversation})
+    return result.content if hasattr(result, 'content') else str(result)
 
-def get_memory(conv_id: str) -> RedisMemory:
-    """Redis 기반 Memory 인스턴스 제공"""
+def get_memory(conv_id: str, redis_client: aioredis.Redis = Depends(get_redis)) -> RedisMemory:
+    """Redis 기반 Memory 인스턴스 제공 (워커 전역 커넥션 풀 공유)"""
     return RedisMemory(
         conversation_id=conv_id,
-        redis_url=settings.REDIS_URL
+        redis_client=redis_client,
+        sync_redis_client=redis_pool.sync_client,
+        window_turns=settings.memory["window_turns"],
+        summarizer=summarize_history if settings.memory["summary_enabled"] else None,
+        summary_min_messages=settings.memory["summary_min_messages"],
+        summary_lock_ttl=settings.memory["summary_lock_ttl"],
+        gap_max_messages=settings.memory["gap_max_messages"],
+        gap_max_tokens=settings.memory["gap_max_tokens"],
     )
\ No newline at end of file
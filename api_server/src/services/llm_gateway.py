@@ -0,0 +1,296 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+import httpx
+from google.api_core import exceptions as google_exceptions
+from langchain_core.messages import BaseMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from core.exceptions import QueueFullError
+from utils.context_packer import estimate_tokens
+from utils.metrics import Histogram, LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# 우선순위 클래스 (값이 작을수록 먼저 처리)
+PRIORITIES = {
+    "interactive": 0,  # 채팅 / RAG 답변
+    "background": 1,   # 후속 질문 추천, 대화 요약
+}
+
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적 서버 오류, 시간 초과)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# 연결 / 시간 초과 등 전송 계층 오류 (상태 코드 없이 실패)
+_TRANSPORT_ERRORS = (httpx.TransportError, ConnectionError, TimeoutError, asyncio.TimeoutError)
+# 분당 한도가 아닌 일일 / 결제 한도 초과는 기다려도 풀리지 않으므로 재시도하지 않음
+_PERMANENT_QUOTA_MARKERS = ("perday", "per day", "billing")
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """API 오류의 HTTP 상태 코드 (Google API 예외, httpx 응답 오류)"""
+    if isinstance(error, google_exceptions.GoogleAPICallError):
+        return int(error.code) if error.code is not None else None
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """재시도하면 성공할 수 있는 LLM API 오류인지 (예외 타입 / 상태 코드 기준)
+
+    래핑된 오류는 원인(__cause__)까지 확인한다.
+    """
+    while error is not None:
+        status = _status_code(error)
+        if status is not None:
+            if status == 429:
+                message = str(error).lower().replace(" ", "")
+                return not any(marker.replace(" ", "") in message for marker in _PERMANENT_QUOTA_MARKERS)
+            return status in RETRYABLE_STATUS
+        if isinstance(error, _TRANSPORT_ERRORS):
+            return True
+        error = error.__cause__
+    return False
+
+
+def _input_text(value: Any) -> str:
+    """프롬프트 입력(PromptValue, 메시지 목록, 문자열)의 본문"""
+    if isinstance(value, PromptValue):
+        return value.to_string()
+    if isinstance(value, BaseMessage):
+        return str(value.content)
+    if isinstance(value, (list, tuple)):
+        return "\n".join(_input_text(item) for item in value)
+    return str(value)
+
+
+class TokenBucket:
+    """분당 한도를 초 단위로 채우는 토큰 버킷"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """amount만큼 사용 가능해질 때까지 남은 시간(초) (한도보다 큰 요청은 가득 찼을 때 통과)"""
+        self._refill()
+        needed = min(amount, self.capacity) - self.tokens
+        return max(needed, 0.0) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMGateway:
+    """LLM API 호출 게이트웨이
+
+    분당 요청 수 / 토큰 수 토큰 버킷과 동시 실행 수 제한 안에서 대기 중인 호출을 우선순위
+    (interactive > background), 도착 순서대로 실행한다. 요청 한도 초과 등 일시적 오류는
+    지수 백오프 + 지터로 재시도하며, 재시도할 때도 다시 한도를 거친다.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 250000,
+        max_concurrency: int = 8,
+        max_queue_size: int = 256,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        reserve_output_tokens: int = 1024,
+    ):
+        self.llm = llm
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.reserve_output_tokens = reserve_output_tokens
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 비동기 호출이 실행되는 이벤트 루프 (다른 스레드의 동기 호출을 이 루프로 넘김)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.in_flight = 0
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.completed = {name: 0 for name in PRIORITIES}
+        self.retried = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _dispatch(self) -> None:
+        """실행 가능한 대기자를 우선순위 순으로 깨움 (한도에 걸리면 풀리는 시점에 다시 시도)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters and self.in_flight < self.max_concurrency:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():  # 대기 중 취소됨
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(self.requests.delay(1), self.tokens.delay(tokens))
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: str, tokens: float) -> None:
+        if len(self._waiters) >= self.max_queue_size:
+            self.rejected += 1
+            raise QueueFullError("LLM 호출 대기열이 가득 찼습니다.")
+        self._loop = asyncio.get_running_loop()
+        future = self._loop.create_future()
+        heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), tokens, future))
+        enqueued = time.perf_counter()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # 실행 허가를 받은 직후 취소된 경우
+            raise
+        self.queue_wait.observe(time.perf_counter() - enqueued)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _estimate(self, value: Any) -> float:
+        return estimate_tokens(_input_text(value)) + self.reserve_output_tokens
+
+    def _retry_delay(self, attempt: int) -> float:
+        """full jitter 백오프: [0, min(max_backoff, backoff * 2^attempt)]"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if attempt >= self.max_retries or not is_retryable(error):
+            self.failures += 1
+            return False
+        self.retried += 1
+        delay = self._retry_delay(attempt)
+        logger.warning(f"LLM 호출 실패, {delay:.2f}초 후 재시도 ({attempt + 1}/{self.max_retries}): {str(error)}")
+        await asyncio.sleep(delay)
+        return True
+
+    async def ainvoke(self, value: Any, priority: str = "interactive", **kwargs: Any) -> Any:
+        tokens = self._estimate(value)
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens)
+            error = None
+            try:
+                result = await self.llm.ainvoke(value, **kwargs)
+            except Exception as e:
+                error = e
+            finally:
+                self._release()
+
+            if error is None:
+                self.completed[priority] += 1
+                return result
+            if not await self._should_retry(error, attempt):
+                raise error
+            attempt += 1
+
+    def invoke(self, value: Any, priority: str = "interactive", **kwargs: Any) -> Any:
+        """동기 호출 (스레드 풀 작업, 스크립트용)
+
+        게이트웨이의 이벤트 루프가 다른 스레드에서 실행 중이면 그 루프에서 같은 한도와 대기열을
+        거쳐 실행하고 결과를 기다린다. 실행 중인 루프가 없으면 새 루프에서 실행한다.
+
+        Raises:
+            RuntimeError: 이벤트 루프 스레드에서 호출한 경우 (루프를 막으므로 ainvoke 사용)
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("이벤트 루프 안에서는 동기 호출을 할 수 없습니다. ainvoke를 사용하세요.")
+
+        coroutine = self.ainvoke(value, priority, **kwargs)
+        if self._loop is not None and self._loop.is_running():
+            return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+        return asyncio.run(coroutine)
+
+    async def astream(self, value: Any, priority: str = "interactive", **kwargs: Any) -> AsyncIterator[Any]:
+        """스트리밍 호출 (첫 청크를 받기 전에 실패한 경우에만 재시도)"""
+        tokens = self._estimate(value)
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens)
+            started = False
+            error = None
+            try:
+                async for chunk in self.llm.astream(value, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                error = e
+            finally:
+                self._release()
+
+            if error is None:
+                self.completed[priority] += 1
+                return
+            if started or not await self._should_retry(error, attempt):
+                raise error
+            attempt += 1
+
+    def bind(self, priority: str = "interactive") -> "GatewayChatModel":
+        """프롬프트와 체인으로 연결할 수 있는 우선순위 지정 LLM"""
+        return GatewayChatModel(self, priority)
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이, 실행 중 호출 수, 대기 시간, 재시도 / 실패 수"""
+        return {
+            "queue_depth": sum(1 for *_, future in self._waiters if not future.done()),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "completed": dict(self.completed),
+            "retried": self.retried,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
+
+
+class GatewayChatModel(Runnable):
+    """LLMGateway를 거쳐 호출하는 Runnable (prompt | llm 체인에서 기존 LLM 대신 사용)"""
+
+    def __init__(self, gateway: LLMGateway, priority: str = "interactive"):
+        self.gateway = gateway
+        self.priority = priority
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        """동기 호출 (LLMGateway.invoke 참고, 이벤트 루프 스레드에서는 ainvoke 사용)"""
+        return self.gateway.invoke(input, self.priority, config=config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.gateway.ainvoke(input, self.priority, config=config, **kwargs)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        async for chunk in self.gateway.astream(input, self.priority, config=config, **kwargs):
+            yield chunk
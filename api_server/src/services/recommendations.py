@@ -0,0 +1,167 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+
+import redis.asyncio as aioredis
+from langchain.prompts import PromptTemplate
+
+from core.config import settings
+from services.embedding_cache import normalize_query
+from services.llm import get_background_llm
+from services.redis_pool import redis_pool
+from utils.prompts import RECOMMEND_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+RECOMMEND_CONFIG = settings.recommendations
+
+
+def parse_questions(text: str) -> List[str]:
+    """"@질문1 @질문2 ..." 형식의 LLM 출력을 질문 목록으로 분리"""
+    return [question.strip() for question in text.split("@")[1:] if question.strip()]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(normalize_query(text).encode()).hexdigest()
+
+
+def _turn_digests(query: str, answer: str = "") -> Dict[str, Optional[str]]:
+    """추천 질문을 만든 턴의 질문 / 답변 요약값"""
+    return {"query": _digest(query), "answer": _digest(answer) if answer else None}
+
+
+def _matches(digests: Dict[str, Any], message: Optional[str]) -> bool:
+    """message가 없거나 추천 질문을 만든 턴의 질문 또는 답변과 같은지"""
+    return not message or _digest(message) in (digests["query"], digests["answer"])
+
+
+class RecommendationService:
+    """후속 질문 추천 선생성 (speculative prefetch)
+
+    답변 생성이 끝나면 백그라운드에서 추천 질문을 만들어 Redis(recommend:{conversation_id})에
+    저장해 두고, /recommend는 캐시를 먼저 조회한다. 캐시에 없을 때만 즉시 생성한다.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, ttl: int = 3600, enabled: bool = True):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.enabled = enabled
+        # 대화별 진행 중인 선생성 작업과 그 턴의 질문 / 답변 요약값
+        # (같은 턴의 /recommend 요청이 결과를 기다릴 수 있도록)
+        self._pending: Dict[str, Tuple[asyncio.Task, Dict[str, Optional[str]]]] = {}
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.errors = 0
+
+    def _get_key(self, conversation_id: str) -> str:
+        return f"recommend:{conversation_id}"
+
+    async def generate(self, query: str) -> str:
+        """LLM으로 추천 질문 생성 ("@질문" 형식의 원문)"""
+        prompt = PromptTemplate(input_variables=["query"], template=RECOMMEND_TEMPLATE)
+        result = await (prompt | get_background_llm()).ainvoke({"query": query})
+        return result.content if hasattr(result, 'content') else str(result)
+
+    async def prefetch(self, conversation_id: str, query: str, answer: str = "") -> str:
+        """추천 질문을 생성해 대화별 캐시에 저장"""
+        text = await self.generate(query)
+        entry = {
+            **_turn_digests(query, answer),
+            "text": text,
+            "created_at": datetime.now().isoformat(),
+        }
+        await self.redis.set(self._get_key(conversation_id), json.dumps(entry, ensure_ascii=False), ex=self.ttl)
+        self.prefetched += 1
+        return text
+
+    def schedule_prefetch(self, conversation_id: str, query: str, answer: str = "") -> None:
+        """답변이 끝난 직후 추천 질문 선생성을 백그라운드 작업으로 시작"""
+        if not self.enabled:
+            return
+
+        async def run() -> Optional[str]:
+            try:
+                return await self.prefetch(conversation_id, query, answer)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"추천 질문 선생성 중 오류 발생 ({conversation_id}): {str(e)}")
+                return None
+
+        task = asyncio.create_task(run())
+        self._pending[conversation_id] = (task, _turn_digests(query, answer))
+        self._background_tasks.add(task)
+
+        def done(finished: asyncio.Task) -> None:
+            self._background_tasks.discard(finished)
+            pending = self._pending.get(conversation_id)
+            if pending is not None and pending[0] is finished:
+                del self._pending[conversation_id]
+
+        task.add_done_callback(done)
+
+    async def wait(self, conversation_id: str, timeout: float) -> List[str]:
+        """진행 중인 선생성 작업을 timeout초까지 기다린 추천 질문 (스트림 마지막 프레임용)"""
+        pending = self._pending.get(conversation_id)
+        if pending is not None:
+            task, _ = pending
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done or task.result() is None:
+                return []
+            return parse_questions(task.result())
+        text = await self.lookup(conversation_id)
+        return parse_questions(text) if text else []
+
+    async def lookup(self, conversation_id: str, message: Optional[str] = None) -> Optional[str]:
+        """캐시된 추천 질문 조회
+
+        message가 주어지면 캐시(또는 진행 중인 선생성 작업)를 만든 턴의 질문 또는 답변과
+        같을 때만 사용한다. 같은 턴의 선생성 작업이 진행 중이면 새로 생성하지 않고 그 결과를 기다린다.
+        """
+        pending = self._pending.get(conversation_id)
+        if pending is not None:
+            task, digests = pending
+            if not _matches(digests, message):
+                return None
+            text = await asyncio.shield(task)
+            if text is not None:
+                return text
+
+        value = await self.redis.get(self._get_key(conversation_id))
+        if not value:
+            return None
+        entry = json.loads(value)
+        if not _matches(entry, message):
+            return None
+        return entry["text"]
+
+    async def get_or_generate(self, conversation_id: str, message: str) -> str:
+        """캐시 hit이면 저장된 추천 질문, miss면 즉시 생성"""
+        text = await self.lookup(conversation_id, message)
+        if text is not None:
+            self.hits += 1
+            return text
+        self.misses += 1
+        return await self.generate(message)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "prefetched": self.prefetched,
+            "errors": self.errors,
+            "pending": len(self._pending),
+        }
+
+
+recommendations = RecommendationService(
+    redis_pool.client,
+    ttl=RECOMMEND_CONFIG["ttl"],
+    enabled=RECOMMEND_CONFIG["prefetch"],
+)
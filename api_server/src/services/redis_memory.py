@@ -3,9 +3,58 @@ from langchain_core.memory import BaseMemory
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from pydantic import BaseModel
 import redis
+import redis.asyncio as aioredis
+import asyncio
 import json
+import logging
+import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Sequence, Set
+
+from utils.context_packer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# (이전 요약, 요약할 메시지 목록) -> 갱신된 요약
+Summarizer = Callable[[str, List[Dict[str, Any]]], Awaitable[str]]
+
+# 실행 중인 백그라운드 요약 작업 (GC로 취소되지 않도록 참조 유지)
+_background_tasks: Set[asyncio.Task] = set()
+
+# 자신이 잡은 잠금일 때만 삭제 (잠금이 만료된 뒤 다른 워커가 잡은 잠금을 지우지 않도록)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _to_message(msg: Dict[str, Any]) -> Any:
+    """저장된 메시지 dict를 langchain 메시지로 변환"""
+    if msg["role"] == "user":
+        return HumanMessage(content=msg["content"])
+    if msg["role"] == "assistant":
+        return AIMessage(content=msg["content"])
+    return SystemMessage(content=msg["content"])
+
+
+def _decode(raw: Any) -> Dict[str, Any]:
+    return json.loads(raw.decode()) if isinstance(raw, bytes) else json.loads(raw)
+
+
+@dataclass
+class ChatTurn:
+    """begin_turn 결과: 대화 소유자와 대화 이력 (요약 + 메시지)"""
+    user_id: str
+    owner_id: Optional[str]
+    summary: Optional[str] = None
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def is_owner(self) -> bool:
+        return self.owner_id == self.user_id
 
 class RedisChatMessageHistory(BaseChatMessageHistory):
     def __init__(self, redis_client: redis.Redis, conversation_id: str):
@@ -47,16 +96,46 @@ class RedisChatMessageHistory(BaseChatMessageHistory):
         return result
 
 class RedisMemory(BaseMemory, BaseModel):
-    """Redis 기반 메모리 구현"""
+    """Redis 기반 메모리 구현 (redis.asyncio 사용, 모든 I/O는 비동기)
+
+    프롬프트에는 최근 window_turns턴만 원문으로 넣고, 그 이전 대화는 메타데이터 hash에
+    저장된 누적 요약(summary, summary_upto)으로 대신한다. 요약이 아직 따라오지 못한
+    메시지(summary_upto ~ 윈도우 시작)는 gap_max_tokens 안에서 원문으로 함께 넣는다.
+    """
     conversation_id: str
-    redis_url: str
-    _redis_client: Optional[redis.Redis] = None
-    def __init__(self, conversation_id: str, redis_url: str):
-        super().__init__(conversation_id=conversation_id, redis_url=redis_url)
-        print(f"RedisMemory initialized with conversation_id: {conversation_id}")
+    redis_url: Optional[str] = None
+    window_turns: int = 5
+    summarizer: Optional[Any] = None
+    summary_min_messages: int = 4
+    summary_lock_ttl: int = 60
+    gap_max_messages: int = 20
+    gap_max_tokens: int = 2000
+    _redis_client: Optional[aioredis.Redis] = None
+    _turn: Optional[ChatTurn] = None
+    def __init__(
+        self,
+        conversation_id: str,
+        redis_url: Optional[str] = None,
+        redis_client: Optional[aioredis.Redis] = None,
+        sync_redis_client: Optional[redis.Redis] = None,
+        **kwargs: Any
+    ):
+        super().__init__(conversation_id=conversation_id, redis_url=redis_url, **kwargs)
         self.conversation_id = conversation_id
         self.redis_url = redis_url
-        self._redis = redis.from_url(redis_url)
+        # 공유 풀 클라이언트를 주입받고, 없을 때만 전용 클라이언트 생성
+        self._redis = redis_client if redis_client is not None else aioredis.from_url(redis_url)
+        # 동기 메서드(load_memory_variables, save_context)용 클라이언트 (처음 사용할 때 생성)
+        self._sync_redis = sync_redis_client
+
+    @property
+    def sync_redis(self) -> redis.Redis:
+        """동기 Redis 클라이언트 (주입받지 않았으면 redis_url로 생성)"""
+        if self._sync_redis is None:
+            if self.redis_url is None:
+                raise RuntimeError("동기 메서드를 사용하려면 sync_redis_client 또는 redis_url이 필요합니다.")
+            self._sync_redis = redis.Redis.from_url(self.redis_url)
+        return self._sync_redis
 
     @property
     def memory_key(self) -> str:
@@ -76,48 +155,154 @@ class RedisMemory(BaseMemory, BaseModel):
         return f"chat:{self.conversation_id}:metadata"
 
     def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """메모리에서 대화 이력 로드"""
-        messages = []
-        for msg in self.get_messages():
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "assistant":
-                messages.append(AIMessage(content=msg["content"]))
-            elif msg["role"] == "system":
-                messages.append(SystemMessage(content=msg["content"]))
-        return {self.memory_key: messages}
+        """동기 체인용 대화 이력 로드 (이벤트 루프를 막으므로 비동기 코드에서는 aload_memory_variables 사용)"""
+        with self.sync_redis.pipeline(transaction=True) as pipe:
+            self._queue_history(pipe)
+            turn = self._history_turn(pipe.execute())
+        return self._memory_variables(turn)
+
+    def _queue_history(self, pipe: Any, full_history: bool = False) -> None:
+        """요약과 최근 메시지 조회 명령을 파이프라인에 추가 (결과는 _history_turn으로 해석)"""
+        if full_history:
+            start = 0
+        elif self.summarizer is not None:
+            start = -(self.window_turns * 2 + self.gap_max_messages)
+        else:
+            start = -self.window_turns * 2
+        pipe.hmget(self._get_metadata_key(), "summary", "summary_upto")
+        pipe.llen(self._get_chat_key())
+        pipe.lrange(self._get_chat_key(), start, -1)
+
+    def _history_turn(self, results: Sequence[Any], full_history: bool = False, **kwargs: Any) -> ChatTurn:
+        (summary, summary_upto), length, raw_messages = results
+        messages = [_decode(raw) for raw in raw_messages]
+        if not full_history:
+            messages = self._select_history(messages, length, int(summary_upto) if summary_upto else 0)
+        kwargs.setdefault("user_id", "")
+        kwargs.setdefault("owner_id", None)
+        return ChatTurn(summary=json.loads(summary) if summary else None, messages=messages, **kwargs)
+
+    def _select_history(self, messages: List[Dict[str, Any]], length: int, summary_upto: int) -> List[Dict[str, Any]]:
+        """요약에 포함되지 않은 메시지 선택
+
+        최근 window_turns턴은 그대로 두고, 그보다 오래됐지만 아직 요약되지 않은 메시지는
+        gap_max_tokens 안에서 최근 것부터 포함한다.
+
+        Args:
+            messages: 목록 끝에서부터 조회한 메시지
+            length: 전체 메시지 수
+            summary_upto: 요약에 포함된 메시지 수
+        """
+        first = length - len(messages)  # 조회한 첫 메시지의 전체 목록 내 위치
+        messages = messages[max(summary_upto - first, 0):]
+        window = self.window_turns * 2
+        if len(messages) <= window:
+            return messages
+
+        gap, kept, used = messages[:-window], [], 0
+        for message in reversed(gap):
+            used += estimate_tokens(message["content"])
+            if used > self.gap_max_tokens:
+                break
+            kept.append(message)
+        return kept[::-1] + messages[-window:]
+
+    async def begin_turn(self, user_id: str, full_history: bool = False) -> ChatTurn:
+        """대화 소유권 확인/설정과 대화 이력 조회를 한 번의 파이프라인으로 처리
+
+        소유자가 없으면 HSETNX로 user_id를 소유자로 등록한다. 조회한 이력은 이번 턴의
+        aload_memory_variables에서 재사용된다.
+
+        Args:
+            user_id: 요청한 사용자 ID
+            full_history: True면 최근 window_turns턴이 아닌 전체 메시지 조회
+        """
+        # 메시지 수와 목록이 같은 시점의 값이어야 요약 경계를 맞출 수 있으므로 MULTI로 조회
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self._get_metadata_key(), "user_id", user_id)
+            pipe.hget(self._get_metadata_key(), "user_id")
+            self._queue_history(pipe, full_history)
+            _, owner_id, *history = await pipe.execute()
+
+        turn = self._history_turn(
+            history,
+            full_history,
+            user_id=user_id,
+            owner_id=owner_id.decode() if isinstance(owner_id, bytes) else owner_id,
+        )
+        if not full_history:
+            self._turn = turn
+        return turn
+
+    async def commit_turn(self, user_content: str, assistant_content: str, **kwargs) -> None:
+        """사용자 질문과 답변을 MULTI/EXEC로 한 번에 저장 (한 턴이 반쪽만 저장되지 않음)"""
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(
+                self._get_chat_key(),
+                self._make_record("user", user_content),
+                self._make_record("assistant", assistant_content, **kwargs),
+            )
+            await pipe.execute()
+        self._turn = None
 
     async def aload_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """비동기 메모리 로드"""
-        return self.load_memory_variables(inputs)
+        """요약 + 아직 요약되지 않은 대화 이력 로드 (begin_turn에서 조회했으면 재사용)"""
+        turn = self._turn
+        if turn is None:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                self._queue_history(pipe)
+                turn = self._history_turn(await pipe.execute())
+        return self._memory_variables(turn)
+
+    def _memory_variables(self, turn: ChatTurn) -> Dict[str, Any]:
+        messages = []
+        if turn.summary:
+            messages.append(SystemMessage(content=f"이전 대화 요약: {turn.summary}"))
+        messages.extend(_to_message(msg) for msg in turn.messages)
+        return {self.memory_key: messages}
 
     def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
-        """대화 컨텍스트 저장"""
+        """동기 체인용 대화 컨텍스트 저장 (질문과 답변은 MULTI/EXEC로 한 번에 저장)"""
+        records = []
         if "input" in inputs:
-            self.add_message("user", inputs["input"])
+            records.append(self._make_record("user", inputs["input"]))
         if "output" in outputs:
-            self.add_message("assistant", outputs["output"])
+            records.append(self._make_record("assistant", outputs["output"]))
+        if not records:
+            return
+        with self.sync_redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._get_chat_key(), *records)
+            pipe.execute()
+        self._turn = None
 
     async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
-        """비동기 컨텍스트 저장"""
-        self.save_context(inputs, outputs)
+        """대화 컨텍스트 저장 (질문과 답변이 모두 있으면 한 턴으로 원자적으로 저장)"""
+        if "input" in inputs and "output" in outputs:
+            await self.commit_turn(inputs["input"], outputs["output"])
+        elif "input" in inputs:
+            await self.add_message("user", inputs["input"])
+        elif "output" in outputs:
+            await self.add_message("assistant", outputs["output"])
 
-    def add_message(self, role: str, content: str, **kwargs) -> None:
+    @staticmethod
+    def _make_record(role: str, content: str, **kwargs) -> str:
+        return json.dumps({
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": kwargs
+        })
+
+    async def add_message(self, role: str, content: str, **kwargs) -> None:
         """새로운 메시지 추가
         
         Args:
             role: 메시지 작성자 역할 ("user" 또는 "assistant")
             content: 메시지 내용
         """
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": kwargs
-        }
-        self._redis.rpush(self._get_chat_key(), json.dumps(message))
+        await self._redis.rpush(self._get_chat_key(), self._make_record(role, content, **kwargs))
 
-    def get_messages(self, last_k: Optional[int] = None) -> List[Dict]:
+    async def get_messages(self, last_k: Optional[int] = None) -> List[Dict]:
         """메시지 이력 조회
         
         Args:
@@ -128,29 +313,87 @@ class RedisMemory(BaseMemory, BaseModel):
         """
         chat_key = self._get_chat_key()
         if last_k is None:
-            messages = self._redis.lrange(chat_key, 0, -1)
+            messages = await self._redis.lrange(chat_key, 0, -1)
         else:
-            messages = self._redis.lrange(chat_key, -last_k, -1)
-        return [json.loads(msg.decode()) if isinstance(msg, bytes) else json.loads(msg) for msg in messages]
+            messages = await self._redis.lrange(chat_key, -last_k, -1)
+        return [_decode(msg) for msg in messages]
 
-    def clear(self) -> None:
+    async def clear(self) -> None:
         """대화 이력 삭제"""
-        self._redis.delete(self._get_chat_key())
-        self._redis.delete(self._get_metadata_key())
+        await self._redis.delete(self._get_chat_key(), self._get_metadata_key())
 
-    # 메타데이터 관련 메서드들은 그대로 유지
-    def set_user_id(self, user_id: str) -> None:
+    # 메타데이터 관련 메서드들
+    async def set_user_id(self, user_id: str) -> None:
         """대화 소유자 ID 설정"""
-        self._redis.hset(self._get_metadata_key(), "user_id", user_id)
+        await self._redis.hset(self._get_metadata_key(), "user_id", user_id)
 
-    def get_user_id(self) -> Optional[str]:
+    async def get_user_id(self) -> Optional[str]:
         """대화 소유자 ID 조회"""
-        value = self._redis.hget(self._get_metadata_key(), "user_id")
+        value = await self._redis.hget(self._get_metadata_key(), "user_id")
         return value.decode() if value else None
 
-    def set_metadata(self, key: str, value: Any) -> None:
-        self._redis.hset(self._get_metadata_key(), key, json.dumps(value))
+    async def set_metadata(self, key: str, value: Any) -> None:
+        await self._redis.hset(self._get_metadata_key(), key, json.dumps(value))
+
+    async def get_metadata(self, key: str) -> Optional[Any]:
+        value = await self._redis.hget(self._get_metadata_key(), key)
+        return json.loads(value) if value else None
+
+    # 누적 요약 관련 메서드들
+    def _get_summary_lock_key(self) -> str:
+        return f"chat:{self.conversation_id}:summary_lock"
+
+    async def aupdate_summary(self) -> bool:
+        """윈도우 밖으로 밀려난 메시지를 기존 요약에 합쳐 갱신
+
+        요약되지 않은 오래된 메시지가 summary_min_messages개 미만이거나 다른 작업이
+        이미 요약 중이면 아무것도 하지 않는다.
+
+        Returns:
+            요약 갱신 여부
+        """
+        if self.summarizer is None:
+            return False
+        lock_key = self._get_summary_lock_key()
+        token = uuid.uuid4().hex
+        if not await self._redis.set(lock_key, token, nx=True, ex=self.summary_lock_ttl):
+            return False
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(self._get_metadata_key(), "summary", "summary_upto")
+                pipe.llen(self._get_chat_key())
+                (summary, summary_upto), length = await pipe.execute()
+
+            start = int(summary_upto) if summary_upto else 0
+            end = length - self.window_turns * 2
+            if end - start < self.summary_min_messages:
+                return False
+
+            raw_messages = await self._redis.lrange(self._get_chat_key(), start, end - 1)
+            new_summary = await self.summarizer(
+                json.loads(summary) if summary else "",
+                [_decode(raw) for raw in raw_messages],
+            )
+            await self._redis.hset(
+                self._get_metadata_key(),
+                mapping={"summary": json.dumps(new_summary), "summary_upto": end},
+            )
+            return True
+        finally:
+            await self._redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+    def schedule_summary_update(self) -> None:
+        """응답 후 요약 갱신을 백그라운드 작업으로 실행 (응답 지연 없음)"""
+        if self.summarizer is None:
+            return
+
+        async def run() -> None:
+            try:
+                await self.aupdate_summary()
+            except Exception as e:
+                logger.error(f"대화 요약 갱신 중 오류 발생 ({self.conversation_id}): {str(e)}")
 
-    def get_metadata(self, key: str) -> Optional[Any]:
-        value = self._redis.hget(self._get_metadata_key(), key)
-        return json.loads(value) if value else None
\ No newline at end of file
+        task = asyncio.create_task(run())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
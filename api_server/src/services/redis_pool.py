@@ -0,0 +1,138 @@
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+import redis
+import redis.asyncio as aioredis
+
+from core.config import settings
+from utils.metrics import Histogram, LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+POOL_CONFIG = settings.redis_pool
+
+
+class InstrumentedBlockingConnectionPool(aioredis.BlockingConnectionPool):
+    """연결 대기 시간과 사용 중인 연결 수를 기록하는 비동기 블로킹 커넥션 풀
+
+    max_connections개가 모두 사용 중이면 새 연결을 만들지 않고 timeout초까지 반납을 기다린다.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.wait_time = Histogram(LATENCY_BUCKETS)
+        self.acquired = 0
+        self.acquire_errors = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    async def get_connection(self, *args: Any, **kwargs: Any):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:  # 풀 대기 시간 초과 또는 연결 실패
+            self.acquire_errors += 1
+            raise
+        self.wait_time.observe(time.perf_counter() - started)
+        self.acquired += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return connection
+
+    async def release(self, connection) -> None:
+        self.in_use -= 1
+        await super().release(connection)
+
+
+class RedisPool:
+    """애플리케이션 전역 Redis 커넥션 풀
+
+    요청마다 클라이언트를 만들지 않고, 모든 Redis 사용처(대화 메모리, 사용자, 캐시)가
+    하나의 비동기 풀을 공유한다. 인덱싱 스레드에서 호출되는 동기 작업용 풀은 별도로 둔다.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 50,
+        timeout: float = 5.0,
+        socket_timeout: float = 5.0,
+        socket_connect_timeout: float = 2.0,
+        health_check_interval: int = 30,
+        sync_max_connections: int = 4,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.sync_max_connections = sync_max_connections
+        self.timeout = timeout
+        self.connection_kwargs = {
+            "socket_timeout": socket_timeout,
+            "socket_connect_timeout": socket_connect_timeout,
+            "health_check_interval": health_check_interval,
+            "socket_keepalive": True,
+        }
+        self._pool: Optional[InstrumentedBlockingConnectionPool] = None
+        self._client: Optional[aioredis.Redis] = None
+        self._sync_client: Optional[redis.Redis] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> aioredis.Redis:
+        """공유 풀을 사용하는 비동기 클라이언트 (지연 생성)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._pool = InstrumentedBlockingConnectionPool.from_url(
+                        self.url,
+                        max_connections=self.max_connections,
+                        timeout=self.timeout,
+                        **self.connection_kwargs,
+                    )
+                    self._client = aioredis.Redis(connection_pool=self._pool)
+        return self._client
+
+    @property
+    def sync_client(self) -> redis.Redis:
+        """인덱싱 스레드 등 이벤트 루프 밖에서 쓰는 동기 클라이언트 (지연 생성)"""
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    pool = redis.BlockingConnectionPool.from_url(
+                        self.url,
+                        max_connections=self.sync_max_connections,
+                        timeout=self.timeout,
+                        **self.connection_kwargs,
+                    )
+                    self._sync_client = redis.Redis(connection_pool=pool)
+        return self._sync_client
+
+    def stats(self) -> Dict[str, Any]:
+        """비동기 풀 사용량과 연결 대기 시간"""
+        if self._pool is None:
+            return {"max_connections": self.max_connections, "in_use": 0}
+        return {
+            "max_connections": self.max_connections,
+            "in_use": self._pool.in_use,
+            "peak_in_use": self._pool.peak_in_use,
+            "acquired": self._pool.acquired,
+            "acquire_errors": self._pool.acquire_errors,
+            "wait_seconds": self._pool.wait_time.snapshot(),
+        }
+
+    async def close(self) -> None:
+        """워커 종료 시 모든 연결 정리"""
+        if self._pool is not None:
+            await self._pool.disconnect()
+        if self._sync_client is not None:
+            self._sync_client.connection_pool.disconnect()
+        logger.info("✅ Redis 커넥션 풀 종료")
+
+
+redis_pool = RedisPool(settings.REDIS_URL, **POOL_CONFIG)
+
+
+def get_redis() -> aioredis.Redis:
+    """FastAPI 의존성: 공유 풀을 사용하는 비동기 Redis 클라이언트"""
+    return redis_pool.client
@@ -0,0 +1,166 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from core.config import settings
+from models import Document
+from utils.metrics import Histogram, LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+RERANKER_CONFIG = settings.reranker
+
+
+class CrossEncoderReranker:
+    """로컬 cross-encoder로 (질의, 청크) 쌍을 배치 채점해 상위 k개를 고르는 재순위화 단계
+
+    배치마다 남은 시간 예산을 확인하고, 다음 배치를 끝낼 수 없으면 채점을 중단한다.
+    그때까지 채점한 앞쪽 후보만 재순위화하고 나머지는 벡터 검색 순서대로 뒤에 붙인다.
+    배치 소요 시간은 워밍업과 이전 요청에서 측정한 값으로 추정하므로 첫 배치도 예산을 넘지 않는다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "auto",
+        batch_size: int = 16,
+        max_length: int = 512,
+        time_budget_ms: float = 300.0,
+    ):
+        self.model_name = model_name
+        self.device = ("cuda" if torch.cuda.is_available() else "cpu") if device == "auto" else device
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.time_budget = time_budget_ms / 1000
+        self._tokenizer: Any = None
+        self._model: Any = None
+        self._lock = threading.Lock()
+        # 배치 하나의 예상 소요 시간(초, 지수 이동 평균). 0이면 아직 측정 전
+        self.batch_cost = 0.0
+        self.reranked = 0
+        self.partial = 0
+        self.fallbacks = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+
+    def _load(self) -> Tuple[Any, Any]:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"🔄 리랭커 모델 로드 중: {self.model_name} ({self.device})")
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                    model = AutoModelForSequenceClassification.from_pretrained(self.model_name).to(self.device)
+                    model.eval()
+                    self._model = model
+        return self._tokenizer, self._model
+
+    def warmup(self) -> None:
+        """모델 로드 후 배치 하나를 채점해 배치 소요 시간 측정 (첫 호출의 초기화 시간은 제외)"""
+        self._load()
+        texts = ["워밍업 문장입니다. " * 32] * self.batch_size
+        self._score_batch("워밍업", texts)
+        started = time.monotonic()
+        self._score_batch("워밍업", texts)
+        self.batch_cost = time.monotonic() - started
+        logger.info(f"✅ 리랭커 워밍업 완료 (배치 {self.batch_size}개 {self.batch_cost * 1000:.0f}ms)")
+
+    def _observe_batch(self, elapsed: float) -> None:
+        self.batch_cost = elapsed if self.batch_cost == 0 else 0.8 * self.batch_cost + 0.2 * elapsed
+
+    def _score_batch(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """(질의, 청크) 쌍의 관련도 점수 (클수록 관련 높음)"""
+        tokenizer, model = self._load()
+        inputs = tokenizer(
+            [query] * len(texts),
+            list(texts),
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="pt",
+        ).to(self.device)
+        with torch.inference_mode():
+            logits = model(**inputs).logits
+        return logits.view(len(texts), -1)[:, -1].float().cpu().numpy()
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[Document],
+        top_k: int,
+        time_budget_ms: Optional[float] = None,
+    ) -> Tuple[List[Document], bool]:
+        """후보를 재순위화해 상위 top_k개 반환
+
+        Returns:
+            (문서 목록, 재순위화 여부). 예산 안에 한 배치도 채점하지 못했거나 오류 시
+            벡터 순서 상위 top_k개와 False
+        """
+        if len(documents) <= 1:
+            return documents[:top_k], False
+
+        budget = self.time_budget if time_budget_ms is None else time_budget_ms / 1000
+        started = time.monotonic()
+        deadline = started + budget
+        scores: List[np.ndarray] = []
+        batch_cost = self.batch_cost
+        try:
+            for start in range(0, len(documents), self.batch_size):
+                batch_started = time.monotonic()
+                if batch_started + batch_cost > deadline:
+                    break
+                batch = documents[start:start + self.batch_size]
+                scores.append(self._score_batch(query, [doc.text for doc in batch]))
+                elapsed = time.monotonic() - batch_started
+                batch_cost = max(batch_cost, elapsed)
+                self._observe_batch(elapsed)
+        except Exception as e:
+            self.fallbacks += 1
+            logger.warning(f"리랭킹 생략, 벡터 검색 순서 사용: {str(e)}")
+            return documents[:top_k], False
+        finally:
+            self.latency.observe(time.monotonic() - started)
+
+        if not scores:
+            self.fallbacks += 1
+            logger.warning(f"리랭킹 시간 예산 {budget * 1000:.0f}ms 안에 채점할 수 없어 벡터 검색 순서 사용")
+            return documents[:top_k], False
+
+        all_scores = np.concatenate(scores)
+        if len(all_scores) < len(documents):
+            self.partial += 1
+            logger.warning(
+                f"리랭킹 시간 예산 {budget * 1000:.0f}ms 초과, 후보 {len(documents)}개 중 앞쪽 {len(all_scores)}개만 재순위화"
+            )
+        order = np.argsort(-all_scores, kind="stable")
+        ranked = [
+            documents[i].model_copy(update={
+                "metadata": {**documents[i].metadata, "rerank_score": float(all_scores[i])}
+            })
+            for i in order
+        ]
+        self.reranked += 1
+        return (ranked + documents[len(all_scores):])[:top_k], True
+
+    def stats(self) -> Dict[str, Any]:
+        """재순위화 / 부분 재순위화 / 폴백 횟수, 배치 예상 시간, 소요 시간 히스토그램"""
+        return {
+            "model": self.model_name,
+            "reranked": self.reranked,
+            "partial": self.partial,
+            "fallbacks": self.fallbacks,
+            "batch_cost_ms": self.batch_cost * 1000,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+reranker = CrossEncoderReranker(
+    model_name=RERANKER_CONFIG["model"],
+    device=RERANKER_CONFIG["device"],
+    batch_size=RERANKER_CONFIG["batch_size"],
+    max_length=RERANKER_CONFIG["max_length"],
+    time_budget_ms=RERANKER_CONFIG["time_budget_ms"],
+)
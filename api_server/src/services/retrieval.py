@@ -1,70 +1,325 @@
-from langchain_community.vectorstores import Chroma
-from transformers import AutoTokenizer, AutoModel
-import torch
-from langchain.embeddings.base import Embeddings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
 import logging
 import numpy as np
 
 from core.config import settings
 from models import Document, RetrievalOutput  # Add this import
+from services.embedding import get_collection_engine, registry
+from services.embedding_cache import query_embedding_cache
+from services.executor import run_blocking
+from services.vectorstore import chroma_pool
+from services.reranker import RERANKER_CONFIG, reranker
+from services.sparse_index import SPARSE_CONFIG, reciprocal_rank_fusion, sparse_indexes
+from services.score_calibration import (
+    CALIBRATION_CONFIG,
+    ScoreCalibration,
+    distance_to_similarity,
+    has_comparable_similarity,
+    pair_distance,
+    score_calibration,
+)
 logger = logging.getLogger(__name__)
 
 
-# kakaobank/kf-deberta-base 모델 초기화
-deberta_model_name = "kakaobank/kf-deberta-base"
-tokenizer = AutoTokenizer.from_pretrained(deberta_model_name)
-model = AutoModel.from_pretrained(deberta_model_name)
-
 # ChromaDB 저장 경로
 CHROMA_DB_DIR = settings.vector_db["chroma_db_dir"]
 
-class DeBERTaEmbeddingFunction(Embeddings):
-    """DeBERTa를 이용한 ChromaDB 임베딩 함수"""
+# DeBERTa를 사용하여 텍스트 임베딩 생성
+def generate_text_embeddings(
+    texts: List[str],
+    collection_name: str = settings.collection_name
+) -> np.ndarray:
+    """컬렉션에 선언된 임베딩 엔진으로 (len(texts), 768) float32 임베딩 행렬 생성"""
+    return get_collection_engine(collection_name).encode(texts)
+
+def _cached_query_embeddings(
+    queries: List[str],
+    collection_name: str
+) -> Tuple[List[str], List[Optional[np.ndarray]], List[int]]:
+    """쿼리 임베딩 캐시 조회 (캐시 키, 쿼리별 캐시 값, miss 쿼리 위치)"""
+    declared = registry.collection_config(collection_name)
+    keys = [
+        query_embedding_cache.make_key(declared["model"], declared["pooling"], query)
+        for query in queries
+    ]
+    cached = [query_embedding_cache.get(key) for key in keys]
+    missing = [i for i, embedding in enumerate(cached) if embedding is None]
+    return keys, cached, missing
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """문서 리스트를 입력받아 임베딩 벡터 리스트를 반환"""
-        return generate_text_embeddings(texts)
+def _fill_query_embeddings(
+    keys: List[str],
+    cached: List[Optional[np.ndarray]],
+    missing: List[int],
+    encoded: np.ndarray
+) -> np.ndarray:
+    """새로 계산한 임베딩을 캐시에 넣고 쿼리 순서대로 쌓음"""
+    for row, i in enumerate(missing):
+        cached[i] = encoded[row]
+        query_embedding_cache.put(keys[i], encoded[row])
+    return np.stack(cached)
 
-    def embed_query(self, text: str) -> List[float]:
-        """검색 쿼리를 입력받아 임베딩 벡터를 반환"""
-        return generate_text_embeddings([text])[0]
+def embed_queries(
+    queries: List[str],
+    collection_name: str = settings.collection_name
+) -> np.ndarray:
+    """쿼리 임베딩 캐시를 거쳐 (len(queries), 768) 임베딩 행렬 생성 (동기 호출자 / CLI용)
 
-# DeBERTa를 사용하여 텍스트 임베딩 생성
-def generate_text_embeddings(texts: List[str]) -> List[List[float]]:
-    """DeBERTa를 사용하여 텍스트 임베딩 생성"""
-    embeddings = []
-    for text in texts:
-        if not text.strip():
-            embeddings.append([0] * 768)  # DeBERTa 임베딩 크기
-            continue
-        inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = model(**inputs)
-        embeddings.append(outputs.last_hidden_state[:, 0, :].squeeze().tolist())
-    return embeddings
-
-#FIXME 지나치게 높은 거리값
-def l2_to_similarity(l2_distance: float) -> float:
-    return 1 / (1 + l2_distance)
+    캐시 miss 쿼리만 모아서 한 번에 인코딩한다. 요청 경로에서는 스레드를 점유하지 않는
+    aembed_queries를 사용한다.
+    """
+    if not queries:
+        return np.zeros((0, get_collection_engine(collection_name).dim), dtype=np.float32)
+
+    keys, cached, missing = _cached_query_embeddings(queries, collection_name)
+    if not missing:
+        return np.stack(cached)
+
+    scheduler = registry.get_collection_scheduler(collection_name)
+    missing_queries = [queries[i] for i in missing]
+    if len(missing) > scheduler.max_batch_size:
+        # 대량 배치는 스케줄러 대기열을 채우지 않고 엔진에서 길이별로 나눠 바로 인코딩
+        encoded = get_collection_engine(collection_name).encode(missing_queries)
+    else:
+        # 동시에 들어온 다른 요청의 쿼리와 함께 하나의 배치로 추론
+        encoded = scheduler.embed_many(missing_queries)
+    return _fill_query_embeddings(keys, cached, missing, encoded)
+
+async def aembed_queries(
+    queries: List[str],
+    collection_name: str = settings.collection_name
+) -> np.ndarray:
+    """embed_queries의 비동기 버전
+
+    스케줄러 Future를 이벤트 루프에서 기다리므로 결과를 기다리는 동안 실행기 스레드를 점유하지 않는다.
+    따라서 동시 요청 수가 실행기 max_workers에 묶이지 않고 스케줄러의 max_batch_size까지 함께 배칭된다.
+    """
+    if not queries:
+        return np.zeros((0, get_collection_engine(collection_name).dim), dtype=np.float32)
+
+    keys, cached, missing = _cached_query_embeddings(queries, collection_name)
+    if not missing:
+        return np.stack(cached)
+
+    scheduler = registry.get_collection_scheduler(collection_name)
+    missing_queries = [queries[i] for i in missing]
+    if len(missing) > scheduler.max_batch_size:
+        encoded = await run_blocking(get_collection_engine(collection_name).encode, missing_queries)
+    else:
+        encoded = np.stack(await asyncio.gather(*(scheduler.aembed(query) for query in missing_queries)))
+    return _fill_query_embeddings(keys, cached, missing, encoded)
+
+def _to_document(
+    doc_id: str,
+    text: str,
+    metadata: Dict[str, Any],
+    distance: float,
+    space: str,
+    calibration: Optional[ScoreCalibration] = None,
+    comparable: bool = True
+) -> Document:
+    """검색 결과를 Document로 변환 (score: 보정된 관련 확률, 보정값이 없으면 코사인 유사도)
+
+    comparable이 False이면 score는 순위에만 의미가 있으므로 metadata에 comparable_score=False를 남긴다.
+    """
+    similarity = distance_to_similarity(distance, space)
+    metadata = {**(metadata or {}), "similarity": similarity}
+    if not comparable:
+        metadata["comparable_score"] = False
+    return Document(
+        id=doc_id,
+        text=text,
+        metadata=metadata,
+        score=calibration(similarity) if calibration else similarity
+    )
+
+# 점수 비교가 불가능하다는 경고를 이미 남긴 컬렉션 (워커당 한 번만 경고)
+_warned_collections = set()
+
+def collection_scoring(collection_name: str, space: str) -> Tuple[bool, Optional[ScoreCalibration]]:
+    """컬렉션 점수를 코사인 유사도로 비교할 수 있는지와 적용할 보정값
+
+    정규화 기록이 없는 이전 l2 / ip 컬렉션은 거리를 유사도로 바꿀 수 없으므로
+    보정과 min_score 필터를 적용하지 않는다 (모든 문서가 걸러지지 않도록).
+    """
+    if has_comparable_similarity(space, chroma_pool.normalized(collection_name)):
+        return True, get_calibration(collection_name, space)
+    if collection_name not in _warned_collections:
+        _warned_collections.add(collection_name)
+        logger.warning(
+            f"{collection_name}: 정규화되지 않은 벡터가 저장된 {space} 컬렉션이라 점수 보정 / min_score 필터를 "
+            f"적용하지 않습니다. chromaDB.py --migrate로 다시 임베딩하세요."
+        )
+    return False, None
+
+def get_calibration(collection_name: str, space: str) -> Optional[ScoreCalibration]:
+    """현재 거리 공간으로 계산된 점수 보정값 (없거나 공간이 다르면 None)"""
+    if not CALIBRATION_CONFIG["enabled"]:
+        return None
+    calibration = score_calibration.get(collection_name)
+    return calibration if calibration is not None and calibration.space == space else None
+
+def is_relevant(doc: Document, min_score: float, sparse_rank_cutoff: int = 0) -> bool:
+    """RAG 컨텍스트에 넣을 만한 문서인지
+
+    벡터 점수가 min_score 이상이거나, BM25 순위가 sparse_rank_cutoff 이내인 문서.
+    종목 코드, 고유명사처럼 벡터 유사도는 낮아도 어휘가 정확히 일치하는 청크를 살리기 위함이다.
+    점수를 유사도로 비교할 수 없는 컬렉션(comparable_score=False)의 문서는 걸러내지 않는다.
+    """
+    if doc.score >= min_score or doc.metadata.get("comparable_score") is False:
+        return True
+    sparse_rank = doc.metadata.get("sparse_rank")
+    return sparse_rank is not None and sparse_rank <= sparse_rank_cutoff
+
+def filter_relevant(documents: List[Document]) -> List[Document]:
+    """설정된 최소 점수 / BM25 순위 기준으로 관련 문서만 선택"""
+    return [
+        doc for doc in documents
+        if is_relevant(doc, settings.retrieval["min_score"], settings.retrieval["sparse_rank_cutoff"])
+    ]
+
+def search_batch(
+    queries: List[str],
+    collection_name: str = settings.collection_name,
+    top_k: int = 3,
+    hybrid: bool = SPARSE_CONFIG["enabled"],
+    query_embeddings: Optional[np.ndarray] = None
+) -> List[List[Document]]:
+    """여러 쿼리를 한 번의 배치 임베딩 + 한 번의 ChromaDB 조회로 검색
+
+    희소 인덱스가 있으면 BM25 후보와 벡터 후보를 RRF로 합쳐 순위를 정한다.
+    점수(score)는 항상 벡터 유사도 기반(보정 적용)이며, BM25로만 찾은 청크는 저장된 임베딩으로 계산한다.
+    하이브리드 검색 결과의 metadata에는 fused_score와 BM25 순위(sparse_rank, BM25 후보일 때만)가 들어간다.
+    query_embeddings를 넘기면(aembed_queries로 미리 계산) 임베딩을 다시 계산하지 않는다.
+
+    Returns:
+        쿼리 순서대로 상위 K개 문서 목록 (id, 메타데이터, 유사도 점수 포함)
+    """
+    if not queries:
+        return []
+
+    num_docs = chroma_pool.count(collection_name)
+    if num_docs == 0:
+        return [[] for _ in queries]
+
+    sparse_index = sparse_indexes.get(collection_name) if hybrid else None
+    fetch_k = max(top_k, SPARSE_CONFIG["candidates"]) if sparse_index is not None else top_k
+
+    collection = chroma_pool.get_collection(collection_name)
+    space = chroma_pool.space(collection_name)
+    comparable, calibration = collection_scoring(collection_name, space)
+    if query_embeddings is None:
+        query_embeddings = embed_queries(queries, collection_name)
+    results = collection.query(
+        query_embeddings=query_embeddings.tolist(),
+        n_results=min(fetch_k, num_docs)
+    )
+
+    dense = [
+        [
+            _to_document(doc_id, doc, metadata, distance, space, calibration, comparable)
+            for doc_id, doc, metadata, distance in zip(ids, docs, metadatas, distances)
+        ]
+        for ids, docs, metadatas, distances in zip(
+            results["ids"],
+            results["documents"],
+            results["metadatas"],
+            results["distances"]
+        )
+    ]
+    if sparse_index is None:
+        return dense
+
+    # 쿼리별 BM25 후보와 벡터 후보를 RRF로 결합
+    fused, fused_scores, sparse_ranks = [], [], []
+    for query, dense_docs in zip(queries, dense):
+        sparse_ids = [doc_id for doc_id, _ in sparse_index.search(query, fetch_k)]
+        ranking = reciprocal_rank_fusion(
+            [[doc.id for doc in dense_docs], sparse_ids], k=SPARSE_CONFIG["rrf_k"]
+        )
+        fused.append([doc_id for doc_id, _ in ranking[:top_k]])
+        fused_scores.append(dict(ranking[:top_k]))
+        sparse_ranks.append({doc_id: rank for rank, doc_id in enumerate(sparse_ids, start=1)})
+
+    # 해당 쿼리의 벡터 후보에 없던 청크만 모아서 한 번에 조회
+    missing = sorted({
+        doc_id
+        for ids, dense_docs in zip(fused, dense)
+        for doc_id in set(ids) - {doc.id for doc in dense_docs}
+    })
+    stored = {}
+    if missing:
+        extra = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+        for doc_id, doc, metadata, embedding in zip(
+            extra["ids"], extra["documents"], extra["metadatas"], extra["embeddings"]
+        ):
+            stored[doc_id] = (doc, metadata, np.asarray(embedding, dtype=np.float32))
+
+    batch = []
+    for row, (ids, dense_docs) in enumerate(zip(fused, dense)):
+        by_id = {doc.id: doc for doc in dense_docs}
+        documents = []
+        for doc_id in ids:
+            if doc_id in by_id:
+                document = by_id[doc_id]
+            elif doc_id in stored:
+                doc, metadata, embedding = stored[doc_id]
+                distance = float(pair_distance(query_embeddings[row], embedding, space)[0])
+                document = _to_document(doc_id, doc, metadata, distance, space, calibration, comparable)
+            else:
+                # 둘 다 없으면 희소 인덱스 구축 이후 삭제된 청크이므로 건너뜀
+                continue
+            document.metadata["fused_score"] = fused_scores[row][doc_id]
+            if doc_id in sparse_ranks[row]:
+                document.metadata["sparse_rank"] = sparse_ranks[row][doc_id]
+            documents.append(document)
+        batch.append(documents)
+    return batch
+
+async def asearch_batch(
+    queries: List[str],
+    collection_name: str = settings.collection_name,
+    top_k: int = 3,
+    hybrid: bool = SPARSE_CONFIG["enabled"]
+) -> List[List[Document]]:
+    """요청 경로용 search_batch (임베딩은 스케줄러에서 await, 조회만 실행기 스레드에서 실행)"""
+    if not queries:
+        return []
+    query_embeddings = await aembed_queries(queries, collection_name)
+    return await run_blocking(
+        search_batch, queries, collection_name, top_k, hybrid, query_embeddings=query_embeddings
+    )
 
 # ChromaDB에서 검색 수행
+def _search_error_output() -> RetrievalOutput:
+    return RetrievalOutput(
+        id="error",
+        name="error",
+        group_id="error",
+        related_documents=[Document(
+            id="error_doc",
+            text="검색 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+            metadata={},
+            score=0.0
+        )]
+    )
+
 def search_in_chromadb(
     query: str, 
     collection_name: str = settings.collection_name, 
-    top_k: int = 3
+    top_k: int = 3,
+    rerank: bool = RERANKER_CONFIG["enabled"],
+    rerank_budget_ms: Optional[float] = None,
+    query_embedding: Optional[np.ndarray] = None
 ) -> RetrievalOutput:
-    """저장된 ChromaDB에서 검색하며, 유사도 필터 없이 상위 K개 결과 반환."""
-    try:
-        logger.info("🔄 ChromaDB 연결 중...")
-        vectorstore = Chroma(
-            collection_name=collection_name,
-            embedding_function=DeBERTaEmbeddingFunction(),
-            persist_directory=CHROMA_DB_DIR,
-        )
+    """저장된 ChromaDB에서 검색하며, 유사도 필터 없이 상위 K개 결과 반환.
 
-        num_docs = vectorstore._collection.count()
-        logger.info(f"✅ {collection_name} 현재 저장된 문서 개수: {num_docs}")
+    rerank가 켜져 있으면 candidates개를 가져와 cross-encoder로 top_k개를 고른다.
+    query_embedding을 넘기면 쿼리 임베딩을 다시 계산하지 않는다.
+    """
+    try:
+        num_docs = chroma_pool.count(collection_name)
+        logger.debug(f"✅ {collection_name} 현재 저장된 문서 개수: {num_docs}")
 
         if num_docs == 0:
             logger.warning("❌ ChromaDB에 저장된 데이터가 없습니다.")
@@ -80,27 +335,13 @@ def search_in_chromadb(
                 )]
             )
 
-        # ✅ 쿼리 임베딩 생성
-        query_embedding = generate_text_embeddings([query])[0]
-        logger.info(f"✅ 생성된 쿼리 임베딩 길이: {len(query_embedding)}")
-
-        # 유사한 문서 검색 수행
-        results = vectorstore._collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
-        )
-
-        # 결과 변환
-        documents = []
-        for idx, (doc, distance) in enumerate(zip(results["documents"][0], results["distances"][0])):
-            similarity = l2_to_similarity(distance)
-            logger.info(f"Document {idx}: L2 distance = {distance:.4f}, Similarity = {similarity:.4f}")
-            documents.append(Document(
-                id=f"doc_{idx}",
-                text=doc,
-                metadata={},
-                score=similarity  # 변환된 유사도 점수 사용
-            ))
+        fetch_k = max(top_k, RERANKER_CONFIG["candidates"]) if rerank else top_k
+        query_embeddings = None if query_embedding is None else query_embedding[np.newaxis, :]
+        documents = search_batch([query], collection_name, fetch_k, query_embeddings=query_embeddings)[0]
+        if rerank:
+            documents, _ = reranker.rerank(query, documents, top_k, rerank_budget_ms)
+        for idx, doc in enumerate(documents):
+            logger.info(f"Document {idx}: Similarity = {doc.score:.4f}")
 
         return RetrievalOutput(
             id="search_result",
@@ -111,14 +352,30 @@ def search_in_chromadb(
 
     except Exception as e:
         logger.error(f"ChromaDB 검색 중 오류 발생: {str(e)}")
-        return RetrievalOutput(
-            id="error",
-            name="error",
-            group_id="error",
-            related_documents=[Document(
-                id="error_doc",
-                text="검색 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
-                metadata={},
-                score=0.0
-            )]
-        )
+        return _search_error_output()
+
+async def asearch_in_chromadb(
+    query: str,
+    collection_name: str = settings.collection_name,
+    top_k: int = 3,
+    rerank: bool = RERANKER_CONFIG["enabled"],
+    rerank_budget_ms: Optional[float] = None
+) -> RetrievalOutput:
+    """요청 경로용 search_in_chromadb
+
+    쿼리 임베딩은 스케줄러에서 await하고, ChromaDB 조회 / 재순위화만 실행기 스레드에서 돈다.
+    """
+    try:
+        query_embedding = (await aembed_queries([query], collection_name))[0]
+    except Exception as e:
+        logger.error(f"쿼리 임베딩 중 오류 발생: {str(e)}")
+        return _search_error_output()
+    return await run_blocking(
+        search_in_chromadb,
+        query=query,
+        collection_name=collection_name,
+        top_k=top_k,
+        rerank=rerank,
+        rerank_budget_ms=rerank_budget_ms,
+        query_embedding=query_embedding
+    )
@@ -0,0 +1,208 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import random
+import re
+import threading
+
+import numpy as np
+
+from core.config import settings
+from services.embedding import get_collection_engine
+from services.vectorstore import chroma_pool
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_CONFIG = settings.score_calibration
+
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?다])\s+")
+
+
+def distance_to_similarity(distance: float, space: str) -> float:
+    """Chroma 거리값을 [-1, 1] 범위의 유사도로 변환
+
+    cosine / ip 공간의 거리는 1 - 내적이고, l2 공간의 거리는 제곱 L2 거리이다.
+    정규화된 벡터에서는 제곱 L2 = 2 - 2 * cos 이므로 세 공간 모두 코사인 유사도가 된다.
+    """
+    if space in ("cosine", "ip"):
+        return 1.0 - distance
+    return 1.0 - distance / 2.0
+
+
+def has_comparable_similarity(space: str, normalized: bool) -> bool:
+    """distance_to_similarity 결과를 코사인 유사도로 볼 수 있는지
+
+    cosine 공간은 항상 가능하고, ip / l2 공간은 저장된 벡터가 정규화된 경우에만 가능하다.
+    """
+    return space == "cosine" or normalized
+
+
+def pair_distance(query_embedding: np.ndarray, embeddings: np.ndarray, space: str) -> np.ndarray:
+    """Chroma와 같은 방식으로 질의와 저장된 임베딩(들) 사이의 거리 계산"""
+    embeddings = np.atleast_2d(embeddings)
+    if space == "cosine":
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
+        return 1.0 - (embeddings @ query_embedding) / np.where(norms > 0, norms, 1.0)
+    if space == "ip":
+        return 1.0 - embeddings @ query_embedding
+    return np.sum((embeddings - query_embedding) ** 2, axis=1)
+
+
+def fit_platt(scores: np.ndarray, labels: np.ndarray, iterations: int = 50, l2: float = 1e-4) -> Tuple[float, float]:
+    """유사도 -> 관련 확률 로지스틱 보정 계수 (Newton 방법, 양/음성 클래스 가중치 균형)"""
+    x = np.stack([scores, np.ones_like(scores)], axis=1).astype(np.float64)
+    y = labels.astype(np.float64)
+    positives = max(y.sum(), 1.0)
+    negatives = max(len(y) - y.sum(), 1.0)
+    weights = np.where(y > 0, 0.5 / positives, 0.5 / negatives)
+
+    params = np.zeros(2)
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(x @ params)))
+        gradient = x.T @ (weights * (p - y)) + l2 * params
+        hessian = (x * (weights * p * (1 - p))[:, None]).T @ x + l2 * np.eye(2)
+        step = np.linalg.solve(hessian, gradient)
+        params -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return float(params[0]), float(params[1])
+
+
+class ScoreCalibration:
+    """컬렉션별 유사도 보정 (Platt scaling): score = sigmoid(a * similarity + b)"""
+
+    def __init__(self, a: float, b: float, space: str, **info: Any):
+        self.a = a
+        self.b = b
+        self.space = space
+        self.info = info
+
+    def __call__(self, similarity: float) -> float:
+        return float(1.0 / (1.0 + np.exp(-(self.a * similarity + self.b))))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"a": self.a, "b": self.b, "space": self.space, **self.info}
+
+
+def _make_pseudo_queries(texts: List[str], rng: random.Random) -> List[Tuple[int, str, str]]:
+    """청크에서 한 문장을 질의로, 나머지를 정답 문서로 떼어낸 (청크 번호, 질의, 정답) 목록"""
+    pairs = []
+    for i, text in enumerate(texts):
+        sentences = [s for s in _SENTENCE_PATTERN.split(text or "") if len(s.strip()) >= 10]
+        if len(sentences) < 2:
+            continue
+        pick = rng.randrange(len(sentences))
+        rest = " ".join(s for j, s in enumerate(sentences) if j != pick)
+        pairs.append((i, sentences[pick], rest))
+    return pairs
+
+
+class ScoreCalibrationRegistry:
+    """컬렉션별 점수 보정값 계산, 저장(JSON), 지연 로드"""
+
+    def __init__(self, root: str, sample_size: int = 200, seed: int = 0):
+        self.root = root
+        self.sample_size = sample_size
+        self.seed = seed
+        self._calibrations: Dict[str, Tuple[float, ScoreCalibration]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, collection_name: str) -> str:
+        return os.path.join(self.root, f"calibration_{collection_name}.json")
+
+    def get(self, collection_name: str) -> Optional[ScoreCalibration]:
+        """저장된 보정값 조회 (파일이 바뀌었으면 다시 로드, 없으면 None)"""
+        path = self.path(collection_name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        cached = self._calibrations.get(collection_name)
+        if cached is None or cached[0] != mtime:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                cached = (mtime, ScoreCalibration(**data))
+                self._calibrations[collection_name] = cached
+        return cached[1]
+
+    def calibrate(self, collection_name: str) -> Optional[ScoreCalibration]:
+        """컬렉션 표본으로 보정값 계산 후 저장
+
+        표본 청크마다 한 문장을 떼어 질의로 쓰고, 나머지 문장(정답)과 다른 청크(오답)에
+        대한 유사도 분포로 로지스틱 보정을 학습한다. 사용 가능한 표본이 부족하면 None.
+        """
+        collection = chroma_pool.get_collection(collection_name)
+        space = chroma_pool.space(collection_name)
+        if not has_comparable_similarity(space, chroma_pool.normalized(collection_name)):
+            logger.warning(
+                f"{collection_name} 점수 보정 생략: 정규화되지 않은 벡터가 저장된 {space} 컬렉션 "
+                f"(chromaDB.py --migrate로 다시 임베딩 필요)"
+            )
+            return None
+        rng = random.Random(self.seed)
+
+        ids = collection.get(include=[])["ids"]
+        sample_ids = rng.sample(ids, min(self.sample_size, len(ids)))
+        if not sample_ids:
+            return None
+        data = collection.get(ids=sample_ids, include=["documents", "embeddings"])
+        texts, stored = data["documents"], np.asarray(data["embeddings"], dtype=np.float32)
+
+        pairs = _make_pseudo_queries(texts, rng)
+        if len(pairs) < 10:
+            logger.warning(f"{collection_name} 점수 보정 생략: 사용 가능한 표본 부족 ({len(pairs)}개)")
+            return None
+
+        engine = get_collection_engine(collection_name)
+        encoded = engine.encode([query for _, query, _ in pairs] + [rest for _, _, rest in pairs])
+        queries, positives = encoded[:len(pairs)], encoded[len(pairs):]
+
+        scores, labels = [], []
+        for row, (source, _, _) in enumerate(pairs):
+            scores.append(distance_to_similarity(float(pair_distance(queries[row], positives[row], space)[0]), space))
+            labels.append(1)
+            others = np.delete(stored, source, axis=0)
+            for distance in pair_distance(queries[row], others, space):
+                scores.append(distance_to_similarity(float(distance), space))
+                labels.append(0)
+
+        scores_array, labels_array = np.asarray(scores), np.asarray(labels)
+        a, b = fit_platt(scores_array, labels_array)
+        calibration = ScoreCalibration(
+            a=a,
+            b=b,
+            space=space,
+            positives=int(labels_array.sum()),
+            negatives=int(len(labels_array) - labels_array.sum()),
+            positive_mean=float(scores_array[labels_array == 1].mean()),
+            negative_mean=float(scores_array[labels_array == 0].mean()),
+            created_at=datetime.now().isoformat(),
+        )
+
+        path = self.path(collection_name)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(calibration.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        logger.info(
+            f"✅ {collection_name} 점수 보정 완료 (정답 평균 유사도 {calibration.info['positive_mean']:.3f}, "
+            f"오답 평균 {calibration.info['negative_mean']:.3f})"
+        )
+        return calibration
+
+    def on_invalidate(self, collection_name: str) -> None:
+        """컬렉션에 새 데이터가 인덱싱되면 보정값 재계산"""
+        if CALIBRATION_CONFIG["enabled"] and CALIBRATION_CONFIG["auto"]:
+            self.calibrate(collection_name)
+
+
+score_calibration = ScoreCalibrationRegistry(
+    root=settings.vector_db["chroma_db_dir"],
+    sample_size=CALIBRATION_CONFIG["sample_size"],
+)
+chroma_pool.add_invalidation_listener(score_calibration.on_invalidate, background=True)
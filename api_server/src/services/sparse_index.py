@@ -0,0 +1,394 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import glob
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from core.config import settings
+from services.vectorstore import chroma_pool
+
+logger = logging.getLogger(__name__)
+
+SPARSE_CONFIG = settings.sparse_index
+
+_WORD_PATTERN = re.compile(r"[0-9a-z가-힣]+(?:[.,][0-9]+)*[가-힣%]*")
+_HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+
+def tokenize(text: str, ngram: int = 2) -> List[str]:
+    """한국어 문서용 토크나이저
+
+    형태소 분석기 없이 어절 단위 토큰과 한글 문자 n-gram을 함께 만든다.
+    "영업이익", "7.9조원", "005930" 같은 표기는 어절 토큰으로 그대로 일치하고,
+    조사가 붙은 어절("영업이익은")은 n-gram으로 부분 일치한다.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for word in _WORD_PATTERN.findall(text):
+        tokens.append(word)
+        if len(word) > ngram and _HANGUL_PATTERN.search(word):
+            tokens.extend(f"#{word[i:i + ngram]}" for i in range(len(word) - ngram + 1))
+    return tokens
+
+
+def encode_varints(values: Iterable[int]) -> bytes:
+    """부호 없는 정수 목록을 LEB128 varint 바이트열로 인코딩"""
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """varint 바이트열(uint8 배열)을 정수 배열로 디코딩 (벡터화)"""
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    positions = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    values = (data & 0x7F).astype(np.int64) << (7 * positions)
+    return np.add.reduceat(values, starts)
+
+
+def _load_bytes(path: str) -> np.ndarray:
+    """바이트열 파일을 memmap으로 열기 (빈 파일은 memmap할 수 없으므로 빈 배열)"""
+    if os.path.getsize(path):
+        return np.memmap(path, dtype=np.uint8, mode="r")
+    return np.zeros(0, dtype=np.uint8)
+
+
+class StringArray:
+    """UTF-8 바이트열 + 오프셋으로 저장한 문자열 배열
+
+    단어 사전과 청크 ID 목록을 파이썬 dict / list 대신 이 형식으로 디스크에 두고 memmap으로 열어,
+    워커마다 힙에 복사하지 않고 페이지 캐시를 공유한다. 정렬된 배열은 find로 이진 탐색한다.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> "StringArray":
+        encoded = [value.encode("utf-8") for value in values]
+        return cls(
+            data=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            offsets=np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _bytes(self, index: int) -> bytes:
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def __getitem__(self, index: int) -> str:
+        return self._bytes(int(index)).decode("utf-8")
+
+    def find(self, value: str) -> Optional[int]:
+        """정렬된 배열에서 value의 위치 (UTF-8 바이트 순서 = 코드 포인트 순서, 없으면 None)"""
+        target = value.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._bytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < len(self) and self._bytes(low) == target else None
+
+    def save(self, directory: str, name: str, generation: int) -> None:
+        self.data.tofile(os.path.join(directory, f"{name}-{generation}.bin"))
+        np.save(os.path.join(directory, f"{name}_offsets-{generation}.npy"), self.offsets)
+
+    @classmethod
+    def load(cls, directory: str, name: str, generation: int) -> "StringArray":
+        return cls(
+            data=_load_bytes(os.path.join(directory, f"{name}-{generation}.bin")),
+            offsets=np.load(os.path.join(directory, f"{name}_offsets-{generation}.npy"), mmap_mode="r"),
+        )
+
+
+def _generation(path: str) -> Optional[int]:
+    """세대 파일 이름(name-{generation}.ext)의 세대 번호"""
+    suffix = os.path.basename(path).split(".")[0].rsplit("-", 1)[-1]
+    return int(suffix) if suffix.isdigit() else None
+
+
+class SparseIndex:
+    """BM25 역색인 (문서 ID 차분 + varint로 압축한 postings)
+
+    postings는 단어별로 [문서 번호 차분, 단어 빈도] 쌍을 varint로 이어 붙인
+    하나의 바이트열이며, 단어 사전(정렬된 단어, 번호 = 위치), 청크 ID와 함께
+    디스크에서 memmap으로 열어 워커 간 페이지 캐시를 공유한다.
+    """
+
+    def __init__(
+        self,
+        vocabulary: StringArray,
+        doc_ids: StringArray,
+        postings: np.ndarray,
+        offsets: np.ndarray,
+        doc_lengths: np.ndarray,
+        ngram: int = 2,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.vocabulary = vocabulary
+        self.doc_ids = doc_ids
+        self.postings = postings
+        self.offsets = offsets
+        self.doc_lengths = doc_lengths
+        self.ngram = ngram
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(
+        cls,
+        doc_ids: Sequence[str],
+        texts: Sequence[str],
+        ngram: int = 2,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "SparseIndex":
+        """문서 목록으로 역색인 생성"""
+        term_postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_lengths = np.zeros(len(texts), dtype=np.int32)
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text, ngram))
+            doc_lengths[doc] = sum(counts.values())
+            for term, freq in counts.items():
+                term_postings[term].append((doc, freq))
+
+        terms = sorted(term_postings)
+        blobs, offsets, position = [], [0], 0
+        for term in terms:
+            previous, values = 0, []
+            for doc, freq in term_postings[term]:
+                values.extend((doc - previous, freq))
+                previous = doc
+            blob = encode_varints(values)
+            blobs.append(blob)
+            position += len(blob)
+            offsets.append(position)
+
+        return cls(
+            vocabulary=StringArray.from_strings(terms),
+            doc_ids=StringArray.from_strings(doc_ids),
+            postings=np.frombuffer(b"".join(blobs), dtype=np.uint8),
+            offsets=np.asarray(offsets, dtype=np.int64),
+            doc_lengths=doc_lengths,
+            ngram=ngram,
+            k1=k1,
+            b=b,
+        )
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        values = decode_varints(np.asarray(self.postings[self.offsets[term_id]:self.offsets[term_id + 1]]))
+        pairs = values.reshape(-1, 2)
+        return np.cumsum(pairs[:, 0]), pairs[:, 1]
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """BM25 점수 상위 top_k개의 (청크 ID, 점수)"""
+        if not len(self):
+            return []
+        scores = np.zeros(len(self), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / (self.avg_doc_length or 1.0))
+        for term, query_freq in Counter(tokenize(query, self.ngram)).items():
+            term_id = self.vocabulary.find(term)
+            if term_id is None:
+                continue
+            docs, freqs = self._postings(term_id)
+            idf = math.log(1 + (len(self) - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += query_freq * idf * freqs * (self.k1 + 1) / (freqs + norm[docs])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.doc_ids[doc], float(scores[doc])) for doc in ranked]
+
+    def save(self, directory: str, generation: int) -> None:
+        """세대 번호를 붙인 파일로 저장하고 마지막에 meta.json을 교체 (읽는 쪽은 항상 완전한 세대를 봄)"""
+        os.makedirs(directory, exist_ok=True)
+        self.postings.tofile(os.path.join(directory, f"postings-{generation}.bin"))
+        np.save(os.path.join(directory, f"offsets-{generation}.npy"), self.offsets)
+        np.save(os.path.join(directory, f"doc_lengths-{generation}.npy"), self.doc_lengths)
+        self.vocabulary.save(directory, "terms", generation)
+        self.doc_ids.save(directory, "doc_ids", generation)
+
+        meta = {
+            "generation": generation,
+            "ngram": self.ngram,
+            "k1": self.k1,
+            "b": self.b,
+        }
+        tmp_path = os.path.join(directory, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+        # 현재와 직전 세대만 남기고 정리 (직전 meta.json을 읽고 아직 파일을 열지 않은 프로세스 보호,
+        # 이미 memmap으로 연 프로세스는 파일이 지워져도 계속 읽을 수 있음)
+        paths = glob.glob(os.path.join(directory, "*-*.*"))
+        older = {_generation(path) for path in paths} - {None, generation}
+        keep = {generation, max((old for old in older if old < generation), default=None)}
+        for path in paths:
+            if _generation(path) not in keep:
+                os.remove(path)
+
+    @classmethod
+    def load(cls, directory: str, retries: int = 3) -> "SparseIndex":
+        """meta.json이 가리키는 세대를 memmap으로 로드
+
+        meta.json을 읽은 뒤 다른 프로세스가 연달아 재구축해 해당 세대 파일이 지워졌으면
+        meta.json을 다시 읽어 새 세대로 재시도한다.
+        """
+        for attempt in range(retries + 1):
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            generation = meta["generation"]
+            try:
+                return cls(
+                    vocabulary=StringArray.load(directory, "terms", generation),
+                    doc_ids=StringArray.load(directory, "doc_ids", generation),
+                    postings=_load_bytes(os.path.join(directory, f"postings-{generation}.bin")),
+                    offsets=np.load(os.path.join(directory, f"offsets-{generation}.npy"), mmap_mode="r"),
+                    doc_lengths=np.load(os.path.join(directory, f"doc_lengths-{generation}.npy"), mmap_mode="r"),
+                    ngram=meta["ngram"],
+                    k1=meta["k1"],
+                    b=meta["b"],
+                )
+            except FileNotFoundError:
+                if attempt == retries:
+                    raise
+                logger.warning(f"희소 인덱스 세대 {generation} 파일이 정리되어 다시 로드 ({attempt + 1}/{retries})")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """여러 순위 목록을 RRF 점수(sum 1 / (k + rank))로 합쳐 정렬"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class SparseIndexRegistry:
+    """컬렉션별 희소 인덱스 관리 (디스크 저장, 지연 로드, 다른 프로세스의 재구축 감지)"""
+
+    def __init__(
+        self,
+        index_root: str,
+        ngram: int = 2,
+        k1: float = 1.2,
+        b: float = 0.75,
+        build_missing: bool = True,
+    ):
+        self.index_root = index_root
+        self.ngram = ngram
+        self.k1 = k1
+        self.b = b
+        self.build_missing = build_missing
+        self._indexes: Dict[str, Tuple[float, SparseIndex]] = {}
+        self._lock = threading.Lock()
+        # 인덱스가 없어 백그라운드에서 구축 중인 컬렉션 / 하이브리드 검색 불가 경고를 남긴 컬렉션
+        self._building: Dict[str, threading.Thread] = {}
+        self._warned: set = set()
+
+    def index_dir(self, collection_name: str) -> str:
+        return os.path.join(self.index_root, f"sparse_{collection_name}")
+
+    def get(self, collection_name: str) -> Optional[SparseIndex]:
+        """컬렉션 인덱스 조회 (meta.json이 바뀌었으면 다시 로드, 없으면 None)
+
+        인덱스가 없으면 경고를 남기고, build_missing이면 백그라운드 구축을 시작한다
+        (구축이 끝날 때까지는 벡터 검색만 사용).
+        """
+        meta_path = os.path.join(self.index_dir(collection_name), "meta.json")
+        try:
+            mtime = os.path.getmtime(meta_path)
+        except OSError:
+            self._on_missing(collection_name)
+            return None
+
+        cached = self._indexes.get(collection_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with self._lock:
+            cached = self._indexes.get(collection_name)
+            if cached is None or cached[0] != mtime:
+                index = SparseIndex.load(self.index_dir(collection_name))
+                logger.info(f"✅ {collection_name} 희소 인덱스 로드 완료 (문서 {len(index)}개, 단어 {len(index.vocabulary)}개)")
+                cached = (mtime, index)
+                self._indexes[collection_name] = cached
+            return cached[1]
+
+    def _on_missing(self, collection_name: str) -> None:
+        if collection_name not in self._warned:
+            self._warned.add(collection_name)
+            action = "백그라운드에서 구축합니다" if self.build_missing else "chromaDB.py --build-sparse로 구축하세요"
+            logger.warning(f"{collection_name} 희소 인덱스가 없어 하이브리드 검색을 사용하지 않습니다. {action}.")
+        if not self.build_missing:
+            return
+        with self._lock:
+            if collection_name in self._building:
+                return
+            thread = threading.Thread(
+                target=self._build_missing,
+                args=(collection_name,),
+                name=f"sparse-build-{collection_name}",
+                daemon=True,
+            )
+            self._building[collection_name] = thread
+        thread.start()
+
+    def _build_missing(self, collection_name: str) -> None:
+        try:
+            self.rebuild(collection_name)
+        except Exception as e:
+            logger.error(f"{collection_name} 희소 인덱스 구축 중 오류 발생: {str(e)}")
+        finally:
+            with self._lock:
+                self._building.pop(collection_name, None)
+
+    def rebuild(self, collection_name: str) -> SparseIndex:
+        """Chroma 컬렉션의 전체 청크로 인덱스를 다시 만들어 저장"""
+        data = chroma_pool.get_collection(collection_name).get(include=["documents"])
+        index = SparseIndex.build(data["ids"], data["documents"], self.ngram, self.k1, self.b)
+
+        index.save(self.index_dir(collection_name), generation=time.time_ns())
+        logger.info(f"✅ {collection_name} 희소 인덱스 재구축 완료 (문서 {len(index)}개)")
+        return index
+
+    def on_invalidate(self, collection_name: str) -> None:
+        """컬렉션에 새 데이터가 인덱싱되면 희소 인덱스 재구축"""
+        if SPARSE_CONFIG["enabled"]:
+            self.rebuild(collection_name)
+
+
+sparse_indexes = SparseIndexRegistry(
+    index_root=settings.vector_db["chroma_db_dir"],
+    ngram=SPARSE_CONFIG["ngram"],
+    k1=SPARSE_CONFIG["k1"],
+    b=SPARSE_CONFIG["b"],
+    build_missing=SPARSE_CONFIG["build_missing"],
+)
+chroma_pool.add_invalidation_listener(sparse_indexes.on_invalidate, background=True)
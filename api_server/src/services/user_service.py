@@ -1,22 +1,22 @@
-import redis
-import json
+import redis.asyncio as aioredis
 import hashlib
 from datetime import datetime
-from core.config import settings
+from fastapi import Depends
+from services.redis_pool import get_redis
 
 class UserService:
-    def __init__(self):
-        self.redis = redis.from_url(settings.REDIS_URL)
+    def __init__(self, redis_client: aioredis.Redis):
+        self.redis = redis_client
     
     def _get_user_key(self, uid: str) -> str:
         return f"user:{uid}"
     
-    def create_user(self, uid: str, password: str) -> bool:
+    async def create_user(self, uid: str, password: str) -> bool:
         """새로운 사용자 생성"""
         user_key = self._get_user_key(uid)
         
         # 이미 존재하는 사용자인지 확인
-        if self.redis.exists(user_key):
+        if await self.redis.exists(user_key):
             return False
             
         # 비밀번호 해싱
@@ -29,13 +29,13 @@ class UserService:
             "created_at": datetime.now().isoformat()
         }
         
-        self.redis.hset(user_key, mapping=user_data)
+        await self.redis.hset(user_key, mapping=user_data)
         return True
     
-    def verify_user(self, uid: str, password: str) -> bool:
+    async def verify_user(self, uid: str, password: str) -> bool:
         """사용자 인증"""
         user_key = self._get_user_key(uid)
-        user_data = self.redis.hgetall(user_key)
+        user_data = await self.redis.hgetall(user_key)
         
         if not user_data:
             return False
@@ -44,4 +44,9 @@ class UserService:
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
         stored_password = user_data.get(b"password", b"").decode()
         
-        return stored_password == hashed_password
\ No newline at end of file
+        return stored_password == hashed_password
+
+
+def get_user_service(redis_client: aioredis.Redis = Depends(get_redis)) -> UserService:
+    """FastAPI 의존성: 공유 Redis 풀을 사용하는 UserService"""
+    return UserService(redis_client)
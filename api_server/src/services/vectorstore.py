@@ -0,0 +1,246 @@
+from typing import Any, Callable, Dict, List, Optional
+import atexit
+import logging
+import threading
+import time
+
+import chromadb
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import EmbeddingFunction
+
+from core.config import settings
+from services.embedding import get_collection_engine, registry
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionEmbeddingFunction(EmbeddingFunction):
+    """Chroma 컬렉션에 연결하는 임베딩 함수 (컬렉션에 선언된 엔진 사용)"""
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+
+    # chromadb는 인자 이름이 input인지 검사하므로 이름을 맞춘다
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return get_collection_engine(self.collection_name).encode(input).tolist()
+
+
+class ChromaClientPool:
+    """프로세스 전역 Chroma 클라이언트 및 컬렉션 핸들 풀
+
+    컬렉션별 핸들을 한 번만 열어 재사용하고, 문서 개수는 백그라운드 스레드가
+    주기적으로 갱신한다. 인덱싱 후에는 invalidate()로 즉시 갱신을 요청한다.
+
+    무거운 무효화 리스너(희소 인덱스 재구축, 점수 보정)는 background=True로 등록하며,
+    호출한 스레드를 막지 않고 컬렉션을 dirty로 표시만 한다. 마지막 무효화 후 rebuild_delay초
+    동안 추가 무효화가 없으면 백그라운드 스레드가 컬렉션당 한 번만 실행한다.
+    """
+
+    def __init__(self, persist_directory: str, refresh_interval: float = 30.0, rebuild_delay: float = 5.0):
+        self.persist_directory = persist_directory
+        self.refresh_interval = refresh_interval
+        self.rebuild_delay = rebuild_delay
+        self._client: Optional[Any] = None
+        self._collections: Dict[str, Collection] = {}
+        self._counts: Dict[str, int] = {}
+        # get_collection이 잠금을 잡은 채 client를 생성하므로 재진입 가능해야 함
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._invalidation_listeners: List[Callable[[str], None]] = []
+        self._background_listeners: List[Callable[[str], None]] = []
+        # 컬렉션 -> 마지막 무효화 시각 (백그라운드 리스너 실행 대기)
+        self._dirty: Dict[str, float] = {}
+        self._dirty_changed = threading.Condition()
+        self._rebuild_lock = threading.Lock()
+        self._rebuilder: Optional[threading.Thread] = None
+        self.rebuilds = 0
+
+    @property
+    def client(self) -> Any:
+        """영속 Chroma 클라이언트 (최초 접근 시 생성)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    logger.info(f"🔄 ChromaDB 연결 중: {self.persist_directory}")
+                    self._client = chromadb.PersistentClient(path=self.persist_directory)
+        return self._client
+
+    def get_collection(self, collection_name: str) -> Collection:
+        """캐시된 컬렉션 핸들 조회 (없으면 선언된 거리 공간으로 생성)"""
+        collection = self._collections.get(collection_name)
+        if collection is not None:
+            return collection
+
+        with self._lock:
+            if collection_name not in self._collections:
+                embedding_function = CollectionEmbeddingFunction(collection_name)
+                try:
+                    # 기존 컬렉션은 메타데이터를 건드리지 않음 (거리 공간은 생성 시에만 정해짐)
+                    collection = self.client.get_collection(
+                        name=collection_name,
+                        embedding_function=embedding_function,
+                    )
+                except Exception:
+                    collection = self.client.get_or_create_collection(
+                        name=collection_name,
+                        embedding_function=embedding_function,
+                        metadata=self.creation_metadata(collection_name),
+                    )
+                self._collections[collection_name] = collection
+            return self._collections[collection_name]
+
+    @staticmethod
+    def creation_metadata(collection_name: str) -> Dict[str, Any]:
+        """새 컬렉션에 기록할 메타데이터 (선언된 거리 공간, 저장 벡터의 정규화 여부)"""
+        declared = registry.collection_config(collection_name)
+        return {"hnsw:space": declared["space"], "normalized": declared["normalize"]}
+
+    def space(self, collection_name: str) -> str:
+        """컬렉션이 실제로 생성된 거리 공간 (이전에 만든 컬렉션은 선언과 다를 수 있음)"""
+        metadata = self.get_collection(collection_name).metadata or {}
+        return metadata.get("hnsw:space", "l2")
+
+    def normalized(self, collection_name: str) -> bool:
+        """저장된 벡터가 L2 정규화되어 있는지 (기록이 없는 이전 컬렉션은 정규화되지 않은 것으로 간주)"""
+        metadata = self.get_collection(collection_name).metadata or {}
+        return bool(metadata.get("normalized", False))
+
+    def count(self, collection_name: str) -> int:
+        """캐시된 문서 개수 조회 (최초 1회만 직접 집계)"""
+        if collection_name not in self._counts:
+            self._refresh_count(collection_name)
+        return self._counts[collection_name]
+
+    def _refresh_count(self, collection_name: str) -> None:
+        self._counts[collection_name] = self.get_collection(collection_name).count()
+
+    def add_invalidation_listener(self, listener: Callable[[str], None], background: bool = False) -> None:
+        """컬렉션 무효화 시 호출할 콜백 등록
+
+        Args:
+            listener: 컬렉션 이름을 받는 콜백
+            background: True면 여러 번의 무효화를 모아 백그라운드에서 한 번만 실행 (예: 인덱스 재구축).
+                False면 invalidate()를 호출한 스레드에서 바로 실행 (예: 답변 캐시 무효화)
+        """
+        if background:
+            self._background_listeners.append(listener)
+        else:
+            self._invalidation_listeners.append(listener)
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        """새 데이터가 인덱싱되었음을 알림 (핸들 재오픈, 개수 즉시 갱신, 리스너 호출)
+
+        Args:
+            collection_name: 대상 컬렉션. None이면 전체 컬렉션
+        """
+        with self._lock:
+            names = [collection_name] if collection_name else list(self._collections)
+            for name in names:
+                self._collections.pop(name, None)
+        for name in names:
+            try:
+                self._refresh_count(name)
+            except Exception as e:
+                logger.error(f"{name} 문서 개수 갱신 중 오류 발생: {str(e)}")
+            self._run_listeners(self._invalidation_listeners, name)
+
+        if names and self._background_listeners:
+            with self._dirty_changed:
+                now = time.monotonic()
+                for name in names:
+                    self._dirty[name] = now
+                self._dirty_changed.notify_all()
+            self._ensure_rebuilder()
+
+    @staticmethod
+    def _run_listeners(listeners: List[Callable[[str], None]], name: str) -> None:
+        for listener in listeners:
+            try:
+                listener(name)
+            except Exception as e:
+                logger.error(f"{name} 무효화 리스너 실행 중 오류 발생: {str(e)}")
+
+    def _rebuild(self, names: List[str]) -> None:
+        # 같은 컬렉션의 재구축이 워커와 flush()에서 동시에 실행되지 않도록 직렬화
+        with self._rebuild_lock:
+            for name in names:
+                self._run_listeners(self._background_listeners, name)
+                self.rebuilds += 1
+
+    def _next_due(self) -> List[str]:
+        """무효화가 rebuild_delay초 동안 잠잠해진 컬렉션이 생길 때까지 대기"""
+        with self._dirty_changed:
+            while True:
+                now = time.monotonic()
+                due = [name for name, updated in self._dirty.items() if now - updated >= self.rebuild_delay]
+                if due:
+                    for name in due:
+                        del self._dirty[name]
+                    return due
+                if self._dirty:
+                    timeout = min(self._dirty.values()) + self.rebuild_delay - now
+                    self._dirty_changed.wait(timeout)
+                else:
+                    self._dirty_changed.wait()
+
+    def _rebuild_loop(self) -> None:
+        while True:
+            self._rebuild(self._next_due())
+
+    def _ensure_rebuilder(self) -> None:
+        if self._rebuilder is not None:
+            return
+        with self._dirty_changed:
+            if self._rebuilder is None:
+                self._rebuilder = threading.Thread(
+                    target=self._rebuild_loop,
+                    name="chroma-rebuilder",
+                    daemon=True,
+                )
+                self._rebuilder.start()
+                # CLI 인덱싱처럼 곧바로 종료하는 프로세스도 남은 재구축을 실행하고 끝나도록
+                atexit.register(self.flush)
+
+    def flush(self) -> None:
+        """대기 중인 백그라운드 리스너를 지금 호출한 스레드에서 실행"""
+        with self._dirty_changed:
+            names = list(self._dirty)
+            self._dirty.clear()
+        if names:
+            self._rebuild(names)
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.wait(self.refresh_interval):
+            for name in list(self._collections):
+                try:
+                    self._refresh_count(name)
+                except Exception as e:
+                    logger.error(f"{name} 문서 개수 갱신 중 오류 발생: {str(e)}")
+
+    def start(self) -> None:
+        """문서 개수 백그라운드 갱신 시작"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            name="chroma-count-refresher",
+            daemon=True,
+        )
+        self._refresher.start()
+
+    def stop(self) -> None:
+        """백그라운드 갱신 중지 (대기 중인 재구축은 실행하고 종료)"""
+        self._stop_event.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=self.refresh_interval)
+            self._refresher = None
+        self.flush()
+
+
+chroma_pool = ChromaClientPool(
+    persist_directory=settings.vector_db["chroma_db_dir"],
+    refresh_interval=settings.vector_db["count_refresh_interval"],
+    rebuild_delay=settings.vector_db["rebuild_delay"],
+)
@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from core.config import settings
+from services.embedding_cache import normalize_query
+from services.sparse_index import reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
+
+WEB_SEARCH_CONFIG = settings.web_search
+
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적 서버 오류)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class WebSearchError(Exception):
+    """웹 검색 API 호출 실패 (재시도 후에도 실패한 경우 포함)"""
+
+
+class TTLCache:
+    """항목 수 제한이 있는 TTL 캐시 (이벤트 루프 안에서만 사용하므로 잠금 없음)"""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class WebSearchClient:
+    """Google Custom Search 비동기 클라이언트
+
+    keep-alive 커넥션 풀을 공유하는 httpx.AsyncClient로 호출하고, 일시적 오류는
+    지수 백오프 + 지터로 재시도한다. 결과는 정규화된 질의를 키로 TTL 캐시에 저장한다.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        cx: str,
+        endpoint: str = "https://www.googleapis.com/customsearch/v1",
+        timeout: float = 5.0,
+        connect_timeout: float = 2.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        retries: int = 2,
+        backoff: float = 0.2,
+        max_backoff: float = 2.0,
+        max_concurrency: int = 4,
+        cache_ttl: float = 600.0,
+        cache_max_entries: int = 1000,
+        rrf_k: int = 60,
+        query_templates: Sequence[str] = ("{query}",),
+    ):
+        self.api_key = api_key
+        self.cx = cx
+        self.endpoint = endpoint
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.rrf_k = rrf_k
+        self.query_templates = list(query_templates)
+        self.cache = TTLCache(max_entries=cache_max_entries, ttl=cache_ttl)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    def _retry_delay(self, attempt: int) -> float:
+        """full jitter 백오프: [0, min(max_backoff, backoff * 2^attempt)]"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def _request(self, query: str) -> Dict[str, Any]:
+        """검색 API 호출 (질의는 httpx가 URL 인코딩)"""
+        params = {"key": self.api_key, "cx": self.cx, "q": query}
+        attempt = 0
+        while True:
+            self.requests += 1
+            try:
+                response = await self.client.get(self.endpoint, params=params)
+            except httpx.TransportError as e:
+                error: Exception = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    if response.is_error:
+                        self.failures += 1
+                        raise WebSearchError(f"HTTP {response.status_code}")
+                    return response.json()
+                error = WebSearchError(f"HTTP {response.status_code}")
+
+            if attempt >= self.retries:
+                self.failures += 1
+                raise WebSearchError(f"웹 검색 실패 ({query}): {error}") from error
+            self.retried += 1
+            await asyncio.sleep(self._retry_delay(attempt))
+            attempt += 1
+
+    def expand(self, query: str) -> List[str]:
+        """설정된 템플릿으로 재구성한 질의 목록 (예: "{query} 뉴스")"""
+        return [template.format(query=query) for template in self.query_templates]
+
+    async def search(self, query: str) -> List[Dict[str, Any]]:
+        """단일 질의 검색 결과 (캐시 우선)"""
+        key = normalize_query(query)
+        items = self.cache.get(key)
+        if items is None:
+            data = await self._request(query)
+            items = data.get("items", [])
+            self.cache.put(key, items)
+        return items
+
+    async def search_many(self, queries: Sequence[str]) -> List[Dict[str, Any]]:
+        """여러 질의(재구성된 질의 포함)를 동시에 검색하고 결과를 RRF로 병합
+
+        같은 링크는 하나로 합치며, 일부 질의가 실패해도 나머지 결과를 반환한다.
+        모든 질의가 실패하면 WebSearchError.
+
+        Returns:
+            병합된 검색 결과 (각 항목에 fused_score 포함, 점수 내림차순)
+        """
+        unique_queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def limited(query: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.search(query)
+
+        results = await asyncio.gather(*(limited(q) for q in unique_queries), return_exceptions=True)
+
+        rankings, items_by_link = [], {}
+        for query, result in zip(unique_queries, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"웹 검색 질의 실패 ({query}): {str(result)}")
+                continue
+            ranking = []
+            for web_item in result:
+                link = web_item.get("link") or web_item.get("title") or web_item.get("snippet", "")
+                if link in ranking:
+                    continue
+                items_by_link.setdefault(link, web_item)
+                ranking.append(link)
+            rankings.append(ranking)
+
+        if unique_queries and not rankings:
+            raise WebSearchError("모든 웹 검색 질의가 실패했습니다.")
+        return [
+            {**items_by_link[link], "fused_score": score}
+            for link, score in reciprocal_rank_fusion(rankings, k=self.rrf_k)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "failures": self.failures,
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+web_search = WebSearchClient(
+    api_key=settings.GOOGLE_SEARCH_API_KEY,
+    cx=settings.GOOGLE_CX,
+    **WEB_SEARCH_CONFIG,
+)
@@ -1,2 +1,2 @@
 from .parsing_utils import FastApiArgument
-from .streaming_utils import StreamingResponse
+from .streaming_utils import StreamingResponse, ndjson_line
@@ -0,0 +1,154 @@
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+import math
+import re
+
+from core.config import settings
+from models import Document
+
+_HANGUL_PATTERN = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+_SPACE_PATTERN = re.compile(r"\s")
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """LLM 토큰 수 추정 (API 호출 없이)
+
+    한글은 음절당 약 1토큰, 그 외 문자는 chars_per_token 글자당 1토큰으로 계산한다.
+    """
+    if not text:
+        return 0
+    hangul = len(_HANGUL_PATTERN.findall(text))
+    others = len(text) - hangul - len(_SPACE_PATTERN.findall(text))
+    return hangul + math.ceil(others / chars_per_token)
+
+
+def _message_text(message: Any) -> str:
+    """langchain 메시지 또는 {"role", "content"} dict의 본문"""
+    if isinstance(message, dict):
+        return message.get("content", "")
+    return getattr(message, "content", str(message))
+
+
+def _overlap(left: str, right: str, min_overlap: int, max_overlap: int) -> int:
+    """left의 끝과 right의 시작이 겹치는 최대 길이 (min_overlap 미만이면 0)"""
+    for size in range(min(len(left), len(right), max_overlap), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def dedupe_chunks(
+    documents: Sequence[Document],
+    min_overlap: int = 32,
+    max_overlap: int = 512,
+) -> List[Document]:
+    """점수순으로 정렬하고 중복 / 겹치는 청크 정리
+
+    이미 선택된 청크에 포함된 청크는 버리고, 분할 시 생긴 앞뒤 겹침은 뒤 청크에서 잘라낸다.
+    """
+    ordered = sorted(documents, key=lambda doc: doc.score, reverse=True)
+    selected: List[Document] = []
+    for doc in ordered:
+        text = doc.text.strip()
+        for kept in selected:
+            if not text or text in kept.text:
+                text = ""
+                break
+            # 선택된 청크 뒤에 이어지는 청크 -> 앞부분 겹침 제거
+            size = _overlap(kept.text, text, min_overlap, max_overlap)
+            if size:
+                text = text[size:].strip()
+                continue
+            # 선택된 청크 앞에 오는 청크 -> 뒷부분 겹침 제거
+            size = _overlap(text, kept.text, min_overlap, max_overlap)
+            if size:
+                text = text[:-size].strip()
+        if text:
+            selected.append(doc if text == doc.text else doc.model_copy(update={"text": text}))
+    return selected
+
+
+@dataclass
+class PackedPrompt:
+    """토큰 예산에 맞춰 선택된 컨텍스트와 대화 이력"""
+    documents: List[Document] = field(default_factory=list)
+    history: List[Any] = field(default_factory=list)
+    context_tokens: int = 0
+    history_tokens: int = 0
+
+    @property
+    def context(self) -> str:
+        return "\n\n".join(doc.text for doc in self.documents)
+
+
+class ContextPacker:
+    """RAG 프롬프트용 컨텍스트 / 대화 이력 토큰 예산 배분기
+
+    대화 이력은 최근 메시지부터 history_ratio 몫까지 채우고, 남은 예산은 모두
+    컨텍스트(점수순, 중복 제거)에 사용한다.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 6000,
+        history_ratio: float = 0.3,
+        chars_per_token: float = 4.0,
+        min_overlap: int = 32,
+        max_overlap: int = 512,
+    ):
+        self.max_tokens = max_tokens
+        self.history_ratio = history_ratio
+        self.chars_per_token = chars_per_token
+        self.min_overlap = min_overlap
+        self.max_overlap = max_overlap
+
+    def count(self, text: str) -> int:
+        return estimate_tokens(text, self.chars_per_token)
+
+    def pack_history(self, messages: Sequence[Any], budget: int) -> List[Any]:
+        """예산 안에서 가장 최근 메시지들 (원래 순서 유지)"""
+        kept, used = [], 0
+        for message in reversed(messages):
+            tokens = self.count(_message_text(message))
+            if used + tokens > budget:
+                break
+            kept.append(message)
+            used += tokens
+        return kept[::-1]
+
+    def pack_documents(self, documents: Sequence[Document], budget: int) -> List[Document]:
+        """점수순으로 예산에 들어가는 청크만 선택 (큰 청크가 안 들어가면 다음 청크 시도)"""
+        packed, used = [], 0
+        for doc in dedupe_chunks(documents, self.min_overlap, self.max_overlap):
+            tokens = self.count(doc.text)
+            if used + tokens > budget:
+                continue
+            packed.append(doc)
+            used += tokens
+        return packed
+
+    def pack(
+        self,
+        documents: Sequence[Document],
+        history: Optional[Sequence[Any]] = None,
+        reserved_tokens: int = 0,
+    ) -> PackedPrompt:
+        """컨텍스트와 대화 이력을 전체 예산(max_tokens - reserved_tokens)에 맞춰 선택
+
+        Args:
+            reserved_tokens: 질문, 템플릿 등 이미 사용 중인 토큰 수
+        """
+        budget = max(self.max_tokens - reserved_tokens, 0)
+        packed_history = self.pack_history(history or [], int(budget * self.history_ratio))
+        history_tokens = sum(self.count(_message_text(message)) for message in packed_history)
+
+        packed_documents = self.pack_documents(documents, budget - history_tokens)
+        return PackedPrompt(
+            documents=packed_documents,
+            history=packed_history,
+            context_tokens=sum(self.count(doc.text) for doc in packed_documents),
+            history_tokens=history_tokens,
+        )
+
+
+context_packer = ContextPacker(**settings.context_packing)
@@ -49,4 +49,31 @@ WEB_RAG_TEMPLATE = """
     질문: {query}
 
     답변:
-    """
\ No newline at end of file
+    """
+
+SUMMARY_TEMPLATE = """
+다음은 주식 정보 챗봇과 사용자의 이전 대화 요약과, 그 이후에 이어진 대화이다.
+이어진 대화 내용을 반영하여 요약을 갱신한다.
+사용자가 관심을 보인 종목, 기업, 수치, 질문의 흐름을 빠짐없이 남기고 인사말 등은 생략한다.
+요약만 출력한다.
+
+이전 요약: {summary}
+
+이어진 대화:
+{conversation}
+
+갱신된 요약:
+"""
+
+RECOMMEND_TEMPLATE = """
+    질문과 다음 정보들을 참고하여 5가지 후속 질문을 추천하도록 한다.
+    기업, 종목, 주식, 주가, 주주 가치 제고, 향후 전망에 대한 질문이어도 좋고 아니어도 좋다.
+    관련하여 세계 경제에 대한 질문이어도 좋고 아니어도 좋다.
+    생각하지 못한 관점 또는 창의적인 관점에서 질문 5가지를 추천하도록 한다.
+    각 질문은 한 문장으로 구성되어 간결하면서도 그럼에도 직관적이어야 한다.
+    양식은 질문 앞에 @ 특수기호를 붙여서 각 질문을 구분할 수 있도록 한다.
+
+    질문: {query}
+
+    추천 질문:
+    """
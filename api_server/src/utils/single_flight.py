@@ -0,0 +1,112 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+
+class SharedStream:
+    """하나의 비동기 스트림을 여러 구독자에게 복제 (tee)
+
+    원본은 별도 작업에서 소비하며 받은 항목을 모두 보관하므로, 늦게 합류한 구독자도
+    처음부터 같은 항목을 받는다. 구독자가 모두 나가면 원본 소비를 취소한다.
+    """
+
+    def __init__(self, source: AsyncIterator[T]):
+        self.items: List[T] = []
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+        self.task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for item in source:
+                async with self._changed:
+                    self.items.append(item)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    def subscribe(self) -> AsyncIterator[T]:
+        # 구독 수는 제너레이터가 시작되기 전에 세어, 첫 항목을 기다리는 구독자가 있는 동안 취소되지 않게 함
+        self.subscribers += 1
+        return self._follow()
+
+    async def _follow(self) -> AsyncIterator[T]:
+        try:
+            index = 0
+            while True:
+                while index < len(self.items):
+                    yield self.items[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self.items) or self.done)
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # 결과는 구독자 쪽에서만 쓰임 (답변 캐시 저장도 끝까지 받은 구독자가 함)
+                # 남은 구독자가 없으면 끝까지 생성해도 쓸 곳이 없으므로 LLM 호출을 취소
+                self.cancelled = True
+                self.task.cancel()
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청을 하나의 실행으로 합침 (request coalescing)
+
+    실행 중인 호출이 있으면 새로 실행하지 않고 그 결과를 함께 기다린다. 호출이 끝나면 키를
+    제거하므로 결과를 저장하는 캐시가 아니다. 공유 작업은 별도 태스크로 실행되어 처음 요청한
+    클라이언트가 연결을 끊어도 다른 대기자에게 영향을 주지 않는다.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._streams: Dict[Hashable, SharedStream] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """key의 실행 결과 (실행 중이면 합류, 아니면 fn 실행)"""
+        future = self._calls.get(key)
+        if future is None:
+            self.executed += 1
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda finished: self._forget(self._calls, key, finished))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """key의 스트림 구독 (진행 중이면 같은 스트림을 처음부터 복제해서 받음)"""
+        shared = self._streams.get(key)
+        if shared is None or shared.cancelled:
+            # 취소 중인 스트림은 끝까지 나오지 않으므로 새로 시작
+            self.executed += 1
+            shared = SharedStream(factory())
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda _: self._forget(self._streams, key, shared))
+        else:
+            self.coalesced += 1
+        return shared.subscribe()
+
+    @staticmethod
+    def _forget(calls: Dict[Hashable, Any], key: Hashable, value: Any) -> None:
+        if calls.get(key) is value:
+            del calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._streams),
+        }
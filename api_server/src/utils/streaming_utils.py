@@ -19,6 +19,11 @@ AsyncContentStream = typing.AsyncIterable[Content]
 ContentStream = typing.Union[AsyncContentStream, SyncContentStream]
 
 
+def ndjson_line(frame: typing.Dict[str, Any]) -> str:
+    """NDJSON 스트리밍 프레임 한 줄 생성"""
+    return json.dumps(frame, ensure_ascii=False) + "\n"
+
+
 def parse_stream(x: Content, model_type: typing.Literal['PyTriton'] = "Others") -> Content:
     if model_type == "PyTriton":
         return json.loads(re.sub("^data: ?", "", x.decode("utf-8")))["text"]
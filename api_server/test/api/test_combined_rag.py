@@ -0,0 +1,92 @@
+"""리포트 + 웹 통합 검색 테스트"""
+
+import asyncio
+
+from api.endpoints import combined_rag
+from models import Document, RagItem
+
+
+def doc(doc_id, text, score=0.9):
+    return Document(id=doc_id, text=text, metadata={}, score=score)
+
+
+def make_item():
+    return RagItem(id="c", name="u", group_id="chat", query="삼성전자 실적")
+
+
+def patch_sources(monkeypatch, vector_docs, web_docs, vector_delay=0.0, web_delay=0.0):
+    async def fake_vector(item):
+        await asyncio.sleep(vector_delay)
+        return vector_docs
+
+    async def fake_web(item):
+        await asyncio.sleep(web_delay)
+        if isinstance(web_docs, Exception):
+            raise web_docs
+        return web_docs
+
+    monkeypatch.setattr(combined_rag, "_vector_documents", fake_vector)
+    monkeypatch.setattr(combined_rag, "_web_documents", fake_web)
+
+
+def test_merge_interleaves_sources_and_dedupes_text():
+    merged = combined_rag.merge_documents([
+        [doc("1", "리포트 A", 0.9), doc("2", "공통 문장", 0.8)],
+        [doc("web:1", "공통 문장", 1.0), doc("web:2", "웹 B", 0.5)],
+    ])
+
+    assert [d.text for d in merged] == ["공통 문장", "리포트 A", "웹 B"]
+    assert merged[0].id == "2"
+    assert merged[0].metadata["source_score"] == 0.8
+
+
+def test_runs_sources_concurrently(monkeypatch):
+    patch_sources(monkeypatch, [doc("1", "리포트")], [doc("web:1", "웹")], vector_delay=0.2, web_delay=0.2)
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        docs = await combined_rag.retrieve_combined(make_item(), deadline_ms=1000)
+        return docs, loop.time() - started
+
+    docs, elapsed = asyncio.run(timed())
+    assert {d.text for d in docs} == {"리포트", "웹"}
+    assert elapsed < 0.35
+
+
+def test_deadline_uses_arrived_results(monkeypatch):
+    patch_sources(monkeypatch, [doc("1", "리포트")], [doc("web:1", "웹")], web_delay=1.0)
+
+    docs = asyncio.run(combined_rag.retrieve_combined(make_item(), deadline_ms=100))
+    assert [d.text for d in docs] == ["리포트"]
+
+
+def test_failed_source_is_skipped(monkeypatch):
+    patch_sources(monkeypatch, [doc("1", "리포트")], RuntimeError("quota"))
+
+    docs = asyncio.run(combined_rag.retrieve_combined(make_item(), deadline_ms=500))
+    assert [d.text for d in docs] == ["리포트"]
+
+
+def test_cancelled_request_cancels_child_searches(monkeypatch):
+    cancelled = []
+
+    async def slow(item):
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(combined_rag, "_vector_documents", slow)
+    monkeypatch.setattr(combined_rag, "_web_documents", slow)
+
+    async def scenario():
+        request = asyncio.create_task(combined_rag.retrieve_combined(make_item(), deadline_ms=1000))
+        await asyncio.sleep(0.02)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return list(cancelled)  # 이벤트 루프 종료 시의 일괄 취소가 아니라 요청 취소 시점에 취소됐는지 확인
+
+    assert asyncio.run(scenario()) == [True, True]
@@ -0,0 +1,75 @@
+"""RAG 토큰 스트리밍 (NDJSON 프레임) 테스트"""
+
+import asyncio
+import json
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import PromptTemplate
+
+from api.endpoints import rag
+from models import RagItem
+from services.redis_memory import RedisMemory
+from utils.streaming_utils import ndjson_line
+
+
+def make_prepared(**kwargs):
+    return rag.PreparedRag(
+        prompt=PromptTemplate(input_variables=["query"], template="{query}"),
+        inputs={"query": "삼성전자 전망은?"},
+        context="ctx",
+        **kwargs
+    )
+
+
+def collect(prepared, llm, memory):
+    item = RagItem(id="conv", name="u", group_id="chat", query="삼성전자 전망은?")
+
+    async def consume():
+        return [ndjson_line(frame) async for frame in rag.stream_prepared(item, llm, prepared, memory)]
+
+    return [json.loads(line) for line in asyncio.run(consume())]
+
+
+def test_stream_sends_context_deltas_then_done(monkeypatch, fake_redis, async_redis):
+    prefetched = []
+    monkeypatch.setattr(rag.recommendations, "schedule_prefetch", lambda *args: prefetched.append(args))
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="반도체 업황 개선이 기대됩니다.")]))
+
+    frames = collect(make_prepared(), llm, RedisMemory(conversation_id="conv", redis_client=async_redis))
+
+    events = [frame["event"] for frame in frames]
+    deltas = [frame["delta"] for frame in frames if frame["event"] == "delta"]
+    assert events[0] == "context" and frames[0]["context"] == "ctx"
+    assert events[-1] == "done"
+    assert len(deltas) > 1                            # 답변 전체가 아니라 새로 생성된 조각만 전송
+    assert "".join(deltas) == frames[-1]["answer"] == "반도체 업황 개선이 기대됩니다."
+    assert [json.loads(raw)["content"] for raw in fake_redis.lists["chat:conv"]] == [
+        "삼성전자 전망은?", "반도체 업황 개선이 기대됩니다."
+    ]
+    assert prefetched == [("conv", "삼성전자 전망은?", "반도체 업황 개선이 기대됩니다.")]
+
+
+def test_cached_answer_sent_as_single_delta(monkeypatch):
+    monkeypatch.setattr(rag.recommendations, "schedule_prefetch", lambda *args: None)
+    frames = collect(make_prepared(cached_answer="캐시된 답변"), llm=None, memory=None)
+
+    assert [(frame["event"], frame.get("delta")) for frame in frames] == [
+        ("context", None), ("delta", "캐시된 답변"), ("done", None)
+    ]
+
+
+def test_done_sent_even_if_saving_the_turn_fails(monkeypatch, fake_redis, async_redis):
+    def broken_prefetch(*args):
+        raise RuntimeError("event loop closed")
+
+    def broken_rpush(*args):
+        raise ConnectionError("Redis 연결 끊김")
+
+    monkeypatch.setattr(rag.recommendations, "schedule_prefetch", broken_prefetch)
+    monkeypatch.setattr(fake_redis, "rpush", broken_rpush)
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="반도체 업황 개선")]))
+
+    frames = collect(make_prepared(), llm, RedisMemory(conversation_id="conv", redis_client=async_redis))
+
+    assert frames[-1] == {"event": "done", "answer": "반도체 업황 개선"}
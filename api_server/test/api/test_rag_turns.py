@@ -0,0 +1,83 @@
+"""실패하거나 중단된 RAG 턴 저장 테스트"""
+
+import asyncio
+import json
+
+from api.endpoints import rag
+from models import RagItem
+from services.redis_memory import RedisMemory
+
+
+def make_item():
+    return RagItem(id="conv", name="u", group_id="chat", query="삼성전자 전망은?")
+
+
+def make_memory(async_redis):
+    return RedisMemory(conversation_id="conv", redis_client=async_redis)
+
+
+def saved(redis):
+    return [
+        (record["role"], record["content"], record["metadata"].get("status"))
+        for record in map(json.loads, redis.lists.get("chat:conv", []))
+    ]
+
+
+def patch_prepared(monkeypatch, deltas, error=None):
+    async def fake_prepare(item, memory=None):
+        return rag.PreparedRag(prompt=None, inputs={}, context="ctx")
+
+    async def fake_stream(llm, prepared):
+        for delta in deltas:
+            await asyncio.sleep(0)
+            yield delta
+        if error is not None:
+            raise error
+
+    monkeypatch.setattr(rag, "prepare_rag", fake_prepare)
+    monkeypatch.setattr(rag, "stream_answer", fake_stream)
+
+
+def test_stream_error_keeps_question(monkeypatch, fake_redis, async_redis):
+    patch_prepared(monkeypatch, ["반도체 ", "업황은"], error=RuntimeError("LLM 오류"))
+
+    async def consume():
+        return [frame["event"] async for frame in rag.stream_rag(make_item(), llm=None, memory=make_memory(async_redis))]
+
+    assert asyncio.run(consume())[-1] == "error"
+    assert saved(fake_redis) == [
+        ("user", "삼성전자 전망은?", None),
+        ("assistant", "반도체 업황은", "error"),
+    ]
+
+
+def test_client_disconnect_keeps_question(monkeypatch, fake_redis, async_redis):
+    patch_prepared(monkeypatch, ["반도체 ", "업황은", " 개선"])
+
+    async def disconnect_after_first_delta():
+        frames = rag.stream_rag(make_item(), llm=None, memory=make_memory(async_redis))
+        async for frame in frames:
+            if frame["event"] == "delta":
+                break
+        await frames.aclose()
+
+    asyncio.run(disconnect_after_first_delta())
+    assert saved(fake_redis) == [
+        ("user", "삼성전자 전망은?", None),
+        ("assistant", "반도체 ", "aborted"),
+    ]
+
+
+def test_failed_request_keeps_question(monkeypatch, fake_redis, async_redis):
+
+    async def failing_prepare(item, memory=None):
+        raise RuntimeError("검색 실패")
+
+    monkeypatch.setattr(rag, "prepare_rag", failing_prepare)
+    output = asyncio.run(rag.rag(make_item(), llm=None, memory=make_memory(async_redis)))
+
+    assert output.answer == rag.ERROR_ANSWER
+    assert saved(fake_redis) == [
+        ("user", "삼성전자 전망은?", None),
+        ("assistant", rag.ERROR_ANSWER, "error"),
+    ]
@@ -0,0 +1,69 @@
+"""의미 기반 답변 캐시 테스트 (메모리 Redis 사용)"""
+
+import asyncio
+
+import numpy as np
+import pytest
+import redis
+
+from services.answer_cache import SemanticAnswerCache
+
+
+@pytest.fixture
+def cache(fake_redis, async_redis):
+    return SemanticAnswerCache(async_redis, fake_redis)
+
+
+def test_lookup_reuses_answer_for_similar_query_and_same_documents(cache):
+    cache.similarity_threshold = 0.95
+    embedding = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+    async def scenario():
+        assert await cache.lookup("reports", embedding, ["a", "b"]) is None
+        await cache.store("reports", "삼성전자 전망은?", embedding, ["b", "a"], "긍정적입니다.")
+        similar = np.array([1.0, 0.05, 0.0], dtype=np.float32)
+        return (
+            await cache.lookup("reports", similar, ["a", "b"]),             # 문서 순서는 무관
+            await cache.lookup("reports", np.array([0.0, 1.0, 0.0]), ["a", "b"]),
+            await cache.lookup("reports", embedding, ["a", "c"]),           # 다른 문서 집합
+        )
+
+    assert asyncio.run(scenario()) == ("긍정적입니다.", None, None)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+def test_invalidate_bumps_generation(cache, fake_redis):
+    embedding = np.ones(3, dtype=np.float32)
+
+    asyncio.run(cache.store("reports", "질문", embedding, ["a"], "답변"))
+    cache.invalidate("reports")
+
+    assert fake_redis.get("answer_cache:reports:generation") == "1"
+    assert asyncio.run(cache.lookup("reports", embedding, ["a"])) is None
+    asyncio.run(cache.store("reports", "질문", embedding, ["a"], "새 답변"))
+    assert asyncio.run(cache.lookup("reports", embedding, ["a"])) == "새 답변"
+
+def test_bucket_trimmed_to_max_entries(cache, fake_redis):
+    cache.max_entries_per_bucket = 2
+    embedding = np.ones(3, dtype=np.float32)
+
+    async def scenario():
+        for i in range(4):
+            await cache.store("reports", f"질문 {i}", embedding, ["a"], f"답변 {i}")
+
+    asyncio.run(scenario())
+    (bucket,) = [values for key, values in fake_redis.hashes.items() if key.startswith("answer_cache:reports:0:")]
+    assert len(bucket) == 2
+
+def test_redis_errors_are_misses_and_log_only_stores(cache, fake_redis, monkeypatch):
+    def timeout(key):
+        raise redis.TimeoutError("Timeout reading from socket")
+
+    monkeypatch.setattr(fake_redis, "get", timeout)
+    embedding = np.ones(3, dtype=np.float32)
+
+    assert asyncio.run(cache.lookup("reports", embedding, ["a"])) is None
+    asyncio.run(cache.store("reports", "질문", embedding, ["a"], "답변"))  # 예외 없이 끝남
+
+    assert cache.stats()["errors"] == 2
+    assert cache.stats()["misses"] == 1
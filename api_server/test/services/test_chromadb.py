@@ -0,0 +1,33 @@
+"""컬렉션 마이그레이션 테스트 (로컬 ChromaDB 사용)"""
+
+import numpy as np
+
+from services import chromaDB
+from services.vectorstore import ChromaClientPool
+
+def test_migrate_reembeds_legacy_collection(tmp_path, monkeypatch):
+    pool = ChromaClientPool(str(tmp_path))
+    # 이전 방식(langchain Chroma): 임베딩 함수 없이 l2로 생성, 정규화 기록 없음
+    legacy = pool.client.create_collection("reports", embedding_function=None)
+    legacy.add(
+        ids=["a", "b", "c"],
+        embeddings=[[3.0, 4.0], [0.0, 5.0], [10.0, 0.0]],
+        documents=["가 문단", "나 문단", "다 문단"],
+        metadatas=[{"page": 0}, {"page": 1}, {"page": 2}],
+    )
+    monkeypatch.setattr(chromaDB, "chroma_pool", pool)
+    monkeypatch.setattr(
+        chromaDB, "generate_text_embeddings",
+        lambda texts, name: np.array([[1.0, 0.0] for _ in texts], dtype=np.float32),
+    )
+    assert not pool.normalized("reports")
+
+    chromaDB.migrate_collection("reports", batch_size=2)
+
+    assert pool.normalized("reports")
+    assert pool.space("reports") == pool.creation_metadata("reports")["hnsw:space"]
+    migrated = pool.get_collection("reports").get(include=["documents", "metadatas", "embeddings"])
+    assert sorted(migrated["ids"]) == ["a", "b", "c"]  # 희소 인덱스가 쓰는 ID 유지
+    assert sorted(metadata["page"] for metadata in migrated["metadatas"]) == [0, 1, 2]
+    assert np.allclose(migrated["embeddings"], [[1.0, 0.0]] * 3)
+    assert sorted(collection.name for collection in pool.client.list_collections()) == ["reports"]
@@ -0,0 +1,98 @@
+"""배치 임베딩 엔진 테스트"""
+
+import numpy as np
+import torch
+from transformers import BatchEncoding
+
+from services.embedding import EmbeddingEngine, EmbeddingModelRegistry
+
+class FakeTokenizer:
+    """첫 글자 코드 + 글자 수만큼의 토큰으로 인코딩하는 토크나이저"""
+
+    def __call__(self, texts, truncation=True, max_length=512, padding=False):
+        input_ids = [([ord(text[0])] + [1] * len(text))[:max_length] for text in texts]
+        return {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+
+    def pad(self, features, padding=True, return_tensors="pt"):
+        width = max(len(ids) for ids in features["input_ids"])
+        return BatchEncoding({
+            key: torch.tensor([row + [0] * (width - len(row)) for row in rows])
+            for key, rows in features.items()
+        })
+
+class FakeModel(torch.nn.Module):
+    """[CLS] 위치에 (첫 토큰 id, 3.0)을 출력하고 배치 모양을 기록하는 모델"""
+
+    def __init__(self):
+        super().__init__()
+        self.config = type("Config", (), {"hidden_size": 2})()
+        self.anchor = torch.nn.Parameter(torch.zeros(1))
+        self.shapes = []
+
+    def forward(self, input_ids, attention_mask):
+        self.shapes.append(tuple(input_ids.shape))
+        hidden = torch.stack([input_ids.float(), torch.full(input_ids.shape, 3.0)], dim=-1)
+        return type("Output", (), {"last_hidden_state": hidden})()
+
+def make_engine(**kwargs):
+    return EmbeddingEngine(FakeTokenizer(), FakeModel(), pooling="cls", **kwargs)
+
+def test_bucketed_batches_restore_input_order():
+    engine = make_engine(batch_size=2)
+    texts = ["a", "bbbbbbb", "", "ccc", "ddddd"]
+    output = engine.encode(texts)
+
+    # 긴 입력부터 배치로 묶고, 배치 안에서는 최대 길이까지만 패딩
+    assert engine.model.shapes == [(2, 8), (2, 4)]
+    assert output.dtype == np.float32 and output.flags["C_CONTIGUOUS"]
+    assert output[:, 0].tolist() == [ord("a"), ord("b"), 0.0, ord("c"), ord("d")]
+    assert output[2].tolist() == [0.0, 0.0]  # 빈 문자열은 0 벡터
+
+def test_max_batch_tokens_splits_batches():
+    engine = make_engine(batch_size=8, max_batch_tokens=10)
+    engine.encode(["aaaa", "bbbb", "cc", "d"])
+    assert all(rows * width <= 10 for rows, width in engine.model.shapes)
+
+def test_normalized_output_has_unit_norm():
+    engine = make_engine(normalize=True)
+    output = engine.encode(["가나다", "abc", " "])
+    norms = np.linalg.norm(output, axis=1)
+    assert np.allclose(norms[:2], 1.0)
+    assert norms[2] == 0.0
+
+def make_registry(monkeypatch):
+    config = {
+        "model": "base", "pooling": "cls", "device": "cpu", "batch_size": 4,
+        "max_length": 16, "max_batch_tokens": None,
+        "collections": {"reports": {"pooling": "mean"}, "news": {"pooling": "mean"}},
+    }
+    registry = EmbeddingModelRegistry(config, {"max_wait_ms": 1})
+    loads = []
+
+    class Loader:
+        def __init__(self, factory):
+            self.factory = factory
+
+        def from_pretrained(self, model_name):
+            loads.append(model_name)
+            return self.factory()
+
+    monkeypatch.setattr("services.embedding.AutoTokenizer", Loader(FakeTokenizer))
+    monkeypatch.setattr("services.embedding.AutoModel", Loader(FakeModel))
+    return registry, loads
+
+def test_registry_reuses_engine_per_collection_config(monkeypatch):
+    registry, loads = make_registry(monkeypatch)
+
+    reports = registry.get_collection_engine("reports")
+    assert registry.get_collection_engine("news") is reports  # 같은 (model, device, pooling)
+    assert registry.get_engine(pooling="mean") is reports
+    assert reports.pooling == "mean"
+    assert registry.get_collection_engine("other").pooling == "cls"  # 미선언 컬렉션은 기본값
+
+    try:
+        assert registry.get_collection_scheduler("reports") is registry.get_collection_scheduler("news")
+    finally:
+        registry.shutdown()
+    assert loads == ["base", "base"]  # 토크나이저 + 가중치를 pooling과 무관하게 한 번만 로드
+    assert reports.model is registry.get_engine().model
@@ -0,0 +1,63 @@
+"""쿼리 임베딩 캐시 테스트"""
+
+import time
+
+import numpy as np
+import pytest
+
+from services.embedding_cache import QueryEmbeddingCache, normalize_query
+
+@pytest.fixture
+def cache():
+    return QueryEmbeddingCache(max_entries=2, max_bytes=1024, ttl=60.0)
+
+def test_normalize_query():
+    assert normalize_query("  삼성전자   4분기\n전망 ") == "삼성전자 4분기 전망"
+    assert normalize_query("ＳＫ하이닉스") == "sk하이닉스"
+
+def test_hit_and_miss(cache):
+    key = cache.make_key("model", "mean", "삼성전자 4분기 전망")
+    assert cache.get(key) is None
+
+    cache.put(key, np.ones(4))
+    same_key = cache.make_key("model", "mean", " 삼성전자  4분기 전망")
+    assert np.array_equal(cache.get(same_key), np.ones(4, dtype=np.float32))
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_key_includes_model_and_pooling(cache):
+    cache.put(cache.make_key("model", "mean", "질문"), np.ones(4))
+    assert cache.get(cache.make_key("model", "cls", "질문")) is None
+    assert cache.get(cache.make_key("other", "mean", "질문")) is None
+
+def test_lru_eviction_by_entries(cache):
+    cache.put("a", np.zeros(4))
+    cache.put("b", np.zeros(4))
+    cache.get("a")
+    cache.put("c", np.zeros(4))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_eviction_by_bytes():
+    cache = QueryEmbeddingCache(max_entries=100, max_bytes=64, ttl=60.0)
+    cache.put("a", np.zeros(8))  # 32 bytes
+    cache.put("b", np.zeros(8))
+    cache.put("c", np.zeros(8))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 64
+    assert cache.get("a") is None
+
+def test_ttl_expiration():
+    cache = QueryEmbeddingCache(max_entries=10, max_bytes=1024, ttl=0.01)
+    cache.put("a", np.zeros(4))
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
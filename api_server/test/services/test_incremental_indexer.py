@@ -0,0 +1,90 @@
+"""증분 인덱싱 변경 감지 테스트"""
+
+import os
+
+import pytest
+
+from services import incremental_indexer
+from services.incremental_indexer import plan_sync, sync_directory
+from services.ingestion import IngestionManifest, IngestionReport
+
+class FakeCollection:
+    def __init__(self):
+        self.deleted = []
+
+    def delete(self, where):
+        self.deleted.append(where["source"])
+
+def write(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+
+@pytest.fixture
+def indexed(tmp_path):
+    """a.pdf, b.pdf, c.pdf가 이미 인덱싱된 디렉토리와 매니페스트"""
+    directory = tmp_path / "pdfs"
+    directory.mkdir()
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"), "test")
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        path = str(directory / name)
+        write(path, name.encode())
+        manifest.mark_done(path, 1)
+    manifest.save()
+    return str(directory), manifest
+
+def test_plan_detects_added_changed_removed(indexed):
+    directory, manifest = indexed
+    write(os.path.join(directory, "a.pdf"), b"new content")
+    os.remove(os.path.join(directory, "c.pdf"))
+    write(os.path.join(directory, "d.pdf"), b"d.pdf")
+
+    diff = plan_sync(directory, IngestionManifest.load(manifest.path, "test"))
+
+    assert diff.added == [os.path.join(directory, "d.pdf")]
+    assert diff.changed == [os.path.join(directory, "a.pdf")]
+    assert diff.removed == [os.path.join(directory, "c.pdf")]
+    assert diff.unchanged == [os.path.join(directory, "b.pdf")]
+
+def test_mtime_only_change_is_not_reindexed(indexed):
+    directory, manifest = indexed
+    path = os.path.join(directory, "b.pdf")
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    diff = plan_sync(directory, IngestionManifest.load(manifest.path, "test"))
+
+    assert not diff.has_changes
+    assert path in diff.touched
+
+def test_sync_deletes_before_reindexing(indexed, monkeypatch):
+    directory, manifest = indexed
+    write(os.path.join(directory, "a.pdf"), b"new content")
+    os.remove(os.path.join(directory, "c.pdf"))
+
+    collection = FakeCollection()
+    indexed_files = []
+
+    def fake_ingest_files(pdf_files, collection_name, manifest, *args):
+        indexed_files.extend(pdf_files)
+        for pdf_path in pdf_files:
+            manifest.mark_done(pdf_path, 1)
+        return IngestionReport(total_files=len(pdf_files), indexed_files=len(pdf_files))
+
+    monkeypatch.setattr(incremental_indexer, "ingest_files", fake_ingest_files)
+    monkeypatch.setattr(incremental_indexer.chroma_pool, "get_collection", lambda name: collection)
+    monkeypatch.setattr(incremental_indexer.chroma_pool, "invalidate", lambda name=None: None)
+
+    dry = sync_directory(directory, "test", manifest_path=manifest.path, dry_run=True)
+    assert dry.diff.has_changes
+    assert collection.deleted == [] and indexed_files == []
+
+    report = sync_directory(directory, "test", manifest_path=manifest.path)
+    assert sorted(collection.deleted) == sorted(
+        [os.path.join(directory, "a.pdf"), os.path.join(directory, "c.pdf")]
+    )
+    assert indexed_files == [os.path.join(directory, "a.pdf")]
+    assert report.ingestion.indexed_files == 1
+
+    # 두 번째 실행은 변경 사항이 없어야 함
+    again = sync_directory(directory, "test", manifest_path=manifest.path)
+    assert not again.diff.has_changes
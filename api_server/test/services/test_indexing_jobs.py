@@ -0,0 +1,83 @@
+"""인덱싱 백그라운드 작업 테스트"""
+
+import time
+
+import numpy as np
+import pytest
+
+from models import Document, IndexingItem
+from services import indexing_jobs as jobs_module
+from core.exceptions import PathNotAllowedError, QueueFullError
+from services.indexing_jobs import IndexingJobManager
+
+class FakeEngine:
+    def encode(self, texts):
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+class FakeCollection:
+    def __init__(self):
+        self.ids = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.ids.extend(ids)
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(jobs_module, "get_collection_engine", lambda name: FakeEngine())
+    monkeypatch.setattr(jobs_module.chroma_pool, "get_collection", lambda name: collection)
+    monkeypatch.setattr(jobs_module.chroma_pool, "invalidate", lambda name=None: None)
+    return collection
+
+def make_item(**kwargs):
+    return IndexingItem(id="1", name="test", group_id="g", collection_name="test", **kwargs)
+
+def wait_for(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.get(job_id).to_status()
+        if status.status in ("done", "failed"):
+            return status
+        time.sleep(0.01)
+    raise TimeoutError(job_id)
+
+def test_job_indexes_documents_and_reports_errors(collection, tmp_path):
+    manager = IndexingJobManager(embed_batch_size=1, data_root=str(tmp_path))
+    item = make_item(
+        documents=[
+            Document(id="a", text="삼성전자 실적 전망", metadata={}),
+            Document(id="b", text="SK하이닉스 목표주가", metadata={}),
+        ],
+        pdf_paths=["nonexistent/report.pdf"],
+    )
+    job = manager.submit(item)
+    status = wait_for(manager, job.job_id)
+
+    assert status.status == "done"
+    assert status.total_sources == 3
+    assert status.processed_sources == 3
+    assert status.indexed_chunks == 2
+    assert len(collection.ids) == 2
+    assert len(status.errors) == 1 and "nonexistent/report.pdf" in status.errors[0]
+    manager.shutdown()
+
+def test_rejects_pdf_paths_outside_data_root(collection, tmp_path):
+    data_root = tmp_path / "pdfs"
+    data_root.mkdir()
+    (tmp_path / "secret.pdf").write_bytes(b"%PDF")
+    (data_root / "link.pdf").symlink_to(tmp_path / "secret.pdf")
+    manager = IndexingJobManager(data_root=str(data_root))
+
+    for path in ["/etc/passwd", "../secret.pdf", str(tmp_path / "secret.pdf"), "link.pdf"]:
+        with pytest.raises(PathNotAllowedError):
+            manager.submit(make_item(pdf_paths=[path]))
+    assert manager.resolve_pdf_path("2024/report.pdf") == str(data_root / "2024" / "report.pdf")
+    with pytest.raises(PathNotAllowedError):
+        IndexingJobManager().submit(make_item(pdf_paths=["report.pdf"]))
+    manager.shutdown()
+
+def test_rejects_when_too_many_pending_jobs(collection):
+    manager = IndexingJobManager(max_pending_jobs=0)
+    with pytest.raises(QueueFullError):
+        manager.submit(make_item(documents=[Document(id="a", text="text", metadata={})]))
+    manager.shutdown()
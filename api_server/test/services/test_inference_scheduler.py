@@ -0,0 +1,108 @@
+"""임베딩 마이크로 배칭 스케줄러 테스트"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from core.exceptions import QueueFullError, SchedulerStoppedError
+from services.inference_scheduler import EmbeddingBatchScheduler
+
+def fake_encode(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+    return encode
+
+def test_concurrent_queries_share_one_batch():
+    calls = []
+    scheduler = EmbeddingBatchScheduler(fake_encode(calls), max_batch_size=8, max_wait_ms=200)
+    try:
+        texts = ["a", "bb", "ccc", "dddd"]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(scheduler.embed, texts))
+    finally:
+        scheduler.stop()
+
+    assert [float(r[0]) for r in results] == [1.0, 2.0, 3.0, 4.0]
+    assert len(calls) < len(texts)
+    assert scheduler.stats()["batch_size"]["count"] == len(calls)
+    assert scheduler.stats()["queue_wait_seconds"]["count"] == len(texts)
+
+def test_batch_size_limit():
+    calls = []
+    scheduler = EmbeddingBatchScheduler(fake_encode(calls), max_batch_size=2, max_wait_ms=50)
+    try:
+        embeddings = scheduler.embed_many(["a", "b", "c", "d", "e"])
+    finally:
+        scheduler.stop()
+
+    assert embeddings.shape == (5, 1)
+    assert all(len(batch) <= 2 for batch in calls)
+
+def test_encode_error_propagates():
+    def failing_encode(texts):
+        raise RuntimeError("boom")
+
+    scheduler = EmbeddingBatchScheduler(failing_encode, max_wait_ms=1)
+    try:
+        with pytest.raises(RuntimeError):
+            scheduler.embed("a")
+    finally:
+        scheduler.stop()
+
+def test_queue_full_backpressure():
+    release = threading.Event()
+
+    def blocking_encode(texts):
+        release.wait()
+        return np.zeros((len(texts), 1), dtype=np.float32)
+
+    scheduler = EmbeddingBatchScheduler(
+        blocking_encode, max_batch_size=1, max_wait_ms=1, max_queue_size=1, enqueue_timeout=0.05
+    )
+    try:
+        first = scheduler.submit("a")
+        # 첫 요청이 추론 스레드로 넘어갈 때까지 대기열이 비기를 기다림
+        while scheduler.stats()["queue_depth"]:
+            pass
+        scheduler.submit("b")
+        with pytest.raises(QueueFullError):
+            scheduler.submit("c")
+        assert scheduler.stats()["rejected"] == 1
+    finally:
+        release.set()
+        first.result()
+        scheduler.stop()
+
+def test_stop_fails_queued_requests_without_blocking():
+    release = threading.Event()
+
+    def blocking_encode(texts):
+        release.wait()
+        return np.zeros((len(texts), 1), dtype=np.float32)
+
+    scheduler = EmbeddingBatchScheduler(
+        blocking_encode, max_batch_size=1, max_wait_ms=1, max_queue_size=1, enqueue_timeout=0.05
+    )
+    first = scheduler.submit("a")
+    while scheduler.stats()["queue_depth"]:
+        pass
+    queued = scheduler.submit("b")  # 대기열이 가득 찬 상태에서 stop
+
+    stopper = threading.Thread(target=scheduler.stop)
+    stopper.start()
+    while not scheduler._stop_event.is_set():
+        pass
+    release.set()
+    stopper.join(timeout=2)
+
+    assert not stopper.is_alive()
+    assert first.result(timeout=1).shape == (1,)  # 실행 중이던 배치는 완료
+    with pytest.raises(SchedulerStoppedError):
+        queued.result(timeout=1)
+
+    # 종료 후 새 요청은 스레드를 다시 시작해 처리
+    assert scheduler.embed("c").shape == (1,)
+    scheduler.stop()
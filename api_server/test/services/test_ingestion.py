@@ -0,0 +1,113 @@
+"""디렉토리 인덱싱 및 청크 저장 테스트"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from services import ingestion
+from services.ingestion import IngestionManifest, ingest_directory, make_chunk_ids, upsert_chunks
+
+class FakeCollection:
+    def __init__(self):
+        self.upserts = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts.append({"ids": ids, "embeddings": embeddings, "documents": documents, "metadatas": metadatas})
+
+class FakeEngine:
+    def encode(self, texts):
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    directory = tmp_path / "pdfs"
+    directory.mkdir()
+    for name in ("a.pdf", "b.pdf", "broken.pdf"):
+        (directory / name).write_bytes(name.encode())
+    return directory
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    """PDF 파싱 / 임베딩 / 저장을 메모리 구현으로 교체 (파싱은 스레드 풀에서 실행)"""
+    collection = FakeCollection()
+    parsed = []
+
+    def load_pdf_chunks(pdf_path, *args):
+        parsed.append(os.path.basename(pdf_path))
+        if pdf_path.endswith("broken.pdf"):
+            raise ValueError("손상된 PDF")
+        return [(f"{os.path.basename(pdf_path)} 본문", {"source": pdf_path, "page": 0})]
+
+    monkeypatch.setattr(ingestion, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(ingestion, "load_pdf_chunks", load_pdf_chunks)
+    monkeypatch.setattr(ingestion, "get_collection_engine", lambda name: FakeEngine())
+    monkeypatch.setattr(ingestion.chroma_pool, "get_collection", lambda name: collection)
+    monkeypatch.setattr(ingestion.chroma_pool, "invalidate", lambda name=None: None)
+    return collection, parsed
+
+def test_manifest_roundtrip_and_change_detection(tmp_path, pdf_dir):
+    path = str(pdf_dir / "a.pdf")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"), "test")
+    manifest.mark_done(path, 3)
+    manifest.save()
+
+    loaded = IngestionManifest.load(manifest.path, "test")
+    assert loaded.is_done(path)
+    assert loaded.files[path]["chunks"] == 3
+    assert not IngestionManifest.load(manifest.path, "other").files  # 다른 컬렉션의 매니페스트는 무시
+
+    (pdf_dir / "a.pdf").write_bytes(b"changed content")
+    assert not loaded.is_done(path)
+
+def test_interrupted_run_resumes_with_remaining_files(tmp_path, pdf_dir, fake_pipeline):
+    collection, parsed = fake_pipeline
+    manifest_path = str(tmp_path / "manifest.json")
+    done = IngestionManifest(manifest_path, "test")
+    done.mark_done(str(pdf_dir / "a.pdf"), 1)  # 이전 실행에서 a.pdf까지 완료
+    done.save()
+
+    report = ingest_directory(str(pdf_dir), "test", manifest_path=manifest_path, num_workers=2, embed_batch_size=1)
+
+    assert sorted(parsed) == ["b.pdf", "broken.pdf"]
+    assert (report.total_files, report.skipped_files, report.indexed_files) == (3, 1, 1)
+    assert report.failed_files == [str(pdf_dir / "broken.pdf")]
+    assert [upsert["documents"] for upsert in collection.upserts] == [["b.pdf 본문"]]
+
+    manifest = IngestionManifest.load(manifest_path, "test")
+    assert manifest.files[str(pdf_dir / "broken.pdf")]["status"] == "failed"
+
+    # 다시 실행하면 실패한 파일만 재시도
+    parsed.clear()
+    report = ingest_directory(str(pdf_dir), "test", manifest_path=manifest_path)
+    assert parsed == ["broken.pdf"]
+    assert report.skipped_files == 2
+
+def test_chunk_ids_are_content_hashes():
+    chunks = [
+        ("반복 문단", {"source": "a.pdf", "page": 0}),
+        ("반복 문단", {"source": "a.pdf", "page": 0}),
+        ("반복 문단", {"source": "a.pdf", "page": 1}),
+        ("다른 문단", {"source": "a.pdf", "page": 0}),
+    ]
+    ids = make_chunk_ids(chunks)
+
+    assert ids == make_chunk_ids([(text, dict(metadata)) for text, metadata in chunks])  # 재인덱싱해도 같은 ID
+    assert len(set(ids)) == len(ids)
+    assert ids[1] == f"{ids[0]}-1"  # 같은 페이지의 반복 텍스트는 등장 순번으로 구분
+
+def test_upsert_writes_precomputed_embeddings():
+    collection = FakeCollection()
+    chunks = [("첫 문단", {"source": "a.pdf", "page": 0}), ("둘째 문단", {"source": "a.pdf", "page": 1})]
+    embeddings = FakeEngine().encode([text for text, _ in chunks])
+
+    assert upsert_chunks(collection, chunks, embeddings) == 2
+    assert upsert_chunks(collection, chunks, embeddings) == 2
+    assert upsert_chunks(collection, [], np.zeros((0, 2))) == 0
+
+    first, second = collection.upserts
+    assert first["ids"] == second["ids"] == make_chunk_ids(chunks)
+    assert first["embeddings"] == embeddings.tolist()
+    assert first["documents"] == ["첫 문단", "둘째 문단"]
+    assert first["metadatas"] == [metadata for _, metadata in chunks]
@@ -0,0 +1,197 @@
+"""LLM 게이트웨이 (동시 실행 / 요청 한도 / 우선순위 / 재시도) 테스트"""
+
+import asyncio
+
+import httpx
+import pytest
+from google.api_core.exceptions import DeadlineExceeded, InvalidArgument, ResourceExhausted, ServiceUnavailable
+from langchain.prompts import PromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from services.llm_gateway import LLMGateway, TokenBucket, is_retryable
+
+
+class FakeBackend:
+    """호출 순서와 동시 실행 수를 기록하고, 앞의 fail_first번은 한도 초과로 실패하는 가짜 LLM"""
+
+    def __init__(self, delay=0.0, fail_first=0, error=ResourceExhausted("429 quota exceeded")):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.error = error
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def ainvoke(self, value, **kwargs):
+        self.calls.append(value)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if len(self.calls) <= self.fail_first:
+                raise self.error
+            return f"answer:{value}"
+        finally:
+            self.running -= 1
+
+    async def astream(self, value, **kwargs):
+        for token in ["a", "b"]:
+            yield token
+
+
+def make_gateway(backend, **kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    kwargs.setdefault("reserve_output_tokens", 0)
+    return LLMGateway(backend, **kwargs)
+
+
+def test_concurrency_is_bounded():
+    backend = FakeBackend(delay=0.02)
+    gateway = make_gateway(backend, max_concurrency=2, requests_per_minute=6000)
+
+    async def scenario():
+        return await asyncio.gather(*(gateway.ainvoke(str(i)) for i in range(6)))
+
+    assert asyncio.run(scenario()) == [f"answer:{i}" for i in range(6)]
+    assert backend.max_running == 2
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_interactive_requests_run_before_background():
+    backend = FakeBackend(delay=0.01)
+    gateway = make_gateway(backend, max_concurrency=1, requests_per_minute=6000)
+
+    async def scenario():
+        first = asyncio.create_task(gateway.ainvoke("busy"))
+        await asyncio.sleep(0)
+        background = [asyncio.create_task(gateway.ainvoke(f"bg{i}", priority="background")) for i in range(2)]
+        interactive = asyncio.create_task(gateway.ainvoke("chat"))
+        await asyncio.gather(first, *background, interactive)
+
+    asyncio.run(scenario())
+    assert backend.calls == ["busy", "chat", "bg0", "bg1"]
+    assert gateway.stats()["completed"] == {"interactive": 2, "background": 2}
+
+
+def test_request_rate_limit_delays_calls():
+    backend = FakeBackend()
+    gateway = make_gateway(backend, requests_per_minute=600)  # 초당 10회, 버킷 600개
+    gateway.requests.tokens = 1
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(gateway.ainvoke("a"), gateway.ainvoke("b"), gateway.ainvoke("c"))
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) >= 0.15
+    assert gateway.stats()["queue_wait_seconds"]["count"] == 3
+
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(per_minute=60)
+    bucket.consume(60)
+    assert bucket.delay(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.delay(600) == pytest.approx(60.0, abs=0.1)  # 한도보다 큰 요청은 가득 찰 때까지만 대기
+
+
+def test_quota_errors_are_retried():
+    backend = FakeBackend(fail_first=2)
+    gateway = make_gateway(backend, max_retries=3)
+
+    assert asyncio.run(gateway.ainvoke("q")) == "answer:q"
+    assert len(backend.calls) == 3
+    assert gateway.stats()["retried"] == 2
+
+
+def test_non_retryable_errors_fail_fast():
+    backend = FakeBackend(fail_first=5, error=ValueError("invalid argument"))
+    gateway = make_gateway(backend, max_retries=3)
+
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.ainvoke("q"))
+    assert len(backend.calls) == 1
+    assert gateway.stats()["failures"] == 1
+
+
+def test_is_retryable():
+    assert is_retryable(ResourceExhausted("Quota exceeded for GenerateContentRequestsPerMinute"))
+    assert is_retryable(ServiceUnavailable("overloaded"))
+    assert is_retryable(DeadlineExceeded("deadline"))
+    assert is_retryable(httpx.ConnectError("connection refused"))
+    response = httpx.Response(503, request=httpx.Request("POST", "https://example.com"))
+    assert is_retryable(httpx.HTTPStatusError("503", request=response.request, response=response))
+
+    wrapped = RuntimeError("generation failed")
+    wrapped.__cause__ = ServiceUnavailable("overloaded")
+    assert is_retryable(wrapped)
+
+
+def test_is_retryable_ignores_status_like_messages():
+    assert not is_retryable(ValueError("invalid argument"))
+    assert not is_retryable(ValueError("max_tokens 5000 exceeded"))
+    assert not is_retryable(RuntimeError("503 Service Unavailable"))
+    assert not is_retryable(InvalidArgument("request has 429 parts"))
+    assert not is_retryable(ResourceExhausted("Quota exceeded for GenerateRequestsPerDayPerProjectPerModel"))
+
+
+def test_gateway_model_works_in_langchain_chain():
+    gateway = make_gateway(FakeListChatModel(responses=["삼성전자는 반도체 기업입니다."]))
+    prompt = PromptTemplate(input_variables=["query"], template="질문: {query}")
+
+    async def scenario():
+        chain = prompt | gateway.bind("interactive")
+        result = await chain.ainvoke({"query": "삼성전자"})
+        chunks = [chunk.content async for chunk in chain.astream({"query": "삼성전자"})]
+        return result.content, "".join(chunks)
+
+    assert asyncio.run(scenario()) == ("삼성전자는 반도체 기업입니다.",) * 2
+    assert gateway.stats()["completed"]["interactive"] == 2
+
+
+def test_sync_invoke_without_running_loop():
+    backend = FakeBackend()
+    model = make_gateway(backend).bind("background")
+    assert model.invoke("q") == "answer:q"
+
+
+def test_sync_invoke_from_worker_thread_uses_gateway_loop():
+    backend = FakeBackend(delay=0.01)
+    gateway = make_gateway(backend, max_concurrency=1)
+
+    async def scenario():
+        busy = asyncio.create_task(gateway.ainvoke("busy"))
+        await asyncio.sleep(0)
+        # 스레드 풀 작업의 동기 호출도 같은 대기열과 동시 실행 한도를 거침
+        result = await asyncio.to_thread(gateway.invoke, "sync")
+        await busy
+        with pytest.raises(RuntimeError):
+            gateway.invoke("blocked")
+        return result
+
+    result = asyncio.run(scenario())
+    assert result == "answer:sync"
+    assert backend.calls == ["busy", "sync"]
+    assert backend.max_running == 1
+
+def test_gemini_backend_does_not_retry_on_its_own(monkeypatch):
+    from langchain_google_genai import chat_models as genai_chat_models
+    from services import llm
+
+    # 백엔드가 바꾼 재시도 데코레이터를 테스트가 끝나면 되돌림
+    monkeypatch.setattr(genai_chat_models, "_create_retry_decorator", genai_chat_models._create_retry_decorator)
+    monkeypatch.setattr(llm.settings, "GOOGLE_API_KEY", "test-key")
+    backend = llm.build_gemini_backend()
+    calls = []
+
+    class FakeAsyncClient:
+        async def generate_content(self, request, **kwargs):
+            calls.append(kwargs)
+            raise ServiceUnavailable("503 overloaded")
+
+    backend.bound.async_client_running = FakeAsyncClient()
+
+    with pytest.raises(ServiceUnavailable):
+        asyncio.run(backend.ainvoke("질문"))
+    assert len(calls) == 1                 # tenacity 재시도 없음
+    assert calls[0]["retry"] is None       # gapic 기본 재시도도 끔
@@ -0,0 +1,81 @@
+"""후속 질문 추천 선생성 테스트"""
+
+import asyncio
+
+from services.recommendations import RecommendationService, parse_questions
+
+
+class FakeRedis:
+    """get / set만 지원하는 메모리 Redis"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class FakeRecommendationService(RecommendationService):
+    def __init__(self, delay=0.0):
+        super().__init__(FakeRedis())
+        self.delay = delay
+        self.generated = []
+
+    async def generate(self, query):
+        self.generated.append(query)
+        await asyncio.sleep(self.delay)
+        return f"@{query} 전망은? @{query} 배당은?"
+
+
+def test_parse_questions():
+    assert parse_questions("추천 질문:\n@첫 질문\n@ 두 번째 질문 \n@") == ["첫 질문", "두 번째 질문"]
+
+
+def test_prefetched_recommendations_served_from_cache():
+    service = FakeRecommendationService()
+
+    async def scenario():
+        service.schedule_prefetch("conv", "삼성전자", "답변")
+        await asyncio.sleep(0.01)
+        return await service.get_or_generate("conv", "삼성전자")
+
+    assert asyncio.run(scenario()) == "@삼성전자 전망은? @삼성전자 배당은?"
+    assert service.generated == ["삼성전자"]
+    assert service.stats()["hits"] == 1
+
+
+def test_request_during_prefetch_waits_instead_of_regenerating():
+    service = FakeRecommendationService(delay=0.05)
+
+    async def scenario():
+        service.schedule_prefetch("conv", "SK하이닉스", "답변")
+        return await service.get_or_generate("conv", "SK하이닉스")
+
+    assert asyncio.run(scenario()).startswith("@SK하이닉스")
+    assert service.generated == ["SK하이닉스"]
+
+
+def test_stale_cache_for_other_question_falls_back_to_live_generation():
+    service = FakeRecommendationService()
+
+    async def scenario():
+        await service.prefetch("conv", "이전 질문", "이전 답변")
+        return await service.get_or_generate("conv", "새 질문")
+
+    assert asyncio.run(scenario()).startswith("@새 질문")
+    assert service.generated == ["이전 질문", "새 질문"]
+    assert service.stats()["misses"] == 1
+
+
+def test_pending_prefetch_for_other_question_is_not_used():
+    service = FakeRecommendationService(delay=0.05)
+
+    async def scenario():
+        service.schedule_prefetch("conv", "이전 질문", "이전 답변")
+        return await service.get_or_generate("conv", "새 질문")
+
+    assert asyncio.run(scenario()).startswith("@새 질문")
+    assert service.stats()["misses"] == 1
@@ -0,0 +1,96 @@
+"""Redis 대화 메모리 테스트 (메모리 Redis 사용)"""
+
+import asyncio
+import json
+
+from services.redis_memory import RedisMemory
+
+
+def make_memory(async_redis, **kwargs):
+    kwargs.setdefault("window_turns", 2)
+    return RedisMemory(conversation_id="conv", redis_client=async_redis, **kwargs)
+
+
+def fill(redis, count):
+    for i in range(count):
+        role = "user" if i % 2 == 0 else "assistant"
+        redis.rpush("chat:conv", RedisMemory._make_record(role, f"m{i}"))
+
+
+def contents(variables):
+    return [message.content for message in variables["chat_history"]]
+
+
+def test_commit_turn_writes_question_and_answer_together(fake_redis, async_redis):
+    memory = make_memory(async_redis)
+
+    asyncio.run(memory.commit_turn("삼성전자 전망은?", "긍정적입니다.", sources=["a"]))
+
+    records = [json.loads(raw) for raw in fake_redis.lists["chat:conv"]]
+    assert [(record["role"], record["content"]) for record in records] == [
+        ("user", "삼성전자 전망은?"),
+        ("assistant", "긍정적입니다."),
+    ]
+    assert records[1]["metadata"] == {"sources": ["a"]}
+
+
+def test_summary_advances_without_gap(fake_redis, async_redis):
+    summarized = []
+
+    async def summarizer(summary, messages):
+        summarized.append([message["content"] for message in messages])
+        return f"{summary}+{len(messages)}"
+
+    memory = make_memory(async_redis, summarizer=summarizer, summary_min_messages=3)
+
+    fill(fake_redis, 7)
+    assert asyncio.run(memory.aupdate_summary())     # m0~m2 요약, m3~m6은 윈도우
+    fill(fake_redis, 2)                              # 9개: 윈도우는 m5~m8
+    assert not asyncio.run(memory.aupdate_summary())  # 윈도우 밖 미요약 메시지 m3, m4 2개 -> 최소 개수 미달
+    assert summarized[0] == ["m0", "m1", "m2"]
+
+    fill(fake_redis, 1)
+    assert asyncio.run(memory.aupdate_summary())
+    assert summarized[1] == ["m3", "m4", "m5"]         # 이전 요약 직후부터 이어서 요약
+    assert fake_redis.hget("chat:conv:metadata", "summary_upto") == "6"
+    assert "chat:conv:summary_lock" not in fake_redis.strings
+
+
+def test_unsummarized_gap_is_loaded_with_summary(fake_redis, async_redis):
+    async def summarizer(summary, messages):
+        return "요약"
+
+    memory = make_memory(async_redis, summarizer=summarizer, summary_min_messages=10)
+    fill(fake_redis, 8)
+    fake_redis.hset("chat:conv:metadata", mapping={"summary": json.dumps("요약"), "summary_upto": 2})
+
+    # 요약(m0~m1) + 요약되지 않은 m2~m3 + 윈도우 m4~m7
+    assert contents(asyncio.run(memory.aload_memory_variables({}))) == [
+        "이전 대화 요약: 요약", "m2", "m3", "m4", "m5", "m6", "m7",
+    ]
+
+    memory = make_memory(async_redis, summarizer=summarizer, gap_max_tokens=1)
+    assert contents(asyncio.run(memory.aload_memory_variables({})))[1:] == ["m3", "m4", "m5", "m6", "m7"]
+
+
+def test_summary_lock_is_not_released_by_other_worker(fake_redis, async_redis):
+    lock_key = "chat:conv:summary_lock"
+
+    async def slow_summarizer(summary, messages):
+        # 요약 도중 잠금이 만료되어 다른 워커가 잠금을 잡은 상황
+        fake_redis.strings[lock_key] = "other-worker"
+        return "요약"
+
+    memory = make_memory(async_redis, summarizer=slow_summarizer, summary_min_messages=1)
+    fill(fake_redis, 6)
+    assert asyncio.run(memory.aupdate_summary())
+    assert fake_redis.strings[lock_key] == "other-worker"
+
+
+def test_sync_save_and_load(fake_redis, async_redis):
+    memory = RedisMemory(conversation_id="conv", redis_client=async_redis, sync_redis_client=fake_redis)
+
+    memory.save_context({"input": "질문"}, {"output": "답변"})
+
+    assert contents(memory.load_memory_variables({})) == ["질문", "답변"]
+    assert contents(memory.load_memory_variables({})) == contents(asyncio.run(memory.aload_memory_variables({})))
@@ -0,0 +1,61 @@
+"""공유 Redis 커넥션 풀 테스트 (서버 연결 없이 확인 가능한 부분)"""
+
+import asyncio
+
+import pytest
+import redis
+import redis.asyncio as aioredis
+
+from services import redis_pool as redis_pool_module
+from services.redis_pool import InstrumentedBlockingConnectionPool, RedisPool
+
+def test_clients_are_created_once_and_shared():
+    pool = RedisPool("redis://localhost:6379/0", max_connections=7, timeout=0.5, sync_max_connections=2)
+    assert pool.stats() == {"max_connections": 7, "in_use": 0}
+
+    client = pool.client
+    assert pool.client is client
+    assert isinstance(client.connection_pool, InstrumentedBlockingConnectionPool)
+    assert client.connection_pool.max_connections == 7
+    assert client.connection_pool.timeout == 0.5
+    assert client.connection_pool.connection_kwargs["socket_keepalive"] is True
+
+    sync_client = pool.sync_client
+    assert pool.sync_client is sync_client
+    assert sync_client.connection_pool.max_connections == 2
+
+def test_get_redis_returns_module_client():
+    assert redis_pool_module.get_redis() is redis_pool_module.get_redis()
+    assert redis_pool_module.get_redis() is redis_pool_module.redis_pool.client
+
+def test_stats_track_acquire_release_and_errors(monkeypatch):
+    connection = object()
+
+    async def fake_get_connection(self, *args, **kwargs):
+        return connection
+
+    async def fake_release(self, conn):
+        pass
+
+    monkeypatch.setattr(aioredis.BlockingConnectionPool, "get_connection", fake_get_connection)
+    monkeypatch.setattr(aioredis.BlockingConnectionPool, "release", fake_release)
+    pool = RedisPool("redis://localhost:6379/0", max_connections=3)
+    connection_pool = pool.client.connection_pool
+
+    async def scenario():
+        first = await connection_pool.get_connection("GET")
+        await connection_pool.get_connection("GET")
+        await connection_pool.release(first)
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert (stats["acquired"], stats["in_use"], stats["peak_in_use"]) == (2, 1, 2)
+    assert stats["wait_seconds"]["count"] == 2
+
+    async def refused(self, *args, **kwargs):
+        raise redis.ConnectionError("No connection available.")
+
+    monkeypatch.setattr(aioredis.BlockingConnectionPool, "get_connection", refused)
+    with pytest.raises(redis.ConnectionError):
+        asyncio.run(connection_pool.get_connection("GET"))
+    assert pool.stats()["acquire_errors"] == 1
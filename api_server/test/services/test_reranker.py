@@ -0,0 +1,59 @@
+"""cross-encoder 재순위화 테스트"""
+
+import time
+
+import numpy as np
+
+from models import Document
+from services.reranker import CrossEncoderReranker
+
+class FakeReranker(CrossEncoderReranker):
+    """문서 길이를 점수로 쓰는 가짜 cross-encoder"""
+
+    def __init__(self, delay=0.0, **kwargs):
+        super().__init__(model_name="fake", device="cpu", **kwargs)
+        self.delay = delay
+        self.batches = []
+
+    def _load(self):
+        return None, None
+
+    def _score_batch(self, query, texts):
+        self.batches.append(len(texts))
+        time.sleep(self.delay)
+        return np.array([len(text) for text in texts], dtype=np.float32)
+
+def make_docs():
+    return [Document(id=str(i), text="x" * length, metadata={}, score=0.5) for i, length in enumerate([1, 5, 3, 4, 2])]
+
+def test_rerank_keeps_best_k_in_batches():
+    reranker = FakeReranker(batch_size=2)
+    docs, reranked = reranker.rerank("질의", make_docs(), top_k=2)
+
+    assert reranked
+    assert [doc.id for doc in docs] == ["1", "3"]
+    assert docs[0].metadata["rerank_score"] == 5.0
+    assert reranker.batches == [2, 2, 1]
+
+def test_budget_exceeded_reranks_scored_prefix():
+    reranker = FakeReranker(delay=0.05, batch_size=2)
+    docs, reranked = reranker.rerank("질의", make_docs(), top_k=4, time_budget_ms=60)
+
+    # 첫 배치(0, 1)만 채점: 채점한 후보는 점수순, 나머지는 벡터 검색 순서대로 뒤에
+    assert reranked
+    assert reranker.batches == [2]
+    assert [doc.id for doc in docs] == ["1", "0", "2", "3"]
+    assert "rerank_score" not in docs[2].metadata
+    assert reranker.stats()["partial"] == 1
+
+def test_estimated_batch_cost_prevents_first_batch_overshoot():
+    reranker = FakeReranker(delay=0.05, batch_size=2)
+    reranker.warmup()  # 배치 소요 시간 측정 (약 50ms)
+    reranker.batches.clear()
+    docs, reranked = reranker.rerank("질의", make_docs(), top_k=2, time_budget_ms=30)
+
+    assert reranker.batch_cost >= 0.05
+    assert not reranked
+    assert reranker.batches == []
+    assert [doc.id for doc in docs] == ["0", "1"]
+    assert reranker.fallbacks == 1
@@ -0,0 +1,140 @@
+"""배치 검색 테스트"""
+
+import asyncio
+
+import numpy as np
+
+from services import retrieval
+from services.retrieval import search_batch
+
+class FakeCollection:
+    metadata = {"hnsw:space": "cosine"}
+
+    def __init__(self):
+        self.calls = []
+
+    def query(self, query_embeddings, n_results):
+        self.calls.append((query_embeddings, n_results))
+        return {
+            "ids": [[f"q{i}-d{j}" for j in range(n_results)] for i in range(len(query_embeddings))],
+            "documents": [[f"text {i}-{j}" for j in range(n_results)] for i in range(len(query_embeddings))],
+            "metadatas": [[{"page": j} for j in range(n_results)] for i in range(len(query_embeddings))],
+            "distances": [[float(j) for j in range(n_results)] for i in range(len(query_embeddings))],
+        }
+
+def test_search_batch_uses_single_query_call(monkeypatch):
+    collection = FakeCollection()
+    embedded = []
+
+    def fake_embed_queries(queries, collection_name):
+        embedded.append(list(queries))
+        return np.ones((len(queries), 4), dtype=np.float32)
+
+    monkeypatch.setattr(retrieval, "embed_queries", fake_embed_queries)
+    monkeypatch.setattr(retrieval.chroma_pool, "count", lambda name: 2)
+    monkeypatch.setattr(retrieval.chroma_pool, "get_collection", lambda name: collection)
+
+    batch = search_batch(["삼성전자", "SK하이닉스", "LG에너지솔루션"], "test", top_k=5, hybrid=False)
+
+    assert embedded == [["삼성전자", "SK하이닉스", "LG에너지솔루션"]]
+    assert len(collection.calls) == 1
+    assert len(collection.calls[0][0]) == 3
+    assert collection.calls[0][1] == 2  # 문서 수보다 많이 요청하지 않음
+    assert [doc.id for doc in batch[1]] == ["q1-d0", "q1-d1"]
+    assert batch[1][1].metadata["page"] == 1
+    assert batch[1][1].metadata["similarity"] == 0.0
+    assert batch[1][0].score > batch[1][1].score
+
+def test_search_batch_empty_collection(monkeypatch):
+    monkeypatch.setattr(retrieval.chroma_pool, "count", lambda name: 0)
+    assert search_batch(["a", "b"], "test") == [[], []]
+
+class FakeSparseIndex:
+    def __init__(self, ids):
+        self.ids = ids
+
+    def search(self, query, top_k):
+        return [(doc_id, 10.0 - rank) for rank, doc_id in enumerate(self.ids[:top_k])]
+
+class HybridCollection(FakeCollection):
+    def get(self, ids, include):
+        return {
+            "ids": ids,
+            "documents": [f"exact {doc_id}" for doc_id in ids],
+            "metadatas": [{"page": 9} for _ in ids],
+            # 쿼리 임베딩(1, 1, 1, 1)과 직교 -> 코사인 유사도 0
+            "embeddings": [[1.0, -1.0, 1.0, -1.0] for _ in ids],
+        }
+
+def test_sparse_only_match_survives_min_score(monkeypatch):
+    collection = HybridCollection()
+    monkeypatch.setattr(retrieval, "embed_queries", lambda queries, name: np.ones((len(queries), 4), dtype=np.float32))
+    monkeypatch.setattr(retrieval.chroma_pool, "count", lambda name: 2)
+    monkeypatch.setattr(retrieval.chroma_pool, "get_collection", lambda name: collection)
+    monkeypatch.setattr(retrieval.sparse_indexes, "get", lambda name: FakeSparseIndex(["005930-chunk"]))
+    monkeypatch.setitem(retrieval.settings.retrieval, "min_score", 0.5)
+    monkeypatch.setitem(retrieval.settings.retrieval, "sparse_rank_cutoff", 3)
+
+    documents = search_batch(["005930"], "test", top_k=3)[0]
+    by_id = {doc.id: doc for doc in documents}
+
+    assert by_id["005930-chunk"].metadata["sparse_rank"] == 1
+    assert by_id["005930-chunk"].score < 0.5
+    assert "sparse_rank" not in by_id["q0-d1"].metadata
+
+    relevant = [doc.id for doc in retrieval.filter_relevant(documents)]
+    assert "005930-chunk" in relevant      # BM25 1위: 벡터 점수가 낮아도 유지
+    assert "q0-d1" not in relevant         # 벡터 후보만, 점수 미달
+
+class LegacyL2Collection(FakeCollection):
+    """정규화 기록 없이 만들어진 이전 l2 컬렉션 (정규화되지 않은 mean pooling 벡터)"""
+    metadata = {"hnsw:space": "l2"}
+
+def test_unnormalized_l2_collection_skips_threshold_and_calibration(monkeypatch):
+    collection = LegacyL2Collection()
+    calibrations = []
+    monkeypatch.setattr(retrieval, "embed_queries", lambda queries, name: np.ones((len(queries), 4), dtype=np.float32))
+    monkeypatch.setattr(retrieval.chroma_pool, "count", lambda name: 3)
+    monkeypatch.setattr(retrieval.chroma_pool, "get_collection", lambda name: collection)
+    monkeypatch.setattr(retrieval, "get_calibration", lambda *args: calibrations.append(args))
+    monkeypatch.setitem(retrieval.settings.retrieval, "min_score", 0.5)
+
+    documents = search_batch(["삼성전자"], "legacy", top_k=3, hybrid=False)[0]
+
+    assert calibrations == []
+    assert documents[2].score < 0.5                   # 거리만 보면 관련 없는 문서처럼 보이지만
+    assert all(doc.metadata["comparable_score"] is False for doc in documents)
+    assert retrieval.filter_relevant(documents) == documents  # 전부 걸러내지 않음
+    assert [doc.id for doc in documents] == ["q0-d0", "q0-d1", "q0-d2"]  # 순위는 거리 순 유지
+
+def test_concurrent_async_queries_share_one_batch_without_executor_threads(monkeypatch):
+    from services.embedding_cache import QueryEmbeddingCache
+    from services.inference_scheduler import EmbeddingBatchScheduler
+
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+
+    def no_executor(*args, **kwargs):
+        raise AssertionError("임베딩 대기에 실행기 스레드를 쓰면 안 됨")
+
+    scheduler = EmbeddingBatchScheduler(encode, max_batch_size=16, max_wait_ms=200)
+    monkeypatch.setattr(retrieval.registry, "get_collection_scheduler", lambda name: scheduler)
+    monkeypatch.setattr(retrieval.registry, "collection_config", lambda name: {"model": "m", "pooling": "cls"})
+    monkeypatch.setattr(retrieval, "query_embedding_cache", QueryEmbeddingCache())
+    monkeypatch.setattr(retrieval, "run_blocking", no_executor)
+
+    queries = ["a" * (i + 1) for i in range(8)]  # 실행기 max_workers(4)보다 많은 동시 요청
+
+    async def scenario():
+        return await asyncio.gather(*(retrieval.aembed_queries([query], "test") for query in queries))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        scheduler.stop()
+
+    assert [float(result[0][0]) for result in results] == [float(len(query)) for query in queries]
+    assert calls == [queries]
@@ -0,0 +1,28 @@
+"""유사도 변환 및 점수 보정 테스트"""
+
+import numpy as np
+
+from services.score_calibration import ScoreCalibration, distance_to_similarity, fit_platt, pair_distance
+
+def test_distance_to_similarity_agrees_across_spaces():
+    rng = np.random.default_rng(0)
+    query, doc = rng.normal(size=(2, 16))
+    query, doc = query / np.linalg.norm(query), doc / np.linalg.norm(doc)
+    cosine = float(query @ doc)
+
+    for space in ("cosine", "ip", "l2"):
+        distance = float(pair_distance(query, doc, space)[0])
+        assert np.isclose(distance_to_similarity(distance, space), cosine, atol=1e-6)
+
+def test_platt_scaling_separates_classes():
+    rng = np.random.default_rng(0)
+    positives = rng.normal(0.85, 0.03, size=50)
+    negatives = rng.normal(0.70, 0.03, size=500)
+    scores = np.concatenate([positives, negatives])
+    labels = np.concatenate([np.ones(50), np.zeros(500)])
+
+    calibration = ScoreCalibration(*fit_platt(scores, labels), space="cosine")
+
+    assert calibration(0.90) > 0.9
+    assert calibration(0.65) < 0.1
+    assert 0.3 < calibration(0.775) < 0.7
@@ -0,0 +1,106 @@
+"""BM25 희소 인덱스 테스트"""
+
+import json
+
+import numpy as np
+
+from services import sparse_index
+from services.sparse_index import (
+    SparseIndex,
+    SparseIndexRegistry,
+    StringArray,
+    decode_varints,
+    encode_varints,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+DOCS = {
+    "a": "삼성전자 4Q24 예상 영업이익을 기존 8.1조원에서 7.9조원으로 하향 조정한다.",
+    "b": "SK하이닉스(000660)는 HBM 수요 증가로 영업이익이 개선될 전망이다.",
+    "c": "LG에너지솔루션의 전기차 배터리 출하량은 둔화되었다.",
+}
+
+def test_varint_roundtrip():
+    values = [0, 1, 127, 128, 300, 16384, 2 ** 40]
+    data = np.frombuffer(encode_varints(values), dtype=np.uint8)
+    assert decode_varints(data).tolist() == values
+
+def test_tokenize_keeps_figures_and_ngrams():
+    tokens = tokenize("영업이익은 7.9조원")
+    assert "7.9조원" in tokens
+    assert "#영업" in tokens and "#이익" in tokens
+
+def test_search_exact_figures_and_tickers():
+    index = SparseIndex.build(list(DOCS), list(DOCS.values()))
+    assert index.search("영업이익 7.9조원", top_k=1)[0][0] == "a"
+    assert index.search("000660", top_k=3) == index.search("000660", top_k=1)
+    assert index.search("000660", top_k=1)[0][0] == "b"
+    assert index.search("존재하지않는단어xyz") == []
+
+def test_save_and_memmap_load(tmp_path):
+    index = SparseIndex.build(list(DOCS), list(DOCS.values()))
+    index.save(str(tmp_path), generation=1)
+    index.save(str(tmp_path), generation=2)
+    index.save(str(tmp_path), generation=3)
+    loaded = SparseIndex.load(str(tmp_path))
+
+    assert isinstance(loaded.postings, np.memmap)
+    assert isinstance(loaded.vocabulary.data, np.memmap)
+    assert isinstance(loaded.doc_ids.offsets, np.memmap)
+    assert loaded.search("배터리 출하량") == index.search("배터리 출하량")
+    assert set(json.loads((tmp_path / "meta.json").read_text())) == {"generation", "ngram", "k1", "b"}
+    assert not list(tmp_path.glob("*-1.*"))  # 두 세대 전 파일 정리
+    assert list(tmp_path.glob("*-2.*"))      # 직전 세대는 남겨 둠 (직전 meta.json을 읽은 프로세스용)
+
+def test_load_retries_when_generation_removed(tmp_path, monkeypatch):
+    index = SparseIndex.build(list(DOCS), list(DOCS.values()))
+    index.save(str(tmp_path), generation=1)
+    real_load = StringArray.load
+    calls = []
+
+    def load_after_rebuild(directory, name, generation):
+        # 첫 로드 도중 다른 프로세스가 세대 2, 3을 저장해 세대 1이 정리된 상황
+        if not calls:
+            index.save(directory, generation=2)
+            index.save(directory, generation=3)
+        calls.append(generation)
+        return real_load(directory, name, generation)
+
+    monkeypatch.setattr(StringArray, "load", staticmethod(load_after_rebuild))
+    loaded = SparseIndex.load(str(tmp_path))
+
+    assert calls[0] == 1 and calls[-1] == 3
+    assert loaded.search("000660", top_k=1)[0][0] == "b"
+
+def test_string_array_find():
+    terms = StringArray.from_strings(sorted(["#영업", "000660", "7.9조원", "hbm", "배터리"]))
+    assert terms[terms.find("hbm")] == "hbm"
+    assert terms.find("배터리") == len(terms) - 1
+    assert terms.find("없음") is None
+    assert StringArray.from_strings([]).find("a") is None
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b"]
+
+def test_missing_index_built_in_background(tmp_path, monkeypatch):
+    class FakeCollection:
+        def get(self, include):
+            return {"ids": list(DOCS), "documents": list(DOCS.values())}
+
+    monkeypatch.setattr(sparse_index.chroma_pool, "get_collection", lambda name: FakeCollection())
+    registry = SparseIndexRegistry(str(tmp_path))
+
+    assert registry.get("reports") is None   # 이전에 인덱싱된 컬렉션: 구축 전에는 벡터 검색만 사용
+    thread = registry._building.get("reports")
+    if thread is not None:
+        thread.join(timeout=5)
+
+    assert registry.get("reports").search("000660", top_k=1)[0][0] == "b"
+    assert not registry._building
+
+def test_missing_index_not_built_when_disabled(tmp_path):
+    registry = SparseIndexRegistry(str(tmp_path), build_missing=False)
+    assert registry.get("reports") is None
+    assert not registry._building
@@ -0,0 +1,120 @@
+"""Chroma 클라이언트 풀 테스트"""
+
+import threading
+import time
+
+from services.vectorstore import ChromaClientPool
+
+def make_pool(tmp_path, rebuild_delay):
+    pool = ChromaClientPool(str(tmp_path), rebuild_delay=rebuild_delay)
+    pool._refresh_count = lambda name: pool._counts.__setitem__(name, 0)
+    return pool
+
+def test_background_listeners_coalesce_invalidations(tmp_path):
+    pool = make_pool(tmp_path, rebuild_delay=0.1)
+    immediate, rebuilt = [], []
+    done = threading.Event()
+    pool.add_invalidation_listener(immediate.append)
+    pool.add_invalidation_listener(lambda name: (rebuilt.append(name), done.set()), background=True)
+
+    started = time.monotonic()
+    for _ in range(5):
+        pool.invalidate("reports")   # PDF마다 무효화해도 호출한 스레드는 막히지 않음
+    assert time.monotonic() - started < 0.1
+    assert immediate == ["reports"] * 5
+    assert rebuilt == []
+
+    assert done.wait(2)
+    time.sleep(0.2)
+    assert rebuilt == ["reports"]    # 배치 전체에 한 번만 재구축
+
+def test_flush_runs_pending_rebuilds(tmp_path):
+    pool = make_pool(tmp_path, rebuild_delay=60)
+    rebuilt = []
+    pool.add_invalidation_listener(rebuilt.append, background=True)
+
+    pool.invalidate("a")
+    pool.invalidate("b")
+    pool.invalidate("a")
+    pool.stop()
+
+    assert sorted(rebuilt) == ["a", "b"]
+    pool.flush()
+    assert pool.rebuilds == 2
+
+class FakeCollection:
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.metadata = metadata
+        self.documents = 0
+        self.counts = 0
+
+    def count(self):
+        self.counts += 1
+        return self.documents
+
+class FakeClient:
+    def __init__(self):
+        self.stored = {}
+        self.opened = []
+
+    def get_collection(self, name, embedding_function):
+        self.opened.append(name)
+        if name not in self.stored:
+            raise ValueError(f"{name} does not exist")
+        return self.stored[name]
+
+    def get_or_create_collection(self, name, embedding_function, metadata):
+        return self.stored.setdefault(name, FakeCollection(name, metadata))
+
+def test_collection_handle_reused_until_invalidated(tmp_path):
+    pool = ChromaClientPool(str(tmp_path))
+    client = pool._client = FakeClient()
+
+    collection = pool.get_collection("reports")
+    assert pool.get_collection("reports") is collection
+    assert client.opened == ["reports"]
+    assert pool.space("reports") == collection.metadata["hnsw:space"]
+
+    # 개수는 최초 1회만 집계하고 이후에는 캐시 사용
+    collection.documents = 3
+    assert pool.count("reports") == 3
+    collection.documents = 5
+    assert pool.count("reports") == 3
+    assert collection.counts == 1
+
+    # 인덱싱 후 무효화하면 핸들을 다시 열고 개수를 즉시 갱신
+    pool.invalidate("reports")
+    assert pool.count("reports") == 5
+    assert client.opened == ["reports", "reports"]
+    pool.get_collection("reports")
+    assert client.opened == ["reports", "reports"]
+
+def test_invalidate_all_reopens_every_cached_collection(tmp_path):
+    pool = ChromaClientPool(str(tmp_path))
+    client = pool._client = FakeClient()
+    notified = []
+    pool.add_invalidation_listener(notified.append)
+
+    pool.get_collection("a")
+    pool.get_collection("b")
+    pool.invalidate()
+
+    assert sorted(notified) == ["a", "b"]
+    assert sorted(client.opened) == ["a", "a", "b", "b"]
+
+def test_background_refresh_updates_counts(tmp_path):
+    pool = ChromaClientPool(str(tmp_path), refresh_interval=0.02)
+    pool._client = FakeClient()
+    collection = pool.get_collection("reports")
+    assert pool.count("reports") == 0
+
+    collection.documents = 7
+    pool.start()
+    try:
+        deadline = time.monotonic() + 2
+        while pool.count("reports") != 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+    assert pool.count("reports") == 7
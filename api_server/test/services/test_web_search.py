@@ -0,0 +1,121 @@
+"""웹 검색 클라이언트 테스트 (로컬 스텁 서버 사용)"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services.web_search import WebSearchClient, WebSearchError
+
+
+class StubSearchServer:
+    """질의별 결과를 돌려주는 Custom Search API 스텁 (앞의 fail_first번 요청은 503)"""
+
+    def __init__(self, results, fail_first=0):
+        self.results = results
+        self.fail_first = fail_first
+        self.queries = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)["q"][0]
+                stub.queries.append(query)
+                if len(stub.queries) <= stub.fail_first:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({"items": stub.results.get(query, [])}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/customsearch/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_client(url, **kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    return WebSearchClient(api_key="key", cx="cx", endpoint=url, **kwargs)
+
+
+def item(link):
+    return {"title": link, "link": f"https://example.com/{link}", "snippet": link}
+
+
+def run(client, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def test_search_encodes_query_and_caches_by_normalized_query():
+    query = "삼성전자 & SK하이닉스?"
+    with StubSearchServer({query: [item("a")]}) as server:
+        client = make_client(server.url)
+
+        async def search_twice():
+            first = await client.search(query)
+            second = await client.search("  삼성전자 &  sk하이닉스? ")
+            return first, second
+
+        first, second = run(client, search_twice())
+
+    assert server.queries == [query]
+    assert first == second == [item("a")]
+    assert client.stats()["cache_hits"] == 1
+
+
+def test_retries_transient_errors():
+    with StubSearchServer({"q": [item("a")]}, fail_first=2) as server:
+        client = make_client(server.url, retries=2)
+        assert run(client, client.search("q")) == [item("a")]
+
+    assert len(server.queries) == 3
+    assert client.stats()["retried"] == 2
+
+
+def test_gives_up_after_retries():
+    with StubSearchServer({"q": [item("a")]}, fail_first=5) as server:
+        client = make_client(server.url, retries=1)
+        with pytest.raises(WebSearchError):
+            run(client, client.search("q"))
+
+    assert len(server.queries) == 2
+
+
+def test_search_many_merges_and_dedupes():
+    results = {
+        "q1": [item("a"), item("b")],
+        "q2": [item("b"), item("c")],
+    }
+    with StubSearchServer(results) as server:
+        client = make_client(server.url)
+        merged = run(client, client.search_many(["q1", "q2", "q1"]))
+
+    assert sorted(server.queries) == ["q1", "q2"]
+    assert [web_item["title"] for web_item in merged] == ["b", "a", "c"]
+    assert merged[0]["fused_score"] > merged[1]["fused_score"]
@@ -0,0 +1,40 @@
+"""RAG 컨텍스트 토큰 예산 배분 테스트"""
+
+from langchain.schema import AIMessage, HumanMessage
+
+from models import Document
+from utils.context_packer import ContextPacker, dedupe_chunks, estimate_tokens
+
+def doc(id, text, score):
+    return Document(id=id, text=text, metadata={}, score=score)
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("영업이익") == 4
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("영업이익 7.9조원") == 4 + 2 + 1
+
+def test_dedupe_orders_by_score_and_trims_overlap():
+    body = "가" * 40
+    first = doc("a", "삼성전자 4분기 실적 " + body, 0.6)
+    second = doc("b", body + " 메모리 가격 반등", 0.9)
+    contained = doc("c", "메모리 가격", 0.5)
+
+    deduped = dedupe_chunks([first, second, contained], min_overlap=32)
+
+    assert [d.id for d in deduped] == ["b", "a"]
+    assert deduped[1].text == "삼성전자 4분기 실적"
+
+def test_pack_splits_budget_between_history_and_context():
+    packer = ContextPacker(max_tokens=100, history_ratio=0.3)
+    history = [HumanMessage(content="가" * 20), AIMessage(content="나" * 20), HumanMessage(content="다" * 10)]
+    documents = [doc("a", "라" * 50, 0.9), doc("b", "마" * 30, 0.8), doc("c", "바" * 10, 0.7)]
+
+    packed = packer.pack(documents, history)
+
+    # 이력은 최근 메시지부터 30토큰까지, 남은 예산은 컨텍스트에 사용
+    assert [m.content for m in packed.history] == ["나" * 20, "다" * 10]
+    assert packed.history_tokens == 30
+    assert [d.id for d in packed.documents] == ["a", "c"]
+    assert packed.context_tokens == 60
+    assert packed.context == "라" * 50 + "\n\n" + "바" * 10
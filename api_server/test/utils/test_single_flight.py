@@ -0,0 +1,141 @@
+"""single-flight 요청 합치기 테스트"""
+
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("q", work) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_finished_call_is_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        return [await flight.do("q", work), await flight.do("q", work)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_errors_propagate_to_every_waiter():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("quota")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("q", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "answer"
+
+
+def test_stream_is_teed_to_late_subscribers():
+    flight = SingleFlight()
+    produced = []
+
+    async def tokens():
+        for token in ["삼성", "전자", "는"]:
+            produced.append(token)
+            await asyncio.sleep(0.01)
+            yield token
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [token async for token in flight.stream("q", tokens)]
+
+    async def scenario():
+        return await asyncio.gather(collect(0), collect(0.015), collect(0.015))
+
+    assert asyncio.run(scenario()) == [["삼성", "전자", "는"]] * 3
+    assert produced == ["삼성", "전자", "는"]
+    assert flight.stats()["coalesced"] == 2
+
+
+def test_stream_error_reaches_subscribers():
+    flight = SingleFlight()
+
+    async def tokens():
+        yield "a"
+        raise RuntimeError("stream failed")
+
+    async def collect():
+        return [token async for token in flight.stream("q", tokens)]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect())
+
+
+def test_stream_cancelled_when_every_subscriber_leaves():
+    flight = SingleFlight()
+    produced = []
+    cancelled = []
+
+    async def tokens():
+        try:
+            for token in ["삼성", "전자", "는", "반도체"]:
+                produced.append(token)
+                await asyncio.sleep(0.01)
+                yield token
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def first_token():
+        stream = flight.stream("q", tokens)
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    async def scenario():
+        firsts = await asyncio.gather(first_token(), first_token())
+        await asyncio.sleep(0.03)
+        restarted = [token async for token in flight.stream("q", tokens)]
+        return firsts, restarted
+
+    firsts, restarted = asyncio.run(scenario())
+    assert firsts == ["삼성", "삼성"]
+    assert cancelled == [True]
+    assert produced.count("반도체") == 1  # 취소된 첫 스트림은 끝까지 생성하지 않음
+    assert restarted == ["삼성", "전자", "는", "반도체"]